@@ -22,3 +22,67 @@ DEEPSEEK_BASE_URL = os.getenv("DEEPSEEK_BASE_URL")
 DEEPSEEK_MODEL = os.getenv("DEEPSEEK_MODEL")
 RULES_PATH = os.getenv("RULES_PATH")
 REPORTS_DIR = os.getenv("REPORTS_DIR")
+DEEPSEEK_MAX_PARALLEL = int(os.getenv("DEEPSEEK_MAX_PARALLEL", "8"))
+DEEPSEEK_POOL_SIZE = int(os.getenv("DEEPSEEK_POOL_SIZE", "16"))
+DEEPSEEK_MAX_RETRIES = int(os.getenv("DEEPSEEK_MAX_RETRIES", "3"))
+DEEPSEEK_BACKOFF_BASE_SEC = float(os.getenv("DEEPSEEK_BACKOFF_BASE_SEC", "0.5"))
+DEEPSEEK_BACKOFF_MAX_SEC = float(os.getenv("DEEPSEEK_BACKOFF_MAX_SEC", "8"))
+DEEPSEEK_BREAKER_THRESHOLD = int(os.getenv("DEEPSEEK_BREAKER_THRESHOLD", "5"))
+DEEPSEEK_BREAKER_COOLDOWN_SEC = float(os.getenv("DEEPSEEK_BREAKER_COOLDOWN_SEC", "30"))
+LLM_CACHE_ENABLED = os.getenv("LLM_CACHE_ENABLED", "true").lower() == "true"
+LLM_CACHE_PATH = os.getenv("LLM_CACHE_PATH", "../cache/llm_cache.sqlite3")
+LLM_CACHE_MEMORY_ITEMS = int(os.getenv("LLM_CACHE_MEMORY_ITEMS", "256"))
+LLM_CACHE_TTL_SEC = float(os.getenv("LLM_CACHE_TTL_SEC", str(7 * 86400)))
+LLM_CACHE_MAX_MB = float(os.getenv("LLM_CACHE_MAX_MB", "256"))
+DEEPSEEK_CHUNK_CHARS = int(os.getenv("DEEPSEEK_CHUNK_CHARS", "15000"))
+DEEPSEEK_CHUNK_CONCURRENCY = int(os.getenv("DEEPSEEK_CHUNK_CONCURRENCY", "4"))
+DEEPSEEK_MAX_CHUNKS = int(os.getenv("DEEPSEEK_MAX_CHUNKS", "40"))
+PDF_WORKERS = int(os.getenv("PDF_WORKERS", str(min(4, os.cpu_count() or 1))))
+PDF_PARALLEL_MIN_PAGES = int(os.getenv("PDF_PARALLEL_MIN_PAGES", "40"))
+PDF_PAGES_PER_TASK = int(os.getenv("PDF_PAGES_PER_TASK", "25"))
+OCR_ENABLED = os.getenv("OCR_ENABLED", "true").lower() == "true"
+OCR_WORKERS = int(os.getenv("OCR_WORKERS", str(PDF_WORKERS)))
+OCR_RESOLUTION = int(os.getenv("OCR_RESOLUTION", "300"))
+PDF_ENGINE = os.getenv("PDF_ENGINE", "adaptive")
+PDF_MIN_CHAR_DENSITY = float(os.getenv("PDF_MIN_CHAR_DENSITY", "1.0"))
+EXTRACTION_CACHE_ENABLED = os.getenv("EXTRACTION_CACHE_ENABLED", "true").lower() == "true"
+EXTRACTION_CACHE_PATH = os.getenv("EXTRACTION_CACHE_PATH", "../cache/extraction_cache.sqlite3")
+EXTRACTION_CACHE_MEMORY_ITEMS = int(os.getenv("EXTRACTION_CACHE_MEMORY_ITEMS", "32"))
+EXTRACTION_CACHE_TTL_SEC = float(os.getenv("EXTRACTION_CACHE_TTL_SEC", str(30 * 86400)))
+EXTRACTION_CACHE_MAX_MB = float(os.getenv("EXTRACTION_CACHE_MAX_MB", "1024"))
+INGEST_CHUNK_KB = int(os.getenv("INGEST_CHUNK_KB", "1024"))
+INGEST_MEMORY_MAX_MB = float(os.getenv("INGEST_MEMORY_MAX_MB", "16"))
+INGEST_SPILL_DIR = os.getenv("INGEST_SPILL_DIR", "") or None
+CPU_WORKERS = int(os.getenv("CPU_WORKERS", str(min(4, os.cpu_count() or 1))))
+IO_WORKERS = int(os.getenv("IO_WORKERS", "32"))
+STAGE_LIMITS = os.getenv("STAGE_LIMITS", "analyze=4,orchestrate=4,compliance=16,decision=16,decision_batch=2,compliance_batch=2,orchestrate_batch=2,report=2,copilot=8,rewrite=8,scrape=8")
+PIPELINE_STAGE_WORKERS = int(os.getenv("PIPELINE_STAGE_WORKERS", "32"))
+STAGE_DEFAULT_LIMIT = int(os.getenv("STAGE_DEFAULT_LIMIT", "8"))
+STAGE_MAX_QUEUE = int(os.getenv("STAGE_MAX_QUEUE", "32"))
+STAGE_QUEUE_TIMEOUT_SEC = float(os.getenv("STAGE_QUEUE_TIMEOUT_SEC", "30"))
+PDF_OFFLOAD = os.getenv("PDF_OFFLOAD", "true").lower() == "true"
+MODEL_ARTIFACT_DIR = os.getenv("MODEL_ARTIFACT_DIR", "../models/decision")
+MODEL_VERSION = os.getenv("MODEL_VERSION", "latest")
+MODEL_TRAIN_IF_MISSING = os.getenv("MODEL_TRAIN_IF_MISSING", "true").lower() == "true"
+MODEL_WARM_UP = os.getenv("MODEL_WARM_UP", "true").lower() == "true"
+MODEL_CACHE_VERSIONS = int(os.getenv("MODEL_CACHE_VERSIONS", "3"))
+MODEL_REGISTRY_POLL_SEC = float(os.getenv("MODEL_REGISTRY_POLL_SEC", "2"))
+MODEL_SHADOW_MAX_PENDING = int(os.getenv("MODEL_SHADOW_MAX_PENDING", "4"))
+RF_COMPILED_INFERENCE = os.getenv("RF_COMPILED_INFERENCE", "true").lower() == "true"
+DECISION_BATCH_MAX = int(os.getenv("DECISION_BATCH_MAX", "50000"))
+DECISION_MICROBATCH_ENABLED = os.getenv("DECISION_MICROBATCH_ENABLED", "true").lower() == "true"
+DECISION_MICROBATCH_WINDOW_MS = float(os.getenv("DECISION_MICROBATCH_WINDOW_MS", "2"))
+DECISION_MICROBATCH_MAX = int(os.getenv("DECISION_MICROBATCH_MAX", "64"))
+RULE_PLAN_CACHE_SIZE = int(os.getenv("RULE_PLAN_CACHE_SIZE", "32"))
+RULES_RELOAD_CHECK_SEC = float(os.getenv("RULES_RELOAD_CHECK_SEC", "1"))
+COMPLIANCE_BATCH_MAX = int(os.getenv("COMPLIANCE_BATCH_MAX", "50000"))
+ORCHESTRATE_BATCH_MAX_DOCUMENTS = int(os.getenv("ORCHESTRATE_BATCH_MAX_DOCUMENTS", "200"))
+ORCHESTRATE_BATCH_MAX_ZIP_MB = float(os.getenv("ORCHESTRATE_BATCH_MAX_ZIP_MB", "1024"))
+ORCHESTRATE_BATCH_IN_FLIGHT = int(os.getenv("ORCHESTRATE_BATCH_IN_FLIGHT", "16"))
+ORCHESTRATE_BATCH_CPU_LIMIT = int(os.getenv("ORCHESTRATE_BATCH_CPU_LIMIT", str(CPU_WORKERS)))
+ORCHESTRATE_BATCH_LLM_LIMIT = int(os.getenv("ORCHESTRATE_BATCH_LLM_LIMIT", str(DEEPSEEK_MAX_PARALLEL)))
+CONTEXT_REGISTRY_PATH = os.getenv("CONTEXT_REGISTRY_PATH", "../cache/context_registry.sqlite3")
+CONTEXT_REGISTRY_MEMORY_ITEMS = int(os.getenv("CONTEXT_REGISTRY_MEMORY_ITEMS", "64"))
+CONTEXT_REGISTRY_TTL_SEC = float(os.getenv("CONTEXT_REGISTRY_TTL_SEC", str(30 * 86400)))
+CONTEXT_REGISTRY_MAX_MB = float(os.getenv("CONTEXT_REGISTRY_MAX_MB", "64"))
+CONTEXT_REGISTRY_DERIVED_ITEMS = int(os.getenv("CONTEXT_REGISTRY_DERIVED_ITEMS", "64"))
@@ -1,8 +1,23 @@
-from fastapi import FastAPI
+import threading
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
+from app.core.config import MODEL_WARM_UP
 from app.routers.endpoints import router
+from app.services.decision_service import warm_up_models
+from app.services.stage_executor import StageRejected
 
-app = FastAPI(title="RiskIQ AI Service")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Warm in the background: the port opens immediately and /ready flips once models are loaded.
+    if MODEL_WARM_UP:
+        threading.Thread(target=warm_up_models, name="model-warm-up", daemon=True).start()
+    yield
+
+
+app = FastAPI(title="RiskIQ AI Service", lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -18,3 +33,12 @@ app.add_middleware(
 )
 
 app.include_router(router)
+
+
+@app.exception_handler(StageRejected)
+async def stage_rejected_handler(request: Request, exc: StageRejected):
+    return JSONResponse(
+        status_code=exc.status_code,
+        content={"detail": str(exc), "stage": exc.stage},
+        headers={"Retry-After": str(max(1, int(round(exc.retry_after))))},
+    )
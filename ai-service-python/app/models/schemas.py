@@ -1,16 +1,18 @@
 from pydantic import BaseModel, Field
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional
 
 
 class AnalyzeRequest(BaseModel):
     file_path: str
     file_name: str
+    use_cache: bool = True
 
 
 class AnalyzeResponse(BaseModel):
     structured_data: Dict[str, Any]
     deepseek_output: Dict[str, Any]
     rules: List[Dict[str, Any]]
+    rule_set_version: str = ""
 
 
 class ComplianceRequest(BaseModel):
@@ -18,11 +20,48 @@ class ComplianceRequest(BaseModel):
     rules: List[Dict[str, Any]]
 
 
+class ComplianceBatchRequest(BaseModel):
+    items: List[Dict[str, Any]] = Field(default_factory=list)
+    rules: List[Dict[str, Any]]
+    include_details: bool = True
+
+
+class StoredSession(BaseModel):
+    structured_data: Dict[str, Any]
+    compliance: Dict[str, Any]
+    decision: Dict[str, Any] = Field(default_factory=dict)
+    document_profile: Dict[str, Any] = Field(default_factory=dict)
+
+
+class ComplianceReevaluateRequest(BaseModel):
+    items: List[StoredSession] = Field(default_factory=list)
+    previous_rules: List[Dict[str, Any]] = Field(default_factory=list)
+    previous_rules_ref: str = ""
+    rules: List[Dict[str, Any]] = Field(default_factory=list)
+    rules_ref: str = ""
+    knowledge_base: List[Dict[str, Any]] = Field(default_factory=list)
+    knowledge_base_ref: str = ""
+
+
 class DecisionRequest(BaseModel):
     extracted_data: Dict[str, Any]
     compliance_summary: Dict[str, Any]
 
 
+class DecisionBatchRequest(BaseModel):
+    items: List[DecisionRequest] = Field(default_factory=list)
+    model_version: Optional[str] = None
+
+
+class ModelActivateRequest(BaseModel):
+    version: str
+
+
+class ModelShadowRequest(BaseModel):
+    version: Optional[str] = None
+    sample_rate: float = Field(default=1.0, ge=0.0, le=1.0)
+
+
 class ReportRequest(BaseModel):
     document_ref: str
     document_name: str
@@ -42,6 +81,19 @@ class OrchestrateRequest(BaseModel):
     rules: List[Dict[str, Any]] = Field(default_factory=list)
     knowledge_base: List[Dict[str, Any]] = Field(default_factory=list)
     agent_prompts: List[Dict[str, Any]] = Field(default_factory=list)
+    use_cache: bool = True
+    rules_ref: str = ""
+    knowledge_base_ref: str = ""
+    agent_prompts_ref: str = ""
+
+
+class ContextRegisterRequest(BaseModel):
+    items: List[Dict[str, Any]] = Field(default_factory=list)
+
+
+class ContextInvalidateRequest(BaseModel):
+    kind: Optional[str] = None
+    hash: Optional[str] = None
 
 
 class CombinedReportRequest(BaseModel):
@@ -66,6 +118,7 @@ class ClauseRewriteRequest(BaseModel):
     violation: Dict[str, Any]
     session_context: Dict[str, Any]
     current_clause: str = ""
+    use_cache: bool = True
 
 
 class ResearchAssistantRequest(BaseModel):
@@ -1,53 +1,189 @@
-import base64
+import asyncio
 import os
-import tempfile
 import json
+import sys
+from contextlib import AsyncExitStack
 from fastapi import APIRouter, HTTPException, UploadFile, File, Form
-from app.models.schemas import AnalyzeRequest, ComplianceRequest, DecisionRequest, ReportRequest, OrchestrateRequest, CombinedReportRequest, SessionCopilotRequest, ClauseRewriteRequest
-from app.services.extract_service import extract_document_text, normalize_output
+from fastapi.responses import JSONResponse, StreamingResponse
+from typing import List
+from app.core.config import COMPLIANCE_BATCH_MAX, DECISION_BATCH_MAX, ORCHESTRATE_BATCH_MAX_DOCUMENTS, ORCHESTRATE_BATCH_MAX_ZIP_MB
+from app.models.schemas import AnalyzeRequest, ComplianceRequest, ComplianceBatchRequest, ComplianceReevaluateRequest, ContextInvalidateRequest, ContextRegisterRequest, DecisionRequest, DecisionBatchRequest, ModelActivateRequest, ModelShadowRequest, ReportRequest, OrchestrateRequest, CombinedReportRequest, SessionCopilotRequest, ClauseRewriteRequest
+from app.services.extract_service import open_document_text, normalize_output
 from app.services.deepseek_service import extract_structured_data, session_copilot, rewrite_clause
-from app.services.rules_loader import load_rules
-from app.services.compliance_service import validate_rules
-from app.services.decision_service import score_decision
+from app.services.rules_loader import RULES_FILE, load_rule_plan
+from app.services.compliance_service import validate_rules, validate_rules_batch
+from app.services.context_registry import CONTEXT_REGISTRY, ContextNotFound
+from app.services.decision_service import (
+    DECISION_BATCHER,
+    SHADOW_SCORER,
+    activate_model,
+    active_model_version,
+    model_readiness,
+    observe_shadow,
+    score_decisions_timed,
+    set_shadow_model,
+    submit_decision,
+)
+from app.services.model_store import REGISTRY
 from app.services.report_service import generate_report, generate_combined_report
-from app.services.agent_orchestrator import orchestrate_agents
+from app.services.agent_orchestrator import orchestrate_agents, orchestrate_batch, reevaluate_compliance, resolve_context
 from app.services.web_scrape_service import scrape_reference_url
+from app.services.deepseek_client import DEEPSEEK_CLIENT
+from app.services.llm_cache import LLM_CACHE
+from app.services.extraction_cache import EXTRACTION_CACHE
+from app.services.ingest_service import ingest_base64, ingest_upload, ingest_zip
+from app.services.stage_executor import executor_stats, run_blocking, run_cpu, run_io, stage
 
 router = APIRouter()
 
 
 @router.get("/health")
-def health():
-    return {"status": "ok"}
+async def health():
+    return {"status": "ok", "deepseek_circuit": DEEPSEEK_CLIENT.breaker.snapshot()["state"]}
+
+
+@router.get("/ready")
+async def ready():
+    models = model_readiness()
+    return JSONResponse(status_code=200 if models["state"] == "ready" else 503, content={"ready": models["state"] == "ready", "models": models})
+
+
+@router.get("/metrics")
+async def metrics():
+    return {
+        "deepseek": DEEPSEEK_CLIENT.stats(),
+        "llm_cache": LLM_CACHE.stats(),
+        "extraction_cache": EXTRACTION_CACHE.stats(),
+        "executor": executor_stats(),
+        "micro_batching": {"decision": DECISION_BATCHER.stats()},
+        "shadow": SHADOW_SCORER.stats(),
+        "rules_file": RULES_FILE.stats(),
+    }
+
+
+@router.get("/models")
+async def list_models():
+    try:
+        return await run_blocking(REGISTRY.describe)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"model_registry_failed: {str(e)}")
+
+
+@router.post("/models/activate")
+async def models_activate(payload: ModelActivateRequest):
+    try:
+        return await run_blocking(activate_model, payload.version)
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=404, detail=f"model_not_found: {str(e)}")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"model_rejected: {str(e)}")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"model_activate_failed: {str(e)}")
+
+
+@router.post("/models/shadow")
+async def models_shadow(payload: ModelShadowRequest):
+    try:
+        return await run_blocking(set_shadow_model, payload.version, payload.sample_rate)
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=404, detail=f"model_not_found: {str(e)}")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"model_rejected: {str(e)}")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"model_shadow_failed: {str(e)}")
 
 
 @router.post("/analyze-document")
-def analyze_document(payload: AnalyzeRequest):
-    text = extract_document_text(payload.file_path)
-    structured, deepseek_raw = extract_structured_data(text)
+async def analyze_document(payload: AnalyzeRequest):
+    return await run_io("analyze", _analyze_document, payload)
+
+
+def _analyze_document(payload: AnalyzeRequest):
+    document = open_document_text(payload.file_path, use_cache=payload.use_cache)
+    text = document.text()
+    structured, deepseek_raw = extract_structured_data(text, use_cache=payload.use_cache)
     normalized = normalize_output(structured)
-    rules = load_rules()
+    rule_plan = load_rule_plan()
 
     return {
         "structured_data": normalized,
+        "document_profile": document.profile(),
         "deepseek_output": deepseek_raw,
-        "rules": rules,
+        "rules": rule_plan.rules,
+        "rule_set_version": rule_plan.version,
     }
 
 
 @router.post("/validate-compliance")
-def validate_compliance(payload: ComplianceRequest):
-    return validate_rules(payload.extracted_data, payload.rules)
+async def validate_compliance(payload: ComplianceRequest):
+    try:
+        return await run_cpu("compliance", validate_rules, payload.extracted_data, payload.rules)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"invalid_rules: {str(e)}")
+
+
+@router.post("/validate-compliance/batch")
+async def validate_compliance_batch(payload: ComplianceBatchRequest):
+    if len(payload.items) > COMPLIANCE_BATCH_MAX:
+        raise HTTPException(status_code=413, detail=f"batch_too_large: {len(payload.items)} > {COMPLIANCE_BATCH_MAX}")
+    try:
+        return await run_cpu("compliance_batch", validate_rules_batch, payload.items, payload.rules, payload.include_details)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"invalid_rules: {str(e)}")
+
+
+@router.post("/compliance/reevaluate")
+async def compliance_reevaluate(payload: ComplianceReevaluateRequest):
+    if len(payload.items) > COMPLIANCE_BATCH_MAX:
+        raise HTTPException(status_code=413, detail=f"batch_too_large: {len(payload.items)} > {COMPLIANCE_BATCH_MAX}")
+    try:
+        # Runs in-process: the patch is light and decision re-scores go through the shared micro-batcher.
+        async with stage("compliance_batch").slot():
+            return await run_blocking(
+                reevaluate_compliance,
+                [item.model_dump() for item in payload.items],
+                payload.previous_rules,
+                payload.rules,
+                payload.knowledge_base,
+                previous_rules_ref=payload.previous_rules_ref,
+                rules_ref=payload.rules_ref,
+                knowledge_base_ref=payload.knowledge_base_ref,
+            )
+    except ContextNotFound as exc:
+        raise HTTPException(status_code=404, detail=f"context_not_found: {exc.kind}/{exc.ref}")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"invalid_rules: {str(e)}")
 
 
 @router.post("/decision-score")
-def decision_score(payload: DecisionRequest):
-    return score_decision(payload.extracted_data, payload.compliance_summary)
+async def decision_score(payload: DecisionRequest):
+    async with stage("decision").slot():
+        # A first-start training run must not block the event loop; afterwards this is a pointer read.
+        await run_blocking(active_model_version)
+        return await asyncio.wrap_future(submit_decision(payload.extracted_data, payload.compliance_summary))
+
+
+@router.post("/decision-score/batch")
+async def decision_score_batch(payload: DecisionBatchRequest):
+    if len(payload.items) > DECISION_BATCH_MAX:
+        raise HTTPException(status_code=413, detail=f"batch_too_large: {len(payload.items)} > {DECISION_BATCH_MAX}")
+    items = [(item.extracted_data, item.compliance_summary) for item in payload.items]
+    version = payload.model_version or await run_blocking(active_model_version)
+    results, elapsed_ms = await run_cpu("decision_batch", score_decisions_timed, items, version)
+    if not payload.model_version:
+        observe_shadow(items, results, version, elapsed_ms)
+    return {
+        "count": len(results),
+        "model_version": version,
+        "results": results,
+    }
 
 
 @router.post("/generate-report")
-def report(payload: ReportRequest):
-    return generate_report(
+async def report(payload: ReportRequest):
+    return await run_cpu(
+        "report",
+        generate_report,
         payload.document_ref,
         payload.document_name,
         payload.structured_data,
@@ -60,18 +196,44 @@ def report(payload: ReportRequest):
     )
 
 
+@router.post("/context/invalidate")
+async def context_invalidate(payload: ContextInvalidateRequest):
+    try:
+        removed = await run_blocking(CONTEXT_REGISTRY.invalidate, payload.kind, payload.hash)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"invalid_context: {str(e)}")
+    return {"invalidated": removed, "kind": payload.kind, "hash": payload.hash}
+
+
+@router.get("/context")
+async def context_list():
+    return CONTEXT_REGISTRY.stats()
+
+
+@router.post("/context/{kind}")
+async def context_register(kind: str, payload: ContextRegisterRequest):
+    # Register once, then pass the returned hash as rules_ref / knowledge_base_ref / agent_prompts_ref.
+    try:
+        return await run_blocking(CONTEXT_REGISTRY.register, kind, payload.items)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"invalid_context: {str(e)}")
+
+
 @router.post("/orchestrate-agents")
-def orchestrate(payload: OrchestrateRequest):
-    temp_path = None
+async def orchestrate(payload: OrchestrateRequest):
+    async with stage("orchestrate").slot():
+        return await run_blocking(_orchestrate, payload)
+
+
+def _orchestrate(payload: OrchestrateRequest):
+    source = None
     try:
         file_path = payload.file_path
         if payload.file_b64:
-            suffix = os.path.splitext(payload.file_name or "document.pdf")[1] or ".pdf"
-            fd, temp_path = tempfile.mkstemp(prefix="riskiq-", suffix=suffix)
-            os.close(fd)
-            with open(temp_path, "wb") as f:
-                f.write(base64.b64decode(payload.file_b64))
-            file_path = temp_path
+            source = ingest_base64(payload.file_b64, payload.file_name or "document.pdf")
+            # Drop the encoded copy so only the decoded bytes stay alive for the request.
+            payload.file_b64 = ""
+            file_path = source
 
         return orchestrate_agents(
             file_path=file_path,
@@ -79,15 +241,18 @@ def orchestrate(payload: OrchestrateRequest):
             rules=payload.rules,
             knowledge_base=payload.knowledge_base,
             agent_prompts=payload.agent_prompts,
+            use_cache=payload.use_cache,
+            rules_ref=payload.rules_ref,
+            knowledge_base_ref=payload.knowledge_base_ref,
+            agent_prompts_ref=payload.agent_prompts_ref,
         )
+    except ContextNotFound as exc:
+        raise HTTPException(status_code=404, detail=f"context_not_found: {exc.kind}/{exc.ref}")
     except Exception as exc:
         raise HTTPException(status_code=500, detail=f"orchestrate_failed: {str(exc)}")
     finally:
-        if temp_path and os.path.exists(temp_path):
-            try:
-                os.remove(temp_path)
-            except Exception:
-                pass
+        if source is not None:
+            source.close()
 
 
 @router.post("/orchestrate-agents-upload")
@@ -98,41 +263,232 @@ async def orchestrate_upload(
     rules: str = Form("[]"),
     knowledge_base: str = Form("[]"),
     agent_prompts: str = Form("[]"),
+    use_cache: bool = Form(True),
+    rules_ref: str = Form(""),
+    knowledge_base_ref: str = Form(""),
+    agent_prompts_ref: str = Form(""),
 ):
-    temp_path = None
-    try:
-        parsed_rules = json.loads(rules or "[]")
-        parsed_kb = json.loads(knowledge_base or "[]")
-        parsed_prompts = json.loads(agent_prompts or "[]")
+    # Admit before ingesting so a saturated service rejects without copying the upload again.
+    async with stage("orchestrate").slot():
+        source = None
+        try:
+            parsed_rules = json.loads(rules or "[]")
+            parsed_kb = json.loads(knowledge_base or "[]")
+            parsed_prompts = json.loads(agent_prompts or "[]")
 
-        suffix = os.path.splitext(file.filename or file_name or "document.pdf")[1] or ".pdf"
-        fd, temp_path = tempfile.mkstemp(prefix="riskiq-upload-", suffix=suffix)
-        os.close(fd)
+            source = await ingest_upload(file, file.filename or file_name or "document.pdf")
 
-        content = await file.read()
-        with open(temp_path, "wb") as f:
-            f.write(content)
+            return await run_blocking(
+                orchestrate_agents,
+                file_path=source,
+                file_name=file_name or file.filename or os.path.basename(file_path or source.name),
+                rules=parsed_rules,
+                knowledge_base=parsed_kb,
+                agent_prompts=parsed_prompts,
+                use_cache=use_cache,
+                rules_ref=rules_ref,
+                knowledge_base_ref=knowledge_base_ref,
+                agent_prompts_ref=agent_prompts_ref,
+            )
+        except ContextNotFound as exc:
+            raise HTTPException(status_code=404, detail=f"context_not_found: {exc.kind}/{exc.ref}")
+        except Exception as exc:
+            raise HTTPException(status_code=500, detail=f"orchestrate_upload_failed: {str(exc)}")
+        finally:
+            if source is not None:
+                source.close()
 
-        return orchestrate_agents(
-            file_path=temp_path,
-            file_name=file_name or file.filename or os.path.basename(file_path or temp_path),
-            rules=parsed_rules,
-            knowledge_base=parsed_kb,
-            agent_prompts=parsed_prompts,
+
+STREAM_MEDIA_TYPES = {"ndjson": "application/x-ndjson", "sse": "text/event-stream"}
+
+
+def _encode_event(event, stream_format: str) -> str:
+    body = json.dumps(event, default=str)
+    if stream_format == "sse":
+        return f"event: {event['event']}\ndata: {body}\n\n"
+    return body + "\n"
+
+
+@router.post("/orchestrate-agents-upload/stream")
+async def orchestrate_upload_stream(
+    file: UploadFile = File(...),
+    file_name: str = Form(""),
+    file_path: str = Form(""),
+    rules: str = Form("[]"),
+    knowledge_base: str = Form("[]"),
+    agent_prompts: str = Form("[]"),
+    use_cache: bool = Form(True),
+    rules_ref: str = Form(""),
+    knowledge_base_ref: str = Form(""),
+    agent_prompts_ref: str = Form(""),
+    stream_format: str = Form("ndjson"),
+):
+    # Same pipeline as /orchestrate-agents-upload, but each stage is sent as soon as it finishes and
+    # the full response arrives as the final "result" event (or an "error" event).
+    if stream_format not in STREAM_MEDIA_TYPES:
+        raise HTTPException(status_code=400, detail=f"invalid_stream_format: {stream_format}")
+    # Admission and ingestion happen before the response starts, so rejections keep their status codes.
+    admission = AsyncExitStack()
+    await admission.enter_async_context(stage("orchestrate").slot())
+    source = None
+    try:
+        kwargs = dict(
+            rules=json.loads(rules or "[]"),
+            knowledge_base=json.loads(knowledge_base or "[]"),
+            agent_prompts=json.loads(agent_prompts or "[]"),
+            use_cache=use_cache,
+            rules_ref=rules_ref,
+            knowledge_base_ref=knowledge_base_ref,
+            agent_prompts_ref=agent_prompts_ref,
         )
+        source = await ingest_upload(file, file.filename or file_name or "document.pdf")
+        kwargs["file_name"] = file_name or file.filename or os.path.basename(file_path or source.name)
     except Exception as exc:
+        if source is not None:
+            source.close()
+        await admission.__aexit__(*sys.exc_info())
         raise HTTPException(status_code=500, detail=f"orchestrate_upload_failed: {str(exc)}")
-    finally:
-        if temp_path and os.path.exists(temp_path):
+
+    admission.callback(source.close)
+
+    def produce(emit):
+        try:
+            emit({"event": "result", "data": orchestrate_agents(file_path=source, on_event=emit, **kwargs)})
+        except ContextNotFound as exc:
+            emit({"event": "error", "status_code": 404, "detail": f"context_not_found: {exc.kind}/{exc.ref}"})
+        except Exception as exc:
+            emit({"event": "error", "status_code": 500, "detail": f"orchestrate_upload_failed: {str(exc)}"})
+
+    return _EventStreamResponse(admission, stream_format, produce, {"event": "started", "file_name": kwargs["file_name"]})
+
+
+class _EventStreamResponse(StreamingResponse):
+    # `admission` holds the stage slot and the ingested sources. It is closed exactly once: when
+    # the worker finishes if the stream got far enough to start it (not when the client goes away),
+    # otherwise when the response ends. The latter covers a client that disconnects before the
+    # first chunk, where the body generator never runs at all.
+    def __init__(self, admission: AsyncExitStack, stream_format: str, produce, first_event):
+        self.admission = admission
+        self.work = None
+        super().__init__(
+            self._events(stream_format, produce, first_event),
+            media_type=STREAM_MEDIA_TYPES[stream_format],
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        )
+
+    async def __call__(self, scope, receive, send):
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            if self.work is None:
+                await self.admission.aclose()
+
+    async def _events(self, stream_format: str, produce, first_event):
+        # `produce(emit)` runs on a worker thread; everything it emits is written in order.
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue()
+
+        def emit(event):
+            # Encoded on the producing thread, so the writer never sees a stage output mid-update.
+            loop.call_soon_threadsafe(queue.put_nowait, _encode_event(event, stream_format))
+
+        def _run():
             try:
-                os.remove(temp_path)
-            except Exception:
-                pass
+                produce(emit)
+            finally:
+                loop.call_soon_threadsafe(queue.put_nowait, None)
+
+        self.work = asyncio.ensure_future(run_blocking(_run))
+        self.work.add_done_callback(lambda _: asyncio.ensure_future(self.admission.aclose()))
+        yield _encode_event(first_event, stream_format)
+        while True:
+            chunk = await queue.get()
+            if chunk is None:
+                break
+            yield chunk
+
+
+@router.post("/orchestrate-agents-batch")
+async def orchestrate_batch_upload(
+    files: List[UploadFile] = File(...),
+    rules: str = Form("[]"),
+    knowledge_base: str = Form("[]"),
+    agent_prompts: str = Form("[]"),
+    use_cache: bool = Form(True),
+    rules_ref: str = Form(""),
+    knowledge_base_ref: str = Form(""),
+    agent_prompts_ref: str = Form(""),
+    stream_format: str = Form("ndjson"),
+):
+    # A loan packet in one request: several files and/or .zip archives, one shared rule set,
+    # knowledge base and prompt set. Each document is streamed back as it completes (not in
+    # upload order) as a "document" event; a "summary" event closes the stream.
+    if stream_format not in STREAM_MEDIA_TYPES:
+        raise HTTPException(status_code=400, detail=f"invalid_stream_format: {stream_format}")
+    admission = AsyncExitStack()
+    await admission.enter_async_context(stage("orchestrate_batch").slot())
+    sources = []
+    try:
+        if len(files) > ORCHESTRATE_BATCH_MAX_DOCUMENTS:
+            raise HTTPException(status_code=413, detail=f"batch_too_large: {len(files)} > {ORCHESTRATE_BATCH_MAX_DOCUMENTS}")
+        for file in files:
+            source = await ingest_upload(file, file.filename or f"document-{len(sources) + 1}.pdf")
+            if source.suffix != ".zip":
+                sources.append(source)
+                continue
+            try:
+                room = ORCHESTRATE_BATCH_MAX_DOCUMENTS - len(sources)
+                sources.extend(await run_blocking(ingest_zip, source, room, int(ORCHESTRATE_BATCH_MAX_ZIP_MB * 1024 * 1024)))
+            finally:
+                source.close()
+        if len(sources) > ORCHESTRATE_BATCH_MAX_DOCUMENTS:
+            raise HTTPException(status_code=413, detail=f"batch_too_large: {len(sources)} > {ORCHESTRATE_BATCH_MAX_DOCUMENTS}")
+        if not sources:
+            raise HTTPException(status_code=400, detail="invalid_batch: no documents")
+        context = await run_blocking(
+            resolve_context,
+            json.loads(rules or "[]"),
+            json.loads(knowledge_base or "[]"),
+            json.loads(agent_prompts or "[]"),
+            rules_ref,
+            knowledge_base_ref,
+            agent_prompts_ref,
+        )
+    except Exception as exc:
+        for source in sources:
+            source.close()
+        await admission.__aexit__(*sys.exc_info())
+        if isinstance(exc, HTTPException):
+            raise
+        if isinstance(exc, ContextNotFound):
+            raise HTTPException(status_code=404, detail=f"context_not_found: {exc.kind}/{exc.ref}")
+        if isinstance(exc, ValueError):
+            raise HTTPException(status_code=400, detail=f"invalid_batch: {str(exc)}")
+        raise HTTPException(status_code=500, detail=f"orchestrate_batch_failed: {str(exc)}")
+    for source in sources:
+        admission.callback(source.close)
+
+    def produce(emit):
+        try:
+            summary = orchestrate_batch(sources, context, lambda item: emit({"event": "document", **item}), use_cache=use_cache)
+            emit({"event": "summary", **summary})
+        except Exception as exc:
+            emit({"event": "error", "status_code": 500, "detail": f"orchestrate_batch_failed: {str(exc)}"})
+
+    started = {
+        "event": "started",
+        "count": len(sources),
+        "documents": [source.name for source in sources],
+        "rule_set": {"version": context.rule_plan.version, "source": context.rule_source},
+    }
+    return _EventStreamResponse(admission, stream_format, produce, started)
 
 
 @router.post("/generate-combined-report")
-def combined_report(payload: CombinedReportRequest):
-    return generate_combined_report(
+async def combined_report(payload: CombinedReportRequest):
+    return await run_cpu(
+        "report",
+        generate_combined_report,
         package_name=payload.package_name,
         regulator=payload.regulator,
         submissions=payload.submissions,
@@ -141,8 +497,10 @@ def combined_report(payload: CombinedReportRequest):
 
 
 @router.post("/session-copilot")
-def session_copilot_answer(payload: SessionCopilotRequest):
-    parsed, raw = session_copilot(
+async def session_copilot_answer(payload: SessionCopilotRequest):
+    parsed, raw = await run_io(
+        "copilot",
+        session_copilot,
         question=payload.question,
         session_context=payload.session_context,
         history=[m.model_dump() for m in payload.history],
@@ -156,19 +514,22 @@ def session_copilot_answer(payload: SessionCopilotRequest):
 
 
 @router.post("/scrape-reference")
-def scrape_reference(payload: dict):
+async def scrape_reference(payload: dict):
     url = str(payload.get("url", "")).strip()
     if not url:
         return {"error": "Missing url"}
-    return scrape_reference_url(url)
+    return await run_io("scrape", scrape_reference_url, url)
 
 
 @router.post("/rewrite-clause")
-def clause_rewrite(payload: ClauseRewriteRequest):
-    parsed, raw = rewrite_clause(
+async def clause_rewrite(payload: ClauseRewriteRequest):
+    parsed, raw = await run_io(
+        "rewrite",
+        rewrite_clause,
         violation=payload.violation,
         session_context=payload.session_context,
         current_clause=payload.current_clause,
+        use_cache=payload.use_cache,
     )
     return {
         "replacement_clause": parsed.get("replacement_clause", ""),
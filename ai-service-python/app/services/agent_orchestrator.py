@@ -1,11 +1,17 @@
-from datetime import datetime
-from typing import Any, Dict, List
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, Callable, Dict, List
 
+from app.core.config import ORCHESTRATE_BATCH_CPU_LIMIT, ORCHESTRATE_BATCH_IN_FLIGHT, ORCHESTRATE_BATCH_LLM_LIMIT
 from app.services.compliance_service import validate_rules
-from app.services.decision_service import score_decision
-from app.services.deepseek_service import extract_structured_data, classify_document_type
-from app.services.extract_service import extract_document_text, normalize_output, detect_document_profile
-from app.services.rules_loader import load_rules
+from app.services.context_registry import CONTEXT_REGISTRY
+from app.services.decision_service import submit_decision
+from app.services.deepseek_service import CLASSIFY_CHARS, extract_structured_data, classify_document_type, submit_llm
+from app.services.extract_service import DocumentSource, open_document_text, normalize_output
+from app.services.rule_engine import RulePlan, compile_rules, diff_rule_sets
+from app.services.rules_loader import load_rule_plan
+from app.services.stage_graph import Gate, GraphRun, Stage, StageGraph
 
 
 DEFAULT_AGENT_PROMPTS = {
@@ -150,12 +156,9 @@ def _prompt_map(agent_prompts: List[Dict[str, Any]]) -> Dict[str, str]:
     return prompts
 
 
-def _scope_rules_for_doc_type(rules: List[Dict[str, Any]], document_type: str) -> List[Dict[str, Any]]:
-    allowed_fields = DOC_TYPE_RULE_FIELDS.get(document_type, DOC_TYPE_RULE_FIELDS["unknown"])
-    scoped = [r for r in rules if r.get("field") in allowed_fields]
-    if scoped:
-        return scoped
-    return rules
+def _scope_rules_for_doc_type(plan: RulePlan, document_type: str) -> RulePlan:
+    # Scoped sub-plans are memoized on the compiled rule set, so this is a dict lookup per request.
+    return plan.scoped(DOC_TYPE_RULE_FIELDS.get(document_type, DOC_TYPE_RULE_FIELDS["unknown"]))
 
 
 def _build_alerts(compliance: Dict[str, Any], decision: Dict[str, Any], extracted: Dict[str, Any]) -> List[Dict[str, str]]:
@@ -350,36 +353,13 @@ def _suggestions(
     return suggestions
 
 
-def orchestrate_agents(
-    file_path: str,
-    file_name: str,
-    rules: List[Dict[str, Any]] | None,
+def _finalize_decision(
+    decision: Dict[str, Any],
+    compliance: Dict[str, Any],
+    normalized: Dict[str, Any],
+    document_type_confidence: float,
     knowledge_base: List[Dict[str, Any]] | None,
-    agent_prompts: List[Dict[str, Any]] | None,
-):
-    prompts = _prompt_map(agent_prompts)
-
-    text = extract_document_text(file_path)
-    doc_profile = detect_document_profile(file_path, text)
-    doc_type, raw_classify = classify_document_type(text)
-    doc_profile["document_type"] = doc_type.get("document_type", "unknown")
-    doc_profile["document_type_confidence"] = round(float(doc_type.get("confidence", 0.5)), 4)
-    doc_profile["document_type_reason"] = doc_type.get("reason", "")
-
-    # Document Agent (single real-time DeepSeek call)
-    structured, raw_doc_output = extract_structured_data(text=text, system_prompt=prompts["DocumentAgent"])
-    normalized = normalize_output(structured)
-
-    raw_rules = rules if rules else load_rules()
-    active_rules = _scope_rules_for_doc_type(raw_rules, doc_profile["document_type"])
-
-    # Compliance Agent (deterministic local evaluation)
-    compliance = validate_rules(normalized, active_rules)
-    compliance_explanation = _compliance_explanation(compliance, knowledge_base)
-    compliance["explanation"] = compliance_explanation
-
-    # Decision Agent (local ML model)
-    decision = score_decision(normalized, compliance["summary"])
+) -> Dict[str, Any]:
     verification = _two_layer_verification(decision, compliance, knowledge_base)
     decision["ai_score"] = verification["ai_risk_score"]
     decision["source_score"] = verification["source_risk_score"]
@@ -389,7 +369,7 @@ def orchestrate_agents(
     decision["verification"] = verification
     entity_keys = ["names", "amounts", "interest_rates", "dates", "clauses", "risk_indicators"]
     coverage = sum(1 for k in entity_keys if normalized.get(k)) / len(entity_keys)
-    extraction_confidence = min(0.99, max(0.35, 0.45 * coverage + 0.55 * doc_profile["document_type_confidence"]))
+    extraction_confidence = min(0.99, max(0.35, 0.45 * coverage + 0.55 * document_type_confidence))
     compliance_alignment = min(
         0.99,
         max(
@@ -401,27 +381,203 @@ def orchestrate_agents(
     )
     decision["document_intelligence_confidence"] = round(extraction_confidence, 4)
     decision["compliance_alignment_score"] = round(compliance_alignment, 4)
-    decision_explanation = _decision_explanation(decision)
-    decision["explanation"] = decision_explanation
+    decision["explanation"] = _decision_explanation(decision)
+    return decision
+
+
+def _classification(doc_type: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "document_type": doc_type.get("document_type", "unknown"),
+        "document_type_confidence": round(float(doc_type.get("confidence", 0.5)), 4),
+        "document_type_reason": doc_type.get("reason", ""),
+    }
+
+
+# Partial output carried by each stage event of a streamed run; stages not listed carry timing only.
+_STAGE_EVENT_DATA = {
+    "profile": lambda v: {"document_profile": v},
+    "classify": lambda v: _classification(v[0]),
+    "llm_extract": lambda v: {"structured_data": v[0]},
+    "scope_rules": lambda v: {"rule_set": {"version": v[0].version, "source": v[2], "evaluated_rules": len(v[1])}},
+    "compliance": lambda v: {"compliance": v},
+    "decision": lambda v: {"decision": v},
+    "alerts": lambda v: {"alerts": v[0], "monitoring_summary": v[1]},
+    "suggestions": lambda v: {"suggestions": v},
+    "report": lambda v: {"reporting_summary": v},
+    "preview": lambda v: {"document_preview": v},
+    "clause_map": lambda v: {"clause_line_map": v},
+}
+
+
+def _stage_events(on_event: Callable[[Dict[str, Any]], None]):
+    # Adapts graph callbacks to stream events: one per stage, plus one when an agent's last stage is done.
+    announced = set()
+    lock = threading.Lock()
+
+    def _on_stage(name: str, value: Any, run: GraphRun):
+        stage = run.graph.stages[name]
+        build = _STAGE_EVENT_DATA.get(name)
+        on_event({"event": "stage", "stage": name, "agent": stage.agent, "timing": run.stage_timing(name), "data": build(value) if build else {}})
+        if not stage.agent or not run.agent_done(stage.agent):
+            return
+        with lock:
+            if stage.agent in announced:
+                return
+            announced.add(stage.agent)
+        on_event({"event": "agent", "agent": stage.agent, "status": "completed", "timing": run.agent_timing(stage.agent)})
+
+    return _on_stage
+
+
+class PipelineContext:
+    # Rules, knowledge base and prompts resolved once; a batch shares one instance across documents.
+    def __init__(self, rule_plan: RulePlan, rule_source: str, knowledge_base: List[Dict[str, Any]] | None, prompts: Dict[str, str]):
+        self.rule_plan = rule_plan
+        self.rule_source = rule_source
+        self.knowledge_base = knowledge_base
+        self.prompts = prompts
+
+
+def resolve_context(
+    rules: "List[Dict[str, Any]] | RulePlan | None",
+    knowledge_base: List[Dict[str, Any]] | None,
+    agent_prompts: List[Dict[str, Any]] | None,
+    rules_ref: str = "",
+    knowledge_base_ref: str = "",
+    agent_prompts_ref: str = "",
+) -> PipelineContext:
+    # Registered context is resolved before any document work, so an unknown hash fails fast.
+    if rules_ref:
+        rules = CONTEXT_REGISTRY.rule_plan(rules_ref)
+    if knowledge_base_ref:
+        knowledge_base = CONTEXT_REGISTRY.items("knowledge_base", knowledge_base_ref)
+    if agent_prompts_ref:
+        prompts = CONTEXT_REGISTRY.derived("prompts", agent_prompts_ref, "prompt_map", _prompt_map)
+    else:
+        prompts = _prompt_map(agent_prompts)
+    rule_source = "registry" if rules_ref else ("request" if rules else "file")
+    return PipelineContext(compile_rules(rules if rules else load_rule_plan()), rule_source, knowledge_base, prompts)
+
+
+def _pipeline(
+    file_path: "str | DocumentSource",
+    file_name: str,
+    context: PipelineContext,
+    use_cache: bool,
+    gates: "Dict[str, Gate] | None" = None,
+) -> StageGraph:
+    # Classification needs only the first pages ("prefix") and runs alongside the rest of the parse;
+    # LLM extraction, profiling and the preview wait for the full text; compliance needs both the rule scope
+    # (from the document type) and the extracted entities. With `gates` (batch runs), parsing and
+    # LLM stages are admitted through shared CPU and LLM limits.
+    knowledge_base, prompts = context.knowledge_base, context.prompts
+    cpu_submit = gates["cpu"].submit if gates else None
+    llm_submit = gates["llm"].submit if gates else submit_llm
+
+    def _open(r):
+        return open_document_text(file_path, prefix_chars=CLASSIFY_CHARS, use_cache=use_cache)
+
+    def _classify(r):
+        # Submitted only once "prefix" is done, so an LLM slot is never held waiting on the parser.
+        return classify_document_type(r["prefix"], use_cache=use_cache)
+
+    def _llm_extract(r):
+        structured, raw_doc_output = extract_structured_data(text=r["extract"], system_prompt=prompts["DocumentAgent"], use_cache=use_cache)
+        return normalize_output(structured), raw_doc_output
+
+    def _scope(r):
+        document_type = _classification(r["classify"][0])["document_type"]
+        return context.rule_plan, _scope_rules_for_doc_type(context.rule_plan, document_type), context.rule_source
+
+    def _compliance(r):
+        compliance = validate_rules(r["llm_extract"][0], r["scope_rules"][1])
+        compliance["explanation"] = _compliance_explanation(compliance, knowledge_base)
+        return compliance
+
+    def _decision(r):
+        normalized, compliance = r["llm_extract"][0], r["compliance"]
+        confidence = _classification(r["classify"][0])["document_type_confidence"]
+        decision = submit_decision(normalized, compliance["summary"]).result()
+        return _finalize_decision(decision, compliance, normalized, confidence, knowledge_base)
+
+    def _alerts(r):
+        alerts = _build_alerts(r["compliance"], r["decision"], r["llm_extract"][0])
+        return alerts, _monitoring_summary(alerts)
+
+    return StageGraph(
+        [
+            Stage("open", _open, agent="DocumentAgent", submit=cpu_submit),
+            # Both parse phases run on the stage pool (or hold a batch CPU slot); PDFs read the first
+            # pages in "prefix" and the remainder in "extract".
+            Stage("prefix", lambda r: r["open"].prefix(CLASSIFY_CHARS), ["open"], agent="DocumentAgent", submit=cpu_submit),
+            Stage("extract", lambda r: r["open"].text(), ["prefix"], agent="DocumentAgent", submit=cpu_submit),
+            Stage("profile", lambda r: r["open"].profile(), ["extract"], agent="DocumentAgent", submit=cpu_submit),
+            Stage("classify", _classify, ["prefix"], agent="DocumentAgent", submit=llm_submit),
+            Stage("llm_extract", _llm_extract, ["extract"], agent="DocumentAgent", submit=llm_submit),
+            Stage("scope_rules", _scope, ["classify"], agent="ComplianceAgent"),
+            Stage("compliance", _compliance, ["scope_rules", "llm_extract"], agent="ComplianceAgent"),
+            Stage("decision", _decision, ["compliance", "classify"], agent="DecisionAgent"),
+            Stage("alerts", _alerts, ["compliance", "decision"], agent="MonitoringAgent"),
+            Stage("suggestions", lambda r: _suggestions(r["compliance"], r["decision"], r["llm_extract"][0], knowledge_base), ["compliance", "decision"], agent="ReportingAgent"),
+            Stage("report", lambda r: _reporting_summary(file_name, r["compliance"], r["decision"], r["alerts"][0]), ["decision", "alerts"], agent="ReportingAgent"),
+            Stage("preview", lambda r: _build_document_preview(r["extract"]), ["extract"]),
+            Stage("clause_map", lambda r: _build_clause_line_map(r["extract"], r["llm_extract"][0].get("clauses", [])), ["extract", "llm_extract"]),
+        ]
+    )
+
+
+def orchestrate_agents(
+    file_path: "str | DocumentSource",
+    file_name: str,
+    rules: "List[Dict[str, Any]] | RulePlan | None",
+    knowledge_base: List[Dict[str, Any]] | None,
+    agent_prompts: List[Dict[str, Any]] | None,
+    use_cache: bool = True,
+    rules_ref: str = "",
+    knowledge_base_ref: str = "",
+    agent_prompts_ref: str = "",
+    on_event: Callable[[Dict[str, Any]], None] | None = None,
+):
+    context = resolve_context(rules, knowledge_base, agent_prompts, rules_ref, knowledge_base_ref, agent_prompts_ref)
+    return orchestrate_document(file_path, file_name, context, use_cache=use_cache, on_event=on_event)
 
-    # Monitoring Agent (local alert synthesis)
-    alerts = _build_alerts(compliance, decision, normalized)
-    monitoring_summary = _monitoring_summary(alerts)
 
-    # Reporting Agent (local executive summary)
-    reporting_summary = _reporting_summary(file_name, compliance, decision, alerts)
-    suggestions = _suggestions(compliance, decision, normalized, knowledge_base)
-    document_preview = _build_document_preview(text)
-    clause_line_map = _build_clause_line_map(text, normalized.get("clauses", []))
+def orchestrate_document(
+    file_path: "str | DocumentSource",
+    file_name: str,
+    context: PipelineContext,
+    use_cache: bool = True,
+    on_event: Callable[[Dict[str, Any]], None] | None = None,
+    gates: "Dict[str, Gate] | None" = None,
+):
+    knowledge_base = context.knowledge_base
+    run = _pipeline(file_path, file_name, context, use_cache, gates).run(_stage_events(on_event) if on_event else None)
+    r = run.results
+    doc_type, raw_classify = r["classify"]
+    doc_profile = r["profile"]
+    doc_profile.update(_classification(doc_type))
+    normalized, raw_doc_output = r["llm_extract"]
+    if isinstance(raw_doc_output, dict) and raw_doc_output.get("mode") == "chunked":
+        doc_profile["llm_extraction"] = {
+            "chunks_extracted": raw_doc_output["chunk_count"],
+            "chunks_total": raw_doc_output["chunks_total"],
+            "truncated": raw_doc_output["truncated"],
+        }
+    rule_plan, active_plan, rule_source = r["scope_rules"]
+    compliance = r["compliance"]
+    decision = r["decision"]
+    alerts, monitoring_summary = r["alerts"]
+    reporting_summary = r["report"]
+    suggestions = r["suggestions"]
+    document_preview = r["preview"]
+    clause_line_map = r["clause_map"]
 
-    timestamp = datetime.utcnow().isoformat()
     agent_trace = [
         {
             "agent": "DocumentAgent",
             "identity": AGENT_IDENTITIES["DocumentAgent"],
             "status": "completed",
             "output": {"structured_data": normalized},
-            "timestamp": timestamp,
         },
         {
             "agent": "ComplianceAgent",
@@ -430,9 +586,8 @@ def orchestrate_agents(
             "output": {
                 "summary": compliance["summary"],
                 "violations": compliance["violations"],
-                "explanation": compliance_explanation,
+                "explanation": compliance["explanation"],
             },
-            "timestamp": timestamp,
         },
         {
             "agent": "DecisionAgent",
@@ -445,32 +600,34 @@ def orchestrate_agents(
                 "risk_category": decision["risk_category"],
                 "confidence": decision["confidence"],
                 "drivers": decision.get("drivers", {}),
-                "explanation": decision_explanation,
+                "explanation": decision["explanation"],
             },
-            "timestamp": timestamp,
         },
         {
             "agent": "MonitoringAgent",
             "identity": AGENT_IDENTITIES["MonitoringAgent"],
             "status": "completed",
             "output": {"alerts": alerts, "monitoring_summary": monitoring_summary},
-            "timestamp": timestamp,
         },
         {
             "agent": "ReportingAgent",
             "identity": AGENT_IDENTITIES["ReportingAgent"],
             "status": "completed",
             "output": {"reporting_summary": reporting_summary},
-            "timestamp": timestamp,
         },
     ]
+    for entry in agent_trace:
+        # Real per-agent span; `timestamp` (kept for existing consumers) is when the agent finished.
+        timing = run.agent_timing(entry["agent"])
+        entry.update(timing, timestamp=timing["finished_at"])
 
     return {
         "structured_data": normalized,
         "document_profile": doc_profile,
         "document_type_raw": raw_classify,
         "deepseek_output": raw_doc_output,
-        "rules": active_rules,
+        "rules": active_plan.rules,
+        "rule_set": {"version": rule_plan.version, "source": rule_source, "evaluated_rules": len(active_plan)},
         "compliance": compliance,
         "decision": decision,
         "alerts": alerts,
@@ -494,4 +651,129 @@ def orchestrate_agents(
             for item in (knowledge_base or [])[:8]
         ],
         "agent_trace": agent_trace,
+        "pipeline": run.summary(),
+    }
+
+
+def orchestrate_batch(
+    sources: List[DocumentSource],
+    context: PipelineContext,
+    on_result: Callable[[Dict[str, Any]], None],
+    use_cache: bool = True,
+    in_flight: int = ORCHESTRATE_BATCH_IN_FLIGHT,
+    cpu_limit: int = ORCHESTRATE_BATCH_CPU_LIMIT,
+    llm_limit: int = ORCHESTRATE_BATCH_LLM_LIMIT,
+) -> Dict[str, Any]:
+    # Runs every document through the same pipeline with one shared context. Parsing and LLM calls
+    # are admitted through separate gates, so while some documents wait on DeepSeek others use the
+    # CPU; `in_flight` only bounds how many documents are open at once. A failing document is
+    # reported in its own result and never stops the rest. Results go to `on_result` as they finish.
+    gates = {"cpu": Gate("cpu", cpu_limit), "llm": Gate("llm", llm_limit, submit=submit_llm)}
+    started = time.perf_counter()
+
+    def _one(index: int, source: DocumentSource) -> Dict[str, Any]:
+        began = time.perf_counter()
+        try:
+            result = orchestrate_document(source, source.name, context, use_cache=use_cache, gates=gates)
+            outcome = {"status": "completed", "result": result}
+        except Exception as exc:
+            outcome = {"status": "failed", "error": f"{type(exc).__name__}: {exc}"}
+        finally:
+            source.close()
+        return {"index": index, "file_name": source.name, **outcome, "elapsed_ms": round((time.perf_counter() - began) * 1000, 3)}
+
+    counts = {"completed": 0, "failed": 0}
+    with ThreadPoolExecutor(max_workers=max(1, in_flight), thread_name_prefix="batch-doc") as pool:
+        for future in as_completed([pool.submit(_one, index, source) for index, source in enumerate(sources)]):
+            item = future.result()
+            counts[item["status"]] += 1
+            on_result(item)
+
+    wall_sec = time.perf_counter() - started
+    return {
+        "count": len(sources),
+        **counts,
+        "rule_set": {"version": context.rule_plan.version, "source": context.rule_source},
+        "wall_ms": round(wall_sec * 1000, 3),
+        "documents_per_min": round(len(sources) * 60 / wall_sec, 2) if wall_sec else 0.0,
+        "limits": {"in_flight": max(1, in_flight), "cpu": gates["cpu"].stats(), "llm": gates["llm"].stats()},
+    }
+
+
+def reevaluate_compliance(
+    sessions: List[Dict[str, Any]],
+    previous_rules: "List[Dict[str, Any]] | RulePlan | None",
+    rules: "List[Dict[str, Any]] | RulePlan | None",
+    knowledge_base: List[Dict[str, Any]] | None,
+    previous_rules_ref: str = "",
+    rules_ref: str = "",
+    knowledge_base_ref: str = "",
+) -> Dict[str, Any]:
+    # Re-checks stored orchestration results after a rule change without re-extracting or re-running
+    # the pipeline: only dirty rules (see RuleDiff) are evaluated against the stored structured_data,
+    # and the decision is re-scored for every session whose violations changed in any way.
+    if previous_rules_ref:
+        previous_rules = CONTEXT_REGISTRY.rule_plan(previous_rules_ref)
+    if rules_ref:
+        rules = CONTEXT_REGISTRY.rule_plan(rules_ref)
+    if knowledge_base_ref:
+        knowledge_base = CONTEXT_REGISTRY.items("knowledge_base", knowledge_base_ref)
+    if not previous_rules:
+        raise ValueError("previous rule set is required")
+    old_plan = compile_rules(previous_rules)
+    new_plan = compile_rules(rules if rules else load_rule_plan())
+    diff = diff_rule_sets(old_plan, new_plan)
+
+    patched = []
+    for session in sessions:
+        normalized = session.get("structured_data") or {}
+        profile = session.get("document_profile") or {}
+        previous = session.get("compliance") or {}
+        # Sessions produced by orchestration were checked against their doc-type scope; diff that scope.
+        doc_type = profile.get("document_type")
+        session_diff = (
+            diff_rule_sets(_scope_rules_for_doc_type(old_plan, doc_type), _scope_rules_for_doc_type(new_plan, doc_type))
+            if doc_type
+            else diff
+        )
+        compliance = session_diff.patch(normalized, previous)
+        # A severity- or message-only edit leaves the count alone but still feeds the verification layer.
+        changed = compliance.get("violations") != previous.get("violations")
+        # Concurrent re-scores share micro-batches; futures are collected below.
+        pending = submit_decision(normalized, compliance["summary"]) if changed and session.get("decision") else None
+        patched.append((session, session_diff, compliance, changed, pending))
+
+    results = []
+    for session, session_diff, compliance, changed, pending in patched:
+        normalized = session.get("structured_data") or {}
+        profile = session.get("document_profile") or {}
+        decision = session.get("decision") or None
+        if changed and "explanation" in compliance:
+            compliance["explanation"] = _compliance_explanation(compliance, knowledge_base)
+        if pending is not None:
+            rescored = pending.result()
+            # Orchestrated decisions carry the two-layer verification; plain scores stay plain.
+            if "verification" in decision:
+                rescored = _finalize_decision(
+                    rescored, compliance, normalized, float(profile.get("document_type_confidence", 0.5)), knowledge_base
+                )
+            decision = rescored
+        item = {
+            "changed": changed,
+            "rescored": pending is not None,
+            "affected_rules": sorted(session_diff.dirty, key=str),
+            "compliance": compliance,
+            "decision": decision,
+        }
+        if decision is not None:
+            item["alerts"] = _build_alerts(compliance, decision, normalized)
+        results.append(item)
+
+    return {
+        "rule_set": {"previous_version": old_plan.version, "version": new_plan.version},
+        "diff": diff.describe(),
+        "count": len(results),
+        "changed": sum(1 for item in results if item["changed"]),
+        "rescored": sum(1 for item in results if item["rescored"]),
+        "results": results,
     }
@@ -0,0 +1,142 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List
+
+from app.core.config import (
+    CONTEXT_REGISTRY_DERIVED_ITEMS,
+    CONTEXT_REGISTRY_MAX_MB,
+    CONTEXT_REGISTRY_MEMORY_ITEMS,
+    CONTEXT_REGISTRY_PATH,
+    CONTEXT_REGISTRY_TTL_SEC,
+)
+from app.services.rule_engine import RulePlan, content_hash
+from app.services.tiered_cache import TieredCache
+
+CONTEXT_KINDS = ("rules", "knowledge_base", "prompts")
+
+
+class ContextNotFound(KeyError):
+    # The client should re-register and retry; entries expire and can be invalidated.
+    def __init__(self, kind: str, ref: str):
+        super().__init__(f"{kind}/{ref}")
+        self.kind = kind
+        self.ref = ref
+
+
+def _check_kind(kind: str):
+    if kind not in CONTEXT_KINDS:
+        raise ValueError(f"Unknown context kind '{kind}'; expected one of {', '.join(CONTEXT_KINDS)}")
+
+
+class ContextRegistry:
+    # Rule sets, knowledge bases and prompt bundles registered once and referenced by content hash.
+    # Items live in a TieredCache (memory + SQLite, so every worker and restart sees them); objects
+    # derived from them, such as compiled rule plans and prompt maps, are memoized per hash in-process.
+    def __init__(self, store: TieredCache, derived_items: int = 64):
+        self.store = store
+        self.derived_items = max(1, derived_items)
+        self._derived: "OrderedDict[tuple, Any]" = OrderedDict()
+        self._known: Dict[tuple, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self._stats = {"registered": 0, "already_registered": 0, "resolved": 0, "not_found": 0, "derived_builds": 0, "invalidated": 0}
+
+    @staticmethod
+    def _key(kind: str, ref: str) -> str:
+        return f"context:{kind}:{ref}"
+
+    def register(self, kind: str, items: List[Dict[str, Any]]) -> Dict[str, Any]:
+        _check_kind(kind)
+        if not isinstance(items, list) or any(not isinstance(item, dict) for item in items):
+            raise ValueError(f"{kind} must be a list of objects")
+        ref = content_hash(items)
+        existing = self.store.get(self._key(kind, ref))
+        if existing is not None:
+            with self._lock:
+                self._stats["already_registered"] += 1
+            return {**self._describe(kind, ref, existing), "created": False}
+        if kind == "rules":
+            # Compile up front: a malformed rule is rejected at registration, and the plan is ready for the first request.
+            self._remember((kind, ref, "plan"), RulePlan(items, version=ref))
+        payload = {"items": items, "registered_at": time.time()}
+        self.store.put(self._key(kind, ref), payload)
+        with self._lock:
+            self._stats["registered"] += 1
+        return {**self._describe(kind, ref, payload), "created": True}
+
+    def _describe(self, kind: str, ref: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+        meta = {"kind": kind, "hash": ref, "count": len(payload["items"]), "registered_at": payload.get("registered_at")}
+        with self._lock:
+            self._known[(kind, ref)] = meta
+        return dict(meta)
+
+    def items(self, kind: str, ref: str) -> List[Dict[str, Any]]:
+        _check_kind(kind)
+        payload = self.store.get(self._key(kind, ref))
+        with self._lock:
+            self._stats["resolved" if payload is not None else "not_found"] += 1
+        if payload is None:
+            with self._lock:
+                self._known.pop((kind, ref), None)
+            raise ContextNotFound(kind, ref)
+        return payload["items"]
+
+    def _remember(self, key: tuple, value: Any):
+        with self._lock:
+            self._derived[key] = value
+            self._derived.move_to_end(key)
+            while len(self._derived) > self.derived_items:
+                self._derived.popitem(last=False)
+
+    def derived(self, kind: str, ref: str, name: str, build: Callable[[List[Dict[str, Any]]], Any]) -> Any:
+        key = (kind, ref, name)
+        with self._lock:
+            if key in self._derived:
+                self._derived.move_to_end(key)
+                self._stats["resolved"] += 1
+                return self._derived[key]
+        value = build(self.items(kind, ref))
+        with self._lock:
+            self._stats["derived_builds"] += 1
+        self._remember(key, value)
+        return value
+
+    def rule_plan(self, ref: str) -> RulePlan:
+        return self.derived("rules", ref, "plan", lambda items: RulePlan(items, version=ref))
+
+    def invalidate(self, kind: str | None = None, ref: str | None = None) -> int:
+        if kind is not None:
+            _check_kind(kind)
+        if ref and kind is None:
+            raise ValueError("kind is required when invalidating a single hash")
+        if ref:
+            removed = int(self.store.delete(self._key(kind, ref)))
+        else:
+            removed = self.store.delete_prefix(f"context:{kind}:" if kind else "context:")
+        with self._lock:
+            for key in [k for k in self._derived if (kind is None or k[0] == kind) and (not ref or k[1] == ref)]:
+                del self._derived[key]
+            for key in [k for k in self._known if (kind is None or k[0] == kind) and (not ref or k[1] == ref)]:
+                del self._known[key]
+            self._stats["invalidated"] += removed
+        return removed
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                **self._stats,
+                "derived_entries": len(self._derived),
+                "known": sorted(self._known.values(), key=lambda m: (m["kind"], m["hash"])),
+                "store": self.store.stats(),
+            }
+
+
+CONTEXT_REGISTRY = ContextRegistry(
+    TieredCache(
+        path=CONTEXT_REGISTRY_PATH,
+        memory_items=CONTEXT_REGISTRY_MEMORY_ITEMS,
+        ttl_sec=CONTEXT_REGISTRY_TTL_SEC,
+        max_bytes=int(CONTEXT_REGISTRY_MAX_MB * 1024 * 1024),
+    ),
+    derived_items=CONTEXT_REGISTRY_DERIVED_ITEMS,
+)
@@ -1,68 +1,63 @@
-from typing import Dict, Any
+from typing import Dict, Any, List, Tuple
+import threading
+import time
+from concurrent.futures import Future
 import numpy as np
-from sklearn.linear_model import LogisticRegression
-from sklearn.ensemble import RandomForestClassifier
-from sklearn.pipeline import Pipeline
-from sklearn.preprocessing import StandardScaler
-
-
-def _build_training_data(seed: int = 42, n: int = 600):
-    rng = np.random.default_rng(seed)
-
-    loan_amount = rng.uniform(3000, 1_000_000_000, n)
-    interest_rate = rng.uniform(3.5, 30, n)
-    risk_indicators = rng.integers(0, 6, n)
-    violations = rng.integers(0, 5, n)
-    clauses_count = rng.integers(0, 10, n)
-
-    loan_amount_log = np.log10(np.maximum(loan_amount, 1.0))
-    X = np.column_stack([loan_amount_log, interest_rate, risk_indicators, violations, clauses_count])
-
-    base_risk = (
-        0.22 * ((loan_amount_log - np.log10(3000)) / (np.log10(1_000_000_000) - np.log10(3000)))
-        + 0.28 * ((interest_rate - 3.5) / (30 - 3.5))
-        + 0.20 * (risk_indicators / 5)
-        + 0.26 * (violations / 4)
-        - 0.12 * (clauses_count / 9)
-    )
-
-    fraud_signal = (
-        0.18 * ((loan_amount_log - np.log10(3000)) / (np.log10(1_000_000_000) - np.log10(3000)))
-        + 0.34 * (risk_indicators / 5)
-        + 0.34 * (violations / 4)
-        - 0.15 * (clauses_count / 9)
-    )
-
-    y_risk = (base_risk + rng.normal(0, 0.08, n) > 0.52).astype(int)
-    y_fraud = (fraud_signal + rng.normal(0, 0.09, n) > 0.58).astype(int)
-
-    return X, y_risk, y_fraud
-
-
-def _build_models():
-    X, y_risk, y_fraud = _build_training_data()
-
-    risk_model = Pipeline(
-        steps=[
-            ("scaler", StandardScaler()),
-            ("clf", LogisticRegression(max_iter=1000, class_weight="balanced")),
-        ]
-    )
-    risk_model.fit(X, y_risk)
-
-    fraud_model = RandomForestClassifier(
-        n_estimators=250,
-        max_depth=8,
-        min_samples_leaf=3,
-        class_weight="balanced_subsample",
-        random_state=7,
-    )
-    fraud_model.fit(X, y_fraud)
-
-    return risk_model, fraud_model
-
-
-RISK_MODEL, FRAUD_MODEL = _build_models()
+from app.core.config import (
+    CPU_WORKERS,
+    DECISION_MICROBATCH_ENABLED,
+    DECISION_MICROBATCH_MAX,
+    DECISION_MICROBATCH_WINDOW_MS,
+    MODEL_SHADOW_MAX_PENDING,
+)
+from app.services.micro_batcher import MicroBatcher
+from app.services.model_store import FEATURE_NAMES, MODEL_NAME, REGISTRY, get_models, warm_up
+from app.services.shadow_scorer import ShadowScorer
+from app.services.stage_executor import cpu_pool
+
+MODEL_READINESS: Dict[str, Any] = {"state": "cold", "version": None, "compiled_rf": None, "error": None, "workers_warmed": 0, "warm_up_sec": None}
+_READINESS_LOCK = threading.Lock()
+
+
+def _warm_workers(version: str | None = None) -> int:
+    warmed = set()
+    if CPU_WORKERS >= 1:
+        pool = cpu_pool()
+        # Each task lands on an idle worker; submit a few rounds until every worker reported in.
+        for _ in range(3):
+            warmed.update(r["pid"] for r in [f.result() for f in [pool.submit(warm_up, version) for _ in range(pool.workers)]])
+            if len(warmed) >= pool.workers:
+                break
+    return len(warmed)
+
+
+def model_readiness() -> Dict[str, Any]:
+    with _READINESS_LOCK:
+        return dict(MODEL_READINESS)
+
+
+def warm_up_models() -> Dict[str, Any]:
+    # Load the artifact here and in every scoring worker so the first request never pays for it.
+    with _READINESS_LOCK:
+        if MODEL_READINESS["state"] in {"warming", "ready"}:
+            return dict(MODEL_READINESS)
+        MODEL_READINESS.update(state="warming", error=None)
+    started = time.perf_counter()
+    try:
+        local = warm_up()
+        warmed = _warm_workers(local["version"])
+        with _READINESS_LOCK:
+            MODEL_READINESS.update(
+                state="ready",
+                version=local["version"],
+                compiled_rf=local["compiled_rf"],
+                workers_warmed=warmed,
+                warm_up_sec=round(time.perf_counter() - started, 3),
+            )
+    except Exception as exc:
+        with _READINESS_LOCK:
+            MODEL_READINESS.update(state="failed", error=f"{type(exc).__name__}: {exc}")
+    return model_readiness()
 
 
 def _first_number(values, default=0.0):
@@ -77,27 +72,15 @@ def _first_number(values, default=0.0):
     return float(cleaned) if cleaned else default
 
 
-def _clip(v: float, lo: float, hi: float) -> float:
-    return max(lo, min(hi, v))
-
+def _bucket(scores: np.ndarray) -> np.ndarray:
+    return np.where(scores >= 0.75, "HIGH", np.where(scores >= 0.40, "MEDIUM", "LOW"))
 
-def _bucket(score: float):
-    if score >= 0.75:
-        return "HIGH"
-    if score >= 0.40:
-        return "MEDIUM"
-    return "LOW"
 
+def _escalate_bucket(buckets: np.ndarray) -> np.ndarray:
+    return np.where(buckets == "LOW", "MEDIUM", "HIGH")
 
-def _escalate_bucket(bucket: str):
-    if bucket == "LOW":
-        return "MEDIUM"
-    if bucket == "MEDIUM":
-        return "HIGH"
-    return "HIGH"
 
-
-def _outlier_signal(loan_amount_log: float, interest_rate: float, risks: int, violations: int, clauses_count: int, fraud_score: float):
+def _outlier_signal(loan_amount_log, interest_rate, risks, violations, clauses_count, fraud_score):
     # 72/2 calibration: 0.72 acts as high-risk anchor and 2.0 sigma-equivalent outlier lifts category.
     z_loan = (loan_amount_log - 5.5) / 1.25
     z_rate = (interest_rate - 12.0) / 7.5
@@ -106,126 +89,264 @@ def _outlier_signal(loan_amount_log: float, interest_rate: float, risks: int, vi
     z_clauses = (clauses_count - 4.0) / 2.4
     z_fraud = (fraud_score - 0.45) / 0.22
     composite = 0.20 * z_loan + 0.20 * z_rate + 0.20 * z_risks + 0.22 * z_viol - 0.12 * z_clauses + 0.30 * z_fraud
-    return float(composite)
+    return composite
 
 
-def score_decision(extracted_data: Dict[str, Any], compliance_summary: Dict[str, Any]):
-    loan_amount = _first_number(extracted_data.get("amounts", []), 0.0)
-    interest_rate = _first_number(extracted_data.get("interest_rates", []), 0.0)
-    risks = len(extracted_data.get("risk_indicators", []))
-    violations = int(compliance_summary.get("violations_count", 0))
-    clauses_count = len(extracted_data.get("clauses", []))
+def _predict_positive(models: Dict[str, Any], kind: str, features: np.ndarray) -> np.ndarray:
+    engine = models[f"{kind}_engine"]
+    if engine is not None:
+        return engine.predict_positive(features)
+    # sklearn's BLAS path can differ by an ulp between 1 and N rows; score row by row to stay batch-size independent.
+    model = models[f"{kind}_model"]
+    return np.array([model.predict_proba(features[i:i + 1])[0][1] for i in range(len(features))], dtype=float)
+
 
-    loan_amount_safe = _clip(loan_amount if loan_amount > 0 else 3000.0, 3000.0, 1_000_000_000.0)
-    interest_rate_safe = _clip(interest_rate if interest_rate > 0 else 3.5, 0.1, 60.0)
-    loan_amount_log = float(np.log10(max(loan_amount_safe, 1.0)))
-    features = np.array([[loan_amount_log, interest_rate_safe, risks, violations, clauses_count]], dtype=float)
+def score_decisions(items: List[Tuple[Dict[str, Any], Dict[str, Any]]], version: str | None = None) -> List[Dict[str, Any]]:
+    # Every step is an elementwise array op, so a row scores identically alone or inside a batch.
+    if not items:
+        return []
+    loan_amount = np.array([_first_number(ed.get("amounts", []), 0.0) for ed, _ in items], dtype=float)
+    interest_rate = np.array([_first_number(ed.get("interest_rates", []), 0.0) for ed, _ in items], dtype=float)
+    risks = np.array([len(ed.get("risk_indicators", [])) for ed, _ in items], dtype=np.int64)
+    violations = np.array([int(cs.get("violations_count", 0)) for _, cs in items], dtype=np.int64)
+    clauses_count = np.array([len(ed.get("clauses", [])) for ed, _ in items], dtype=np.int64)
 
-    risk_score = float(RISK_MODEL.predict_proba(features)[0][1])
-    fraud_score = float(FRAUD_MODEL.predict_proba(features)[0][1])
+    loan_amount_safe = np.clip(np.where(loan_amount > 0, loan_amount, 3000.0), 3000.0, 1_000_000_000.0)
+    interest_rate_safe = np.clip(np.where(interest_rate > 0, interest_rate, 3.5), 0.1, 60.0)
+    loan_amount_log = np.log10(np.maximum(loan_amount_safe, 1.0))
+    features = np.column_stack([loan_amount_log, interest_rate_safe, risks, violations, clauses_count]).astype(float)
 
-    missing_core = loan_amount <= 0 or interest_rate <= 0
-    if missing_core:
-        risk_score = min(0.98, risk_score + 0.08)
-        fraud_score = min(0.98, fraud_score + 0.08)
+    models = get_models(version)
+    risk_score = _predict_positive(models, "risk", features)
+    fraud_score = _predict_positive(models, "fraud", features)
 
-    if clauses_count == 0:
-        risk_score = min(0.98, risk_score + 0.08)
-        fraud_score = min(0.98, fraud_score + 0.05)
+    missing_core = (loan_amount <= 0) | (interest_rate <= 0)
+    risk_score = np.where(missing_core, np.minimum(0.98, risk_score + 0.08), risk_score)
+    fraud_score = np.where(missing_core, np.minimum(0.98, fraud_score + 0.08), fraud_score)
+
+    no_clauses = clauses_count == 0
+    risk_score = np.where(no_clauses, np.minimum(0.98, risk_score + 0.08), risk_score)
+    fraud_score = np.where(no_clauses, np.minimum(0.98, fraud_score + 0.05), fraud_score)
 
     # Rulebook pass should materially reduce raw model risk when fraud and indicators are not elevated.
-    if violations == 0 and fraud_score < 0.55:
-        risk_score = max(0.02, risk_score - 0.16)
+    rulebook_pass = (violations == 0) & (fraud_score < 0.55)
+    risk_score = np.where(rulebook_pass, np.maximum(0.02, risk_score - 0.16), risk_score)
 
-    if violations == 0 and risks == 0 and clauses_count >= 2:
-        risk_score = max(0.02, risk_score - 0.10)
-        fraud_score = max(0.02, fraud_score - 0.09)
+    clean = (violations == 0) & (risks == 0) & (clauses_count >= 2)
+    risk_score = np.where(clean, np.maximum(0.02, risk_score - 0.10), risk_score)
+    fraud_score = np.where(clean, np.maximum(0.02, fraud_score - 0.09), fraud_score)
 
     # Compliance violations and elevated fraud should have explicit additive pressure.
-    risk_score += min(0.24, violations * 0.05)
-    if fraud_score >= 0.7:
-        risk_score += 0.08
-    elif fraud_score >= 0.5:
-        risk_score += 0.03
+    risk_score = risk_score + np.minimum(0.24, violations * 0.05)
+    risk_score = np.where(fraud_score >= 0.7, risk_score + 0.08, np.where(fraud_score >= 0.5, risk_score + 0.03, risk_score))
 
-    risk_score = max(0.01, min(0.99, risk_score))
-    fraud_score = max(0.01, min(0.99, fraud_score))
+    risk_score = np.maximum(0.01, np.minimum(0.99, risk_score))
+    fraud_score = np.maximum(0.01, np.minimum(0.99, fraud_score))
 
     risk_category = _bucket(risk_score)
     fraud_label = _bucket(fraud_score)
     outlier_score = _outlier_signal(loan_amount_log, interest_rate_safe, risks, violations, clauses_count, fraud_score)
     outlier_triggered = outlier_score >= 2.0
     high_anchor_triggered = risk_score >= 0.72
-    if outlier_triggered and risk_category != "HIGH":
-        risk_category = _escalate_bucket(risk_category)
+    risk_category = np.where(outlier_triggered & (risk_category != "HIGH"), _escalate_bucket(risk_category), risk_category)
 
-    confidence = round(
-        _clip(
-            0.45
-            + abs(risk_score - 0.5) * 0.55
-            + min(0.10, violations * 0.02)
-            + (0.06 if fraud_score >= 0.7 else 0.0),
-            0.40,
+    confidence = np.maximum(
+        0.40,
+        np.minimum(
             0.99,
+            0.45
+            + np.abs(risk_score - 0.5) * 0.55
+            + np.minimum(0.10, violations * 0.02)
+            + np.where(fraud_score >= 0.7, 0.06, 0.0),
         ),
-        4,
     )
 
-    if violations == 0 and fraud_score < 0.50 and risk_score >= 0.75:
-        risk_category = "MEDIUM"
-
-    feature_names = [
-        "loan_amount_log",
-        "interest_rate",
-        "risk_indicators",
-        "violations",
-        "clauses_count",
-    ]
-    rf_importance = FRAUD_MODEL.feature_importances_.tolist()
-    local_values = [loan_amount_log, interest_rate_safe, float(risks), float(violations), float(clauses_count)]
-    weighted = [abs(v) * imp for v, imp in zip(local_values, rf_importance)]
-    total_weight = sum(weighted) or 1.0
-    rf_feature_contributions = [
-        {
-            "feature": name,
-            "importance": round(float(imp), 4),
-            "local_weight_pct": round(float((w / total_weight) * 100.0), 2),
-        }
-        for name, imp, w in zip(feature_names, rf_importance, weighted)
-    ]
-    rf_feature_contributions.sort(key=lambda x: x["local_weight_pct"], reverse=True)
-
-    return {
-        "score": round(risk_score, 4),
-        "fraud_score": round(fraud_score, 4),
-        "fraud_label": fraud_label,
-        "confidence": confidence,
-        "risk_category": risk_category,
-        "model": "LogReg+RandomForest-v3",
-        "drivers": {
-            "rule_violations": violations,
-            "risk_indicators": risks,
-            "fraud_signal": round(fraud_score, 4),
-            "missing_core_fields": missing_core,
-            "outlier_score": round(outlier_score, 4),
-            "outlier_triggered": outlier_triggered,
-            "high_anchor_triggered_72": high_anchor_triggered,
-        },
-        "methodology": {
-            "name": "72/2 Outlier Calibration",
-            "summary": "Risk tiers are calibrated with a 0.72 high-risk anchor and an outlier escalation trigger at 2.0 composite z-score.",
-            "tier_thresholds": {"LOW": "< 0.40", "MEDIUM": "0.40 to < 0.75", "HIGH": ">= 0.75"},
-            "high_anchor": 0.72,
-            "outlier_trigger_sigma": 2.0,
-            "outlier_score": round(outlier_score, 4),
-            "outlier_triggered": outlier_triggered,
-        },
-        "rf_feature_contributions": rf_feature_contributions,
-        "features": {
+    risk_category = np.where((violations == 0) & (fraud_score < 0.50) & (risk_score >= 0.75), "MEDIUM", risk_category)
+
+    rf_importance = np.asarray((models["fraud_engine"] or models["fraud_model"]).feature_importances_, dtype=float)
+    weighted = np.abs(features) * rf_importance
+    total_weight = weighted[:, 0]
+    for k in range(1, weighted.shape[1]):
+        total_weight = total_weight + weighted[:, k]
+    total_weight = np.where(total_weight == 0, 1.0, total_weight)
+    local_weight_pct = (weighted / total_weight[:, None]) * 100.0
+    importance_rounded = [round(float(imp), 4) for imp in rf_importance]
+
+    model_name = models["manifest"].get("name", MODEL_NAME)
+    model_version = models["manifest"]["version"]
+    columns = {
+        name: values.tolist()
+        for name, values in {
             "loan_amount": loan_amount,
             "interest_rate": interest_rate,
-            "risk_indicator_count": risks,
-            "compliance_violations": violations,
+            "risks": risks,
+            "violations": violations,
             "clauses_count": clauses_count,
-        },
+            "risk_score": risk_score,
+            "fraud_score": fraud_score,
+            "fraud_label": fraud_label,
+            "risk_category": risk_category,
+            "confidence": confidence,
+            "outlier_score": outlier_score,
+            "outlier_triggered": outlier_triggered,
+            "high_anchor_triggered": high_anchor_triggered,
+            "missing_core": missing_core,
+            "local_weight_pct": local_weight_pct,
+        }.items()
     }
+
+    results = []
+    for i in range(len(items)):
+        risk_value = columns["risk_score"][i]
+        fraud_value = columns["fraud_score"][i]
+        outlier_value = round(columns["outlier_score"][i], 4)
+        contributions = [
+            {"feature": name, "importance": importance, "local_weight_pct": round(pct, 2)}
+            for name, importance, pct in zip(FEATURE_NAMES, importance_rounded, columns["local_weight_pct"][i])
+        ]
+        contributions.sort(key=lambda x: x["local_weight_pct"], reverse=True)
+        results.append(
+            {
+                "score": round(risk_value, 4),
+                "fraud_score": round(fraud_value, 4),
+                "fraud_label": columns["fraud_label"][i],
+                "confidence": round(columns["confidence"][i], 4),
+                "risk_category": columns["risk_category"][i],
+                "model": model_name,
+                "model_version": model_version,
+                "drivers": {
+                    "rule_violations": columns["violations"][i],
+                    "risk_indicators": columns["risks"][i],
+                    "fraud_signal": round(fraud_value, 4),
+                    "missing_core_fields": columns["missing_core"][i],
+                    "outlier_score": outlier_value,
+                    "outlier_triggered": columns["outlier_triggered"][i],
+                    "high_anchor_triggered_72": columns["high_anchor_triggered"][i],
+                },
+                "methodology": {
+                    "name": "72/2 Outlier Calibration",
+                    "summary": "Risk tiers are calibrated with a 0.72 high-risk anchor and an outlier escalation trigger at 2.0 composite z-score.",
+                    "tier_thresholds": {"LOW": "< 0.40", "MEDIUM": "0.40 to < 0.75", "HIGH": ">= 0.75"},
+                    "high_anchor": 0.72,
+                    "outlier_trigger_sigma": 2.0,
+                    "outlier_score": outlier_value,
+                    "outlier_triggered": columns["outlier_triggered"][i],
+                },
+                "rf_feature_contributions": contributions,
+                "features": {
+                    "loan_amount": columns["loan_amount"][i],
+                    "interest_rate": columns["interest_rate"][i],
+                    "risk_indicator_count": columns["risks"][i],
+                    "compliance_violations": columns["violations"][i],
+                    "clauses_count": columns["clauses_count"][i],
+                },
+            }
+        )
+    return results
+
+
+def score_decision(extracted_data: Dict[str, Any], compliance_summary: Dict[str, Any]):
+    return score_decisions([(extracted_data, compliance_summary)])[0]
+
+
+def active_model_version() -> str:
+    return REGISTRY.active_version()
+
+
+def score_decisions_timed(items, version: str):
+    started = time.perf_counter()
+    results = score_decisions(items, version)
+    return results, (time.perf_counter() - started) * 1000
+
+
+def _dispatch_timed(items, version: str) -> Future:
+    if CPU_WORKERS >= 1:
+        return cpu_pool().submit(score_decisions_timed, items, version)
+    future: Future = Future()
+    try:
+        future.set_result(score_decisions_timed(items, version))
+    except Exception as exc:
+        future.set_exception(exc)
+    return future
+
+
+SHADOW_SCORER = ShadowScorer(_dispatch_timed, max_pending=MODEL_SHADOW_MAX_PENDING)
+
+
+def observe_shadow(items, results: List[Dict[str, Any]], version: str, elapsed_ms: float):
+    shadow, sample_rate = REGISTRY.shadow()
+    if shadow:
+        SHADOW_SCORER.observe(items, results, version, elapsed_ms, shadow, sample_rate)
+
+
+def _dispatch_scoring(items: List[Tuple[Dict[str, Any], Dict[str, Any]]]) -> Future:
+    # The version is pinned when the batch is cut: an activation mid-flight only affects later batches.
+    # This runs on the batcher thread, so it only reads the pointer; training happens in warm-up or
+    # on the submitting caller's thread (submit_decision).
+    version = REGISTRY.active_version(train_if_missing=False)
+    future: Future = Future()
+    timed = _dispatch_timed(items, version)
+
+    def _done(done: Future):
+        if done.exception() is not None:
+            future.set_exception(done.exception())
+            return
+        results, elapsed_ms = done.result()
+        future.set_result(results)
+        observe_shadow(items, results, version, elapsed_ms)
+
+    timed.add_done_callback(_done)
+    return future
+
+
+DECISION_BATCHER = MicroBatcher(
+    "decision",
+    _dispatch_scoring,
+    max_batch=DECISION_MICROBATCH_MAX,
+    window_ms=DECISION_MICROBATCH_WINDOW_MS,
+    max_in_flight=max(1, CPU_WORKERS),
+)
+
+
+def submit_decision(extracted_data: Dict[str, Any], compliance_summary: Dict[str, Any]) -> Future:
+    # Concurrent single-document callers share one vectorized scoring call; results are identical
+    # to score_decision because every row is scored independently inside the batch.
+    # Resolve (and on a first start, train) the artifact here so the batcher never blocks on it.
+    active_model_version()
+    if DECISION_MICROBATCH_ENABLED:
+        return DECISION_BATCHER.submit((extracted_data, compliance_summary))
+    future: Future = Future()
+    batch = _dispatch_scoring([(extracted_data, compliance_summary)])
+    batch.add_done_callback(
+        lambda done: future.set_exception(done.exception()) if done.exception() else future.set_result(done.result()[0])
+    )
+    return future
+
+
+def activate_model(version: str) -> Dict[str, Any]:
+    # Validate and load locally first; workers pick the new version up on their next batch,
+    # and are pre-warmed in the background so that batch does not pay the load.
+    swapped = REGISTRY.activate(version)
+    version = swapped["active"]
+    compiled_rf = get_models(version)["fraud_engine"] is not None
+    with _READINESS_LOCK:
+        MODEL_READINESS.update(version=version, compiled_rf=compiled_rf)
+
+    def _rewarm():
+        try:
+            warmed = _warm_workers(version)
+            with _READINESS_LOCK:
+                MODEL_READINESS.update(workers_warmed=warmed)
+        except Exception as exc:
+            with _READINESS_LOCK:
+                MODEL_READINESS.update(error=f"rewarm_failed: {type(exc).__name__}: {exc}")
+
+    threading.Thread(target=_rewarm, name="model-rewarm", daemon=True).start()
+    return swapped
+
+
+def set_shadow_model(version: str | None, sample_rate: float = 1.0) -> Dict[str, Any]:
+    state = REGISTRY.set_shadow(version, sample_rate)
+    if version and CPU_WORKERS >= 1:
+        threading.Thread(target=_warm_workers, args=(version,), name="model-shadow-warm", daemon=True).start()
+    return state
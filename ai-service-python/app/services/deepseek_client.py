@@ -0,0 +1,242 @@
+import random
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Any, Callable, Dict
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from app.core.config import (
+    DEEPSEEK_API_KEY,
+    DEEPSEEK_BACKOFF_BASE_SEC,
+    DEEPSEEK_BACKOFF_MAX_SEC,
+    DEEPSEEK_BASE_URL,
+    DEEPSEEK_BREAKER_COOLDOWN_SEC,
+    DEEPSEEK_BREAKER_THRESHOLD,
+    DEEPSEEK_MAX_RETRIES,
+    DEEPSEEK_POOL_SIZE,
+)
+
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
+
+class DeepSeekError(RuntimeError):
+    pass
+
+
+class CircuitOpenError(DeepSeekError):
+    pass
+
+
+class CircuitBreaker:
+    # CLOSED -> OPEN after `threshold` consecutive failed calls; OPEN -> HALF_OPEN after cooldown,
+    # where a single trial call decides whether to close again or re-open.
+    def __init__(self, threshold: int, cooldown_sec: float):
+        self.threshold = max(1, threshold)
+        self.cooldown_sec = cooldown_sec
+        self.state = "CLOSED"
+        self.consecutive_failures = 0
+        self.opened_at: float | None = None
+        self.times_opened = 0
+        self.rejected_calls = 0
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.state == "OPEN" and time.monotonic() - (self.opened_at or 0.0) >= self.cooldown_sec:
+                self.state = "HALF_OPEN"
+                self._trial_in_flight = False
+            if self.state == "CLOSED":
+                return True
+            if self.state == "HALF_OPEN" and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            self.rejected_calls += 1
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.state = "CLOSED"
+            self.consecutive_failures = 0
+            self.opened_at = None
+            self._trial_in_flight = False
+
+    def end_trial(self):
+        # Backstop for a HALF_OPEN trial that ended without an outcome, so the next call can probe.
+        with self._lock:
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self.consecutive_failures += 1
+            self._trial_in_flight = False
+            if self.state == "HALF_OPEN" or self.consecutive_failures >= self.threshold:
+                if self.state != "OPEN":
+                    self.times_opened += 1
+                self.state = "OPEN"
+                self.opened_at = time.monotonic()
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            retry_in = None
+            if self.state == "OPEN" and self.opened_at is not None:
+                retry_in = round(max(0.0, self.cooldown_sec - (time.monotonic() - self.opened_at)), 2)
+            return {
+                "state": self.state,
+                "consecutive_failures": self.consecutive_failures,
+                "failure_threshold": self.threshold,
+                "cooldown_sec": self.cooldown_sec,
+                "retry_in_sec": retry_in,
+                "times_opened": self.times_opened,
+                "rejected_calls": self.rejected_calls,
+            }
+
+
+def _retry_after_seconds(response: requests.Response) -> float | None:
+    value = (response.headers.get("Retry-After") or "").strip()
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
+
+
+class DeepSeekClient:
+    def __init__(
+        self,
+        base_url: str,
+        api_key: str,
+        pool_size: int = 16,
+        max_retries: int = 3,
+        backoff_base_sec: float = 0.5,
+        backoff_max_sec: float = 8.0,
+        breaker: CircuitBreaker | None = None,
+    ):
+        self.base_url = base_url.rstrip("/")
+        self.max_retries = max(0, max_retries)
+        self.backoff_base_sec = backoff_base_sec
+        self.backoff_max_sec = backoff_max_sec
+        self.breaker = breaker or CircuitBreaker(5, 30.0)
+
+        # Keep-alive session: TCP+TLS handshakes are paid once per pooled connection, not per call.
+        self.pool_size = max(1, pool_size)
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size, max_retries=0)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.session.headers.update(
+            {
+                "Authorization": f"Bearer {api_key}",
+                "Content-Type": "application/json",
+            }
+        )
+
+        self._lock = threading.Lock()
+        self._stats = {
+            "requests": 0,
+            "attempts": 0,
+            "retries": 0,
+            "completed": 0,
+            "failures": 0,
+            "last_status": None,
+            "last_error": None,
+        }
+
+    def _incr(self, key: str):
+        with self._lock:
+            self._stats[key] += 1
+
+    def _record(self, **values):
+        with self._lock:
+            self._stats.update(values)
+
+    def _backoff(self, attempt: int, retry_after: float | None) -> float:
+        if retry_after is not None:
+            return min(retry_after, self.backoff_max_sec)
+        # Full jitter keeps concurrent workers from retrying in lock-step.
+        ceiling = min(self.backoff_max_sec, self.backoff_base_sec * (2 ** attempt))
+        return random.uniform(0, ceiling)
+
+    def post_json(self, path: str, payload: Dict[str, Any], timeout_sec: float, parse: Callable[[requests.Response], Any] | None = None) -> Any:
+        # `parse` turns the final response into the caller's result inside the breaker trial, so a
+        # malformed body counts as a failure rather than closing the breaker.
+        if not self.breaker.allow():
+            raise CircuitOpenError("DeepSeek circuit breaker is open; failing fast")
+
+        self._incr("requests")
+        url = f"{self.base_url}/{path.lstrip('/')}"
+        try:
+            return self._send(url, payload, timeout_sec, parse)
+        except DeepSeekError:
+            raise
+        except Exception as exc:
+            # Anything _send did not classify still counts against provider health.
+            self._record(last_error=f"{type(exc).__name__}: {exc}")
+            self._incr("failures")
+            self.breaker.record_failure()
+            raise
+        finally:
+            self.breaker.end_trial()
+
+    def _send(self, url: str, payload: Dict[str, Any], timeout_sec: float, parse: Callable[[requests.Response], Any] | None) -> Any:
+        attempt = 0
+        while True:
+            self._incr("attempts")
+            retry_after = None
+            try:
+                response = self.session.post(url, json=payload, timeout=timeout_sec)
+            except requests.RequestException as exc:
+                self._record(last_status=None, last_error=f"{type(exc).__name__}: {exc}")
+                retryable = isinstance(exc, (requests.ConnectionError, requests.Timeout))
+                if not retryable or attempt >= self.max_retries:
+                    self._incr("failures")
+                    self.breaker.record_failure()
+                    raise DeepSeekError(f"DeepSeek request failed: {exc}") from exc
+            else:
+                self._record(last_status=response.status_code)
+                if response.status_code not in RETRYABLE_STATUS:
+                    # Non-retryable 4xx is a caller problem, not provider health.
+                    result = parse(response) if parse is not None else response
+                    self._incr("completed")
+                    self.breaker.record_success()
+                    return result
+                self._record(last_error=f"HTTP {response.status_code}")
+                if attempt >= self.max_retries:
+                    self._incr("failures")
+                    self.breaker.record_failure()
+                    raise DeepSeekError(f"DeepSeek API error {response.status_code}: {response.text}")
+                retry_after = _retry_after_seconds(response)
+
+            time.sleep(self._backoff(attempt, retry_after))
+            attempt += 1
+            self._incr("retries")
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._stats)
+        stats["pool_size"] = self.pool_size
+        stats["max_retries"] = self.max_retries
+        stats["circuit_breaker"] = self.breaker.snapshot()
+        return stats
+
+
+DEEPSEEK_CLIENT = DeepSeekClient(
+    base_url=DEEPSEEK_BASE_URL,
+    api_key=DEEPSEEK_API_KEY,
+    pool_size=DEEPSEEK_POOL_SIZE,
+    max_retries=DEEPSEEK_MAX_RETRIES,
+    backoff_base_sec=DEEPSEEK_BACKOFF_BASE_SEC,
+    backoff_max_sec=DEEPSEEK_BACKOFF_MAX_SEC,
+    breaker=CircuitBreaker(DEEPSEEK_BREAKER_THRESHOLD, DEEPSEEK_BREAKER_COOLDOWN_SEC),
+)
@@ -1,6 +1,17 @@
 import json
-import requests
-from app.core.config import DEEPSEEK_API_KEY, DEEPSEEK_BASE_URL, DEEPSEEK_MODEL
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List
+from app.core.config import (
+    DEEPSEEK_CHUNK_CHARS,
+    DEEPSEEK_CHUNK_CONCURRENCY,
+    DEEPSEEK_MAX_CHUNKS,
+    DEEPSEEK_MAX_PARALLEL,
+    DEEPSEEK_MODEL,
+    LLM_CACHE_ENABLED,
+)
+from app.services.deepseek_client import DEEPSEEK_CLIENT, DeepSeekError
+from app.services.llm_cache import LLM_CACHE, cache_key
 
 DOCUMENT_SYSTEM_PROMPT = """
 You are DocumentAgent in RiskIQ.
@@ -116,8 +127,70 @@ Rules:
 - No markdown.
 """.strip()
 
-class DeepSeekError(RuntimeError):
-    pass
+# Classification only needs the opening pages of a document.
+CLASSIFY_CHARS = 8000
+
+# Shared pool for independent LLM stages; calls are network-bound so threads are enough.
+_LLM_EXECUTOR = ThreadPoolExecutor(max_workers=DEEPSEEK_MAX_PARALLEL, thread_name_prefix="deepseek")
+# Fan-out from inside an LLM stage (e.g. chunk extraction) runs here, never on the pool its caller
+# occupies, so a stage waiting on its children cannot deadlock the shared pool.
+_FANOUT_EXECUTOR = ThreadPoolExecutor(max_workers=DEEPSEEK_MAX_PARALLEL, thread_name_prefix="deepseek-fanout")
+# Every DeepSeek HTTP call holds one slot, whichever pool it runs on: this is what keeps the total
+# in flight at DEEPSEEK_MAX_PARALLEL however many documents fan out at once.
+_CALL_SLOTS = threading.BoundedSemaphore(max(1, DEEPSEEK_MAX_PARALLEL))
+
+
+def submit_llm(fn: Callable[[], Any]):
+    # Single LLM stage on the shared pool, for callers that schedule their own stages.
+    return _LLM_EXECUTOR.submit(fn)
+
+
+def run_parallel(stages: Dict[str, Callable[[], Any]], max_concurrency: int | None = None) -> Dict[str, Any]:
+    # Wall-clock is roughly the slowest stage; the first error is re-raised once all stages settle.
+    if max_concurrency:
+        return _collect(_submit_fanout(stages, max_concurrency))
+    return _collect({name: _LLM_EXECUTOR.submit(fn) for name, fn in stages.items()})
+
+
+def _submit_fanout(stages: Dict[str, Callable[[], Any]], limit: int) -> Dict[str, Any]:
+    # At most `limit` of one caller's stages are queued or running at a time, so one long document
+    # cannot fill the fan-out queue ahead of everyone else's.
+    window = threading.Semaphore(limit)
+
+    def _run(fn):
+        try:
+            return fn()
+        finally:
+            window.release()
+
+    futures = {}
+    for name, fn in stages.items():
+        window.acquire()
+        futures[name] = _FANOUT_EXECUTOR.submit(_run, fn)
+    return futures
+
+
+def _collect(futures: Dict[str, Any]) -> Dict[str, Any]:
+    results: Dict[str, Any] = {}
+    first_error: BaseException | None = None
+    for name, future in futures.items():
+        try:
+            results[name] = future.result()
+        except BaseException as exc:
+            if first_error is None:
+                first_error = exc
+    if first_error is not None:
+        raise first_error
+    return results
+
+
+def _completion_data(response) -> Dict[str, Any]:
+    if response.status_code >= 400:
+        raise DeepSeekError(f"DeepSeek API error {response.status_code}: {response.text}")
+    data = response.json()
+    # Reach the content here so a malformed body fails inside the breaker trial.
+    data["choices"][0]["message"]["content"]
+    return data
 
 
 def _strip_fenced_json(text: str) -> str:
@@ -136,66 +209,178 @@ def chat_completion(
     temperature: float = 0,
     model: str | None = None,
     timeout_sec: int = 120,
+    use_cache: bool = True,
 ):
-    url = f"{DEEPSEEK_BASE_URL}/chat/completions"
-    payload = {
-        "model": model or DEEPSEEK_MODEL,
-        "temperature": temperature,
-        "messages": [
-            {"role": "system", "content": system_prompt},
-            {"role": "user", "content": user_prompt},
-        ],
-    }
+    model_name = model or DEEPSEEK_MODEL
+    # Only temperature=0 completions are deterministic enough to replay from cache.
+    cacheable = LLM_CACHE_ENABLED and temperature == 0
+    key = cache_key(model_name, system_prompt, user_prompt, temperature) if cacheable else None
+    if cacheable and not use_cache:
+        LLM_CACHE.note_bypass()
 
-    response = requests.post(
-        url,
-        headers={
-            "Authorization": f"Bearer {DEEPSEEK_API_KEY}",
-            "Content-Type": "application/json",
-        },
-        json=payload,
-        timeout=timeout_sec,
-    )
+    data = LLM_CACHE.get(key) if key and use_cache else None
+    from_cache = data is not None
+    if data is None:
+        payload = {
+            "model": model_name,
+            "temperature": temperature,
+            "messages": [
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": user_prompt},
+            ],
+        }
 
-    if response.status_code >= 400:
-        raise DeepSeekError(f"DeepSeek API error {response.status_code}: {response.text}")
+        with _CALL_SLOTS:
+            data = DEEPSEEK_CLIENT.post_json("/chat/completions", payload, timeout_sec, parse=_completion_data)
 
-    data = response.json()
     content = data["choices"][0]["message"]["content"]
 
     if not expect_json:
-        return content, data
+        result = content
+    else:
+        cleaned = _strip_fenced_json(content)
+        try:
+            result = json.loads(cleaned)
+        except json.JSONDecodeError as exc:
+            raise DeepSeekError("DeepSeek response was not valid JSON") from exc
 
-    cleaned = _strip_fenced_json(content)
-    try:
-        parsed = json.loads(cleaned)
-    except json.JSONDecodeError as exc:
-        raise DeepSeekError("DeepSeek response was not valid JSON") from exc
+        if not isinstance(result, dict):
+            raise DeepSeekError("DeepSeek JSON payload must be an object")
 
-    if not isinstance(parsed, dict):
-        raise DeepSeekError("DeepSeek JSON payload must be an object")
+    # Store only responses that parsed cleanly so a malformed answer is never replayed.
+    if key and not from_cache:
+        LLM_CACHE.put(key, data)
 
-    return parsed, data
+    return result, data
 
 
-def extract_structured_data(text: str, system_prompt: str = DOCUMENT_SYSTEM_PROMPT):
-    return chat_completion(
-        system_prompt=system_prompt,
-        user_prompt=(
-            "Extract financial entities and compliance-relevant information from the text and return strict JSON only.\n\n"
-            + text[:15000]
-        ),
-        expect_json=True,
-        temperature=0,
+def split_text_chunks(text: str, max_chars: int = DEEPSEEK_CHUNK_CHARS) -> List[str]:
+    # Pack whole pages (form feeds) or paragraphs into chunks; only oversize blocks are split by line.
+    blocks = [b for b in text.replace("\f", "\n\n").split("\n\n") if b.strip()]
+    chunks: List[str] = []
+    current = ""
+    for block in blocks:
+        pieces = [block] if len(block) <= max_chars else _split_oversize(block, max_chars)
+        for piece in pieces:
+            if current and len(current) + 2 + len(piece) > max_chars:
+                chunks.append(current)
+                current = ""
+            current = f"{current}\n\n{piece}" if current else piece
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def _split_oversize(block: str, max_chars: int) -> List[str]:
+    pieces: List[str] = []
+    current = ""
+    for line in block.splitlines():
+        while len(line) > max_chars:
+            if current:
+                pieces.append(current)
+                current = ""
+            pieces.append(line[:max_chars])
+            line = line[max_chars:]
+        if current and len(current) + 1 + len(line) > max_chars:
+            pieces.append(current)
+            current = ""
+        current = f"{current}\n{line}" if current else line
+    if current:
+        pieces.append(current)
+    return pieces
+
+
+def _dedupe_key(value: Any) -> str:
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, sort_keys=True, ensure_ascii=False)
+    return " ".join(str(value).split()).casefold()
+
+
+def merge_extractions(parts: List[Dict[str, Any]]) -> Dict[str, Any]:
+    merged: Dict[str, Any] = {}
+    seen: Dict[str, set] = {}
+    for part in parts:
+        for key, values in part.items():
+            if not isinstance(values, list):
+                if key not in merged or not merged[key]:
+                    merged[key] = values
+                continue
+            bucket = merged.setdefault(key, [])
+            if not isinstance(bucket, list):
+                continue
+            keys = seen.setdefault(key, set())
+            for value in values:
+                marker = _dedupe_key(value)
+                if marker and marker not in keys:
+                    keys.add(marker)
+                    bucket.append(value)
+    return merged
+
+
+def extract_structured_data(
+    text: str,
+    system_prompt: str = DOCUMENT_SYSTEM_PROMPT,
+    use_cache: bool = True,
+    chunked: bool | None = None,
+):
+    # chunked=None picks map-reduce automatically once the text no longer fits one window.
+    if chunked is None:
+        chunked = len(text) > DEEPSEEK_CHUNK_CHARS
+    if not chunked:
+        return chat_completion(
+            system_prompt=system_prompt,
+            user_prompt=(
+                "Extract financial entities and compliance-relevant information from the text and return strict JSON only.\n\n"
+                + text[:DEEPSEEK_CHUNK_CHARS]
+            ),
+            expect_json=True,
+            temperature=0,
+            use_cache=use_cache,
+        )
+
+    all_chunks = split_text_chunks(text)
+    chunks = all_chunks[:DEEPSEEK_MAX_CHUNKS]
+    total = len(chunks)
+
+    def _extract_chunk(idx: int, chunk: str):
+        return chat_completion(
+            system_prompt=system_prompt,
+            user_prompt=(
+                f"Extract financial entities and compliance-relevant information from this excerpt (part {idx + 1} of {total}) "
+                "of a longer document and return strict JSON only.\n\n"
+                + chunk
+            ),
+            expect_json=True,
+            temperature=0,
+            use_cache=use_cache,
+        )
+
+    results = run_parallel(
+        {f"chunk_{idx}": (lambda idx=idx, chunk=chunk: _extract_chunk(idx, chunk)) for idx, chunk in enumerate(chunks)},
+        max_concurrency=max(1, DEEPSEEK_CHUNK_CONCURRENCY),
     )
+    ordered = [results[f"chunk_{idx}"] for idx in range(total)]
+    merged = merge_extractions([parsed for parsed, _ in ordered])
+    raw = {
+        "mode": "chunked",
+        "chunk_count": total,
+        "chunk_chars": [len(c) for c in chunks],
+        # Past DEEPSEEK_MAX_CHUNKS the tail of the document is not sent; say so rather than drop it silently.
+        "chunks_total": len(all_chunks),
+        "truncated": len(all_chunks) > total,
+        "chars_dropped": sum(len(c) for c in all_chunks[total:]),
+        "responses": [data for _, data in ordered],
+    }
+    return merged, raw
 
 
-def classify_document_type(text: str):
+def classify_document_type(text: str, use_cache: bool = True):
     return chat_completion(
         system_prompt=DOCUMENT_CLASSIFIER_PROMPT,
-        user_prompt=("Classify this document:\n\n" + text[:8000]),
+        user_prompt=("Classify this document:\n\n" + text[:CLASSIFY_CHARS]),
         expect_json=True,
         temperature=0,
+        use_cache=use_cache,
     )
 
 
@@ -232,7 +417,7 @@ def session_copilot(question: str, session_context: dict, history: list[dict] |
     )
 
 
-def rewrite_clause(violation: dict, session_context: dict, current_clause: str = ""):
+def rewrite_clause(violation: dict, session_context: dict, current_clause: str = "", use_cache: bool = True):
     compact_context = {
         "violation": violation,
         "current_clause": current_clause,
@@ -252,6 +437,7 @@ def rewrite_clause(violation: dict, session_context: dict, current_clause: str =
         temperature=0,
         model="deepseek-chat",
         timeout_sec=45,
+        use_cache=use_cache,
     )
 
 
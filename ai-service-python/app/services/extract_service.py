@@ -1,28 +1,275 @@
+from abc import ABC, abstractmethod
 from pathlib import Path
-from typing import Dict, Any
+from typing import Dict, Any, BinaryIO, Iterator, List
+import io
+import os
+import threading
+import json
+import hashlib
+import time
 import pdfplumber
+import pypdfium2
 import pytesseract
 from PIL import Image
 from pypdf import PdfReader
 import csv
 import zipfile
 import xml.etree.ElementTree as ET
+from app.core.config import (
+    OCR_ENABLED,
+    OCR_RESOLUTION,
+    OCR_WORKERS,
+    PDF_ENGINE,
+    PDF_MIN_CHAR_DENSITY,
+    PDF_OFFLOAD,
+    PDF_PAGES_PER_TASK,
+    PDF_PARALLEL_MIN_PAGES,
+    PDF_WORKERS,
+)
+from app.services.extraction_cache import EXTRACTION_CACHE, file_sha256
+from app.services.stage_executor import TrackedProcessPool, offload_cpu, process_pool
 
+# Bump whenever extraction output changes so stale cache entries stop matching.
+EXTRACTOR_VERSION = "adaptive-ocr-stream-1"
 
-def extract_text_from_pdf(path: Path) -> str:
-    text_parts = []
-    with pdfplumber.open(str(path)) as pdf:
-        for page in pdf.pages:
-            content = page.extract_text() or ""
-            if content.strip():
-                text_parts.append(content)
+def _pdf_pool() -> TrackedProcessPool:
+    return process_pool("pdf", PDF_WORKERS)
 
-    text = "\n".join(text_parts).strip()
-    if text:
-        return text
 
+class DocumentSource:
+    # A document as ingested: small uploads stay in memory (`data`), large ones live at `path`.
+    def __init__(
+        self,
+        name: str,
+        path: str | Path | None = None,
+        data: bytes | None = None,
+        content_hash: str | None = None,
+        owns_path: bool = False,
+    ):
+        if path is None and data is None:
+            raise ValueError("DocumentSource needs a path or in-memory data")
+        self.name = name
+        self.path = Path(path) if path is not None else None
+        self.data = data
+        self._content_hash = content_hash
+        self._owns_path = owns_path
+
+    @classmethod
+    def from_path(cls, file_path: str | Path) -> "DocumentSource":
+        path = Path(file_path)
+        if not path.exists():
+            raise FileNotFoundError(f"File not found: {file_path}")
+        return cls(path.name, path=path)
+
+    @property
+    def suffix(self) -> str:
+        return Path(self.name).suffix.lower() or (self.path.suffix.lower() if self.path else "")
+
+    @property
+    def size(self) -> int:
+        return len(self.data) if self.data is not None else self.path.stat().st_size
+
+    @property
+    def in_memory(self) -> bool:
+        return self.data is not None
+
+    def content_hash(self) -> str:
+        if self._content_hash is None:
+            self._content_hash = hashlib.sha256(self.data).hexdigest() if self.data is not None else file_sha256(self.path)
+        return self._content_hash
+
+    def raw(self) -> str | bytes:
+        # Picklable input for the PDF engines and their worker processes.
+        return self.data if self.data is not None else str(self.path)
+
+    def open(self) -> BinaryIO:
+        return io.BytesIO(self.data) if self.data is not None else self.path.open("rb")
+
+    def close(self):
+        if self._owns_path and self.path is not None:
+            try:
+                os.remove(self.path)
+            except OSError:
+                pass
+        self.data = None
+
+
+def _as_source(src: "DocumentSource | str | Path | bytes") -> str | bytes:
+    if isinstance(src, DocumentSource):
+        return src.raw()
+    if isinstance(src, (bytes, bytearray, memoryview)):
+        return bytes(src)
+    return str(src)
+
+
+def _binary_input(src) -> "str | BinaryIO":
+    # Engines take a filesystem path or a buffer; in-memory uploads are wrapped, never written out.
+    raw = _as_source(src)
+    return io.BytesIO(raw) if isinstance(raw, bytes) else raw
+
+
+def _pdf_page_count(path) -> int:
+    return len(PdfReader(_binary_input(path)).pages)
+
+
+def _broken_text_reason(text: str, width: float, height: float) -> str | None:
+    # Heuristics for pypdf output that pdfplumber's layout-aware extraction does better on.
+    visible = [ch for ch in text if not ch.isspace()]
+    if not visible:
+        # No text layer at all (a scanned page): pdfplumber would find nothing either, so the page
+        # goes straight to ocr_blank_pages.
+        return None
+    area_sq_in = max(1.0, (width / 72.0) * (height / 72.0))
+    if len(visible) / area_sq_in < PDF_MIN_CHAR_DENSITY:
+        return "low_char_density"
+    garbled = sum(
+        1 for ch in visible
+        if ch == "\ufffd" or "\ue000" <= ch <= "\uf8ff" or "\ufb00" <= ch <= "\ufb06"
+    )
+    if "(cid:" in text or (visible and garbled / len(visible) > 0.01):
+        return "garbled_glyphs"
+    tokens = text.split()
+    if tokens and sum(1 for t in tokens if len(t) > 30) / len(tokens) > 0.05:
+        # Table cells and columns run together when pypdf loses the layout.
+        return "collapsed_layout"
+    return None
+
+
+def _iter_pdf_page_range_detailed(path_str, start: int, end: int | None = None, engine: str = PDF_ENGINE) -> Iterator[Dict[str, Any]]:
+    if engine == "pdfplumber":
+        with pdfplumber.open(_binary_input(path_str)) as pdf:
+            for page in pdf.pages[start:end]:
+                content = page.extract_text() or ""
+                page.close()
+                yield {"text": content, "engine": "pdfplumber", "reason": None}
+        return
+
+    reader = PdfReader(_binary_input(path_str))
+    plumber = None
+    try:
+        for idx in range(start, len(reader.pages) if end is None else end):
+            page = reader.pages[idx]
+            try:
+                content = page.extract_text() or ""
+            except Exception:
+                content = ""
+            reason = None
+            if engine == "adaptive":
+                box = page.mediabox
+                reason = _broken_text_reason(content, float(box.width), float(box.height))
+            if reason is None:
+                yield {"text": content, "engine": "pypdf", "reason": None}
+                continue
+            # Escalate just this page; pdfplumber is opened at most once per range.
+            if plumber is None:
+                plumber = pdfplumber.open(_binary_input(path_str))
+            plumber_page = plumber.pages[idx]
+            escalated = plumber_page.extract_text() or ""
+            plumber_page.close()
+            yield {"text": escalated if escalated.strip() else content, "engine": "pdfplumber", "reason": reason}
+    finally:
+        if plumber is not None:
+            plumber.close()
+
+
+def _extract_pdf_page_range(path_str, start: int, end: int) -> List[str]:
+    # Runs in a worker: each task opens its own handle so memory is bounded by the range, not the file.
+    return [page["text"] for page in _iter_pdf_page_range_detailed(path_str, start, end)]
+
+
+def _page_ranges(page_count: int, workers: int, max_per_task: int) -> List[tuple[int, int]]:
+    per_task = max(1, min(max_per_task, -(-page_count // max(1, workers))))
+    return [(start, min(page_count, start + per_task)) for start in range(0, page_count, per_task)]
+
+
+def extract_pdf_pages(path, start: int = 0, page_count: int | None = None) -> List[str]:
+    src = _as_source(path)
+    page_count = _pdf_page_count(src) if page_count is None else page_count
+    remaining = page_count - start
+    parallel = PDF_WORKERS > 1 and remaining >= PDF_PARALLEL_MIN_PAGES
+    if PDF_WORKERS < 1 or remaining <= 0 or not (parallel or PDF_OFFLOAD):
+        return _extract_pdf_page_range(src, start, page_count)
+
+    # Small documents still go to a worker as a single task so parsing never holds the server's GIL.
+    ranges = _page_ranges(remaining, PDF_WORKERS, PDF_PAGES_PER_TASK) if parallel else [(0, remaining)]
+    futures = [_pdf_pool().submit(_extract_pdf_page_range, src, start + lo, start + hi) for lo, hi in ranges]
+    pages: List[str] = []
+    for future in futures:
+        pages.extend(future.result())
+    return pages
+
+
+def iter_pdf_pages(path, start: int = 0) -> Iterator[str]:
+    # Lazy, in-process: stop iterating as soon as the caller's budget is met.
+    for page in _iter_pdf_page_range_detailed(_as_source(path), start):
+        yield page["text"]
+
+
+def _ocr_pdf_page(path_str: str | bytes, page_index: int, resolution: int) -> Dict[str, Any]:
+    # Runs in a worker: rasterize a single page and OCR it.
+    started = time.perf_counter()
+    try:
+        pdf = pypdfium2.PdfDocument(path_str)
+        try:
+            image = pdf[page_index].render(scale=resolution / 72).to_pil()
+        finally:
+            pdf.close()
+        text = pytesseract.image_to_string(image)
+        error = None
+    except Exception as exc:
+        text = ""
+        error = f"{type(exc).__name__}: {exc}"
+    return {
+        "page": page_index + 1,
+        "text": text,
+        "ms": round((time.perf_counter() - started) * 1000, 1),
+        "error": error,
+    }
+
+
+def ocr_blank_pages(path, pages: List[str]) -> tuple[List[str], List[Dict[str, Any]]]:
+    # Only pages without a text layer are rasterized; digital pages are never OCR'd.
+    blank = [idx for idx, content in enumerate(pages) if not content.strip()]
+    if not blank or not OCR_ENABLED:
+        return pages, []
+
+    if OCR_WORKERS <= 1 or len(blank) == 1:
+        results = [_ocr_pdf_page(_as_source(path), idx, OCR_RESOLUTION) for idx in blank]
+    else:
+        pool = process_pool("ocr", OCR_WORKERS)
+        src = _as_source(path)
+        results = [f.result() for f in [pool.submit(_ocr_pdf_page, src, idx, OCR_RESOLUTION) for idx in blank]]
+
+    filled = list(pages)
+    report = []
+    for result in results:
+        filled[result["page"] - 1] = result["text"] or ""
+        report.append({k: v for k, v in result.items() if k != "text"} | {"chars": len((result["text"] or "").strip())})
+    return filled, report
+
+
+def _join_pdf_pages(pages: List[str]) -> str:
+    return "\n".join([content for content in pages if content.strip()]).strip()
+
+
+def _page_offsets(pages: List[str]) -> List[int | None]:
+    # Start offset of each page inside _join_pdf_pages(pages); None for pages with no text.
+    joined = "\n".join([content for content in pages if content.strip()])
+    lead = len(joined) - len(joined.lstrip())
+    offsets: List[int | None] = []
+    pos = 0
+    for content in pages:
+        if not content.strip():
+            offsets.append(None)
+            continue
+        offsets.append(max(0, pos - lead))
+        pos += len(content) + 1
+    return offsets
+
+
+def _pypdf_text(path) -> str:
     # Try pypdf as second pass for edge PDFs
-    reader = PdfReader(str(path))
+    reader = PdfReader(_binary_input(path))
     backup_parts = []
     for page in reader.pages:
         backup_parts.append(page.extract_text() or "")
@@ -30,78 +277,291 @@ def extract_text_from_pdf(path: Path) -> str:
     return "\n".join(backup_parts).strip()
 
 
-def extract_text_from_image(path: Path) -> str:
-    image = Image.open(path)
+def extract_pdf_document(path) -> Dict[str, Any]:
+    path = _as_source(path)
+    pages, ocr_report = ocr_blank_pages(path, extract_pdf_pages(path))
+    text = _join_pdf_pages(pages) or _pypdf_text(path)
+    return {
+        "text": text,
+        "pages": pages,
+        "page_count": len(pages),
+        "page_offsets": _page_offsets(pages),
+        "ocr_pages": ocr_report,
+    }
+
+
+def extract_text_from_pdf(path) -> str:
+    return extract_pdf_document(path)["text"]
+
+
+def extract_pdf_text_budget(path, max_chars: int | None = None, max_pages: int | None = None) -> Dict[str, Any]:
+    path = _as_source(path)
+    pages: List[str] = []
+    chars = 0
+    for content in iter_pdf_pages(path):
+        pages.append(content)
+        chars += len(content) + 1
+        if (max_chars is not None and chars >= max_chars) or (max_pages is not None and len(pages) >= max_pages):
+            break
+    page_count = _pdf_page_count(path)
+    text = _join_pdf_pages(pages)
+    if not text and len(pages) == page_count:
+        text = _pypdf_text(path)
+    return {
+        "text": text[:max_chars] if max_chars is not None else text,
+        "pages_read": len(pages),
+        "page_count": page_count,
+        "complete": len(pages) == page_count,
+    }
+
+
+class _DocumentBase(ABC):
+    source: DocumentSource
+    cache_key: str | None = None
+    cache_hit = False
+    _profile: Dict[str, Any] | None = None
+
+    @abstractmethod
+    def prefix(self, max_chars: int) -> str:
+        ...
+
+    @abstractmethod
+    def text(self) -> str:
+        ...
+
+    def meta(self) -> Dict[str, Any]:
+        return {}
+
+    def profile(self) -> Dict[str, Any]:
+        # The first profile computed for a fresh extraction is what lands in the extraction cache.
+        if self._profile is None:
+            self._profile = detect_document_profile(self.source, self.text(), self.meta())
+            if self.cache_key:
+                EXTRACTION_CACHE.put(self.cache_key, {"text": self.text(), "meta": self.meta(), "profile": self._profile})
+        profile = dict(self._profile)
+        profile["extraction_cache"] = "hit" if self.cache_hit else ("miss" if self.cache_key else "off")
+        return profile
+
+
+class LazyPdfText(_DocumentBase):
+    # Parses in two phases, each run once by whichever thread needs it first (the pipeline runs them
+    # as graph stages): read_prefix() reads pages in-process until the prefix budget is met;
+    # read_rest() hands the remainder to the page-parallel engine and OCRs blank pages.
+    def __init__(self, source: "DocumentSource | str | Path", prefix_chars: int = 0):
+        self.source = source if isinstance(source, DocumentSource) else DocumentSource.from_path(source)
+        self.path = self.source.raw()
+        self.prefix_chars = prefix_chars
+        self._page_count: int | None = None
+        self._head: List[str] = []
+        self._head_chars = 0
+        self._needs_ocr = False
+        self._pages: List[str] | None = None
+        self._text: str | None = None
+        self._ocr_report: List[Dict[str, Any]] = []
+        self._head_lock = threading.Lock()
+        self._rest_lock = threading.Lock()
+
+    def read_prefix(self) -> None:
+        with self._head_lock:
+            if self._page_count is not None:
+                return
+            page_count = _pdf_page_count(self.path)
+            head: List[str] = []
+            chars = 0
+            for content in iter_pdf_pages(self.path):
+                head.append(content)
+                if not content.strip():
+                    # A scanned page must be OCR'd before anything after it can join the prefix.
+                    self._needs_ocr = True
+                    break
+                chars += len(content) + 1
+                if chars >= self.prefix_chars:
+                    break
+            self._head, self._head_chars = head, chars
+            self._page_count = page_count
+
+    def read_rest(self) -> None:
+        self.read_prefix()
+        with self._rest_lock:
+            if self._pages is not None:
+                return
+            read = len(self._head)
+            rest = extract_pdf_pages(self.path, start=read, page_count=self._page_count) if read < self._page_count else []
+            pages = self._head + rest
+            if self._needs_ocr or any(not content.strip() for content in rest):
+                pages, self._ocr_report = ocr_blank_pages(self.path, pages)
+            self._pages = pages
+
+    def prefix(self, max_chars: int) -> str:
+        self.read_prefix()
+        if self._head_chars >= max_chars:
+            return _join_pdf_pages(self._head).lstrip()[:max_chars]
+        return self.text()[:max_chars]
+
+    def pages(self) -> List[str]:
+        self.read_rest()
+        return list(self._pages)
+
+    def text(self) -> str:
+        pages = self.pages()
+        if self._text is None:
+            self._text = _ensure_sufficient_text(_join_pdf_pages(pages) or _pypdf_text(self.path))
+        return self._text
+
+    def meta(self) -> Dict[str, Any]:
+        pages = self.pages()
+        return {"page_count": len(pages), "page_offsets": _page_offsets(pages), "ocr_pages": list(self._ocr_report)}
+
+
+class ExtractedText(_DocumentBase):
+    # Same interface as LazyPdfText for formats that are extracted eagerly (or come from the cache).
+    def __init__(
+        self,
+        text: str,
+        source: DocumentSource,
+        meta: Dict[str, Any] | None = None,
+        profile: Dict[str, Any] | None = None,
+        cache_hit: bool = False,
+    ):
+        self.source = source
+        self._text = text
+        self._meta = meta or {}
+        self._profile = profile
+        self.cache_hit = cache_hit
+
+    def prefix(self, max_chars: int) -> str:
+        return self._text[:max_chars]
+
+    def text(self) -> str:
+        return self._text
+
+    def meta(self) -> Dict[str, Any]:
+        return self._meta
+
+
+def extract_text_from_image(path) -> str:
+    image = Image.open(_binary_input(path))
     return pytesseract.image_to_string(image)
 
 
-def extract_text_from_docx(path: Path) -> str:
-    ns = {"w": "http://schemas.openxmlformats.org/wordprocessingml/2006/main"}
+TABULAR_MAX_ROWS = 500
+DOCX_MAX_CHARS = 1_000_000
+_W_NS = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+_S_NS = "{http://schemas.openxmlformats.org/spreadsheetml/2006/main}"
+
+
+def _iter_completed(stream, tag: str) -> Iterator[ET.Element]:
+    # Yield each completed `tag` element, then detach finished subtrees so the tree never grows.
+    stack: List[ET.Element] = []
+    open_targets = 0
+    for event, elem in ET.iterparse(stream, events=("start", "end")):
+        if event == "start":
+            stack.append(elem)
+            if elem.tag == tag:
+                open_targets += 1
+            continue
+        stack.pop()
+        if elem.tag == tag:
+            open_targets -= 1
+            yield elem
+        if open_targets == 0 and stack:
+            stack[-1].remove(elem)
+
+
+def extract_text_from_docx(path, max_chars: int = DOCX_MAX_CHARS) -> str:
     lines = []
-    with zipfile.ZipFile(str(path)) as zf:
-        xml = zf.read("word/document.xml")
-    root = ET.fromstring(xml)
-    for p in root.findall(".//w:p", ns):
-        texts = [t.text for t in p.findall(".//w:t", ns) if t.text]
-        line = "".join(texts).strip()
-        if line:
-            lines.append(line)
-    return "\n".join(lines).strip()
-
-
-def extract_text_from_tabular(path: Path) -> str:
-    suffix = path.suffix.lower()
+    chars = 0
+    with zipfile.ZipFile(_binary_input(path)) as zf, zf.open("word/document.xml") as stream:
+        for p in _iter_completed(stream, f"{_W_NS}p"):
+            texts = [t.text for t in p.iter(f"{_W_NS}t") if t.text]
+            line = "".join(texts).strip()
+            if line:
+                lines.append(line)
+                chars += len(line) + 1
+                if chars >= max_chars:
+                    break
+    return "\n".join(lines).strip()[:max_chars]
+
+
+def _resolve_shared_strings(zf: zipfile.ZipFile, needed: set) -> Dict[int, str]:
+    # Only the indices referenced by the capped rows are materialised; parsing stops past the last one.
+    if not needed or "xl/sharedStrings.xml" not in zf.namelist():
+        return {}
+    last = max(needed)
+    resolved: Dict[int, str] = {}
+    with zf.open("xl/sharedStrings.xml") as stream:
+        for idx, si in enumerate(_iter_completed(stream, f"{_S_NS}si")):
+            if idx in needed:
+                resolved[idx] = "".join([t.text for t in si.iter(f"{_S_NS}t") if t.text])
+            if idx >= last:
+                break
+    return resolved
+
+
+def _iter_xlsx_rows(zf: zipfile.ZipFile, sheet_name: str) -> Iterator[List[tuple[str | None, str]]]:
+    with zf.open(sheet_name) as stream:
+        for row in _iter_completed(stream, f"{_S_NS}row"):
+            cells = []
+            for c in row.findall(f"{_S_NS}c"):
+                v = c.find(f"{_S_NS}v")
+                if v is None or v.text is None:
+                    continue
+                cells.append((c.attrib.get("t"), v.text))
+            yield cells
+
+
+def extract_text_from_tabular(path, max_rows: int = TABULAR_MAX_ROWS, suffix: str | None = None) -> str:
+    suffix = suffix or Path(path).suffix.lower()
     if suffix == ".csv":
         rows = []
-        with path.open("r", encoding="utf-8", errors="ignore") as f:
+        raw = _binary_input(path)
+        binary = open(raw, "rb") if isinstance(raw, str) else raw
+        with io.TextIOWrapper(binary, encoding="utf-8", errors="ignore", newline="") as f:
             reader = csv.reader(f)
             for i, row in enumerate(reader):
-                if i >= 500:
+                if i >= max_rows:
                     break
                 row_text = " | ".join([c.strip() for c in row if c and c.strip()])
                 if row_text:
                     rows.append(row_text)
         return "\n".join(rows)
     if suffix == ".xlsx":
-        ns = {"s": "http://schemas.openxmlformats.org/spreadsheetml/2006/main"}
-        rows = []
-        with zipfile.ZipFile(str(path)) as zf:
-            shared = []
-            if "xl/sharedStrings.xml" in zf.namelist():
-                shared_root = ET.fromstring(zf.read("xl/sharedStrings.xml"))
-                for si in shared_root.findall(".//s:si", ns):
-                    parts = [t.text for t in si.findall(".//s:t", ns) if t.text]
-                    shared.append("".join(parts))
-
+        raw_rows: List[List[tuple[str | None, str]]] = []
+        needed: set = set()
+        with zipfile.ZipFile(_binary_input(path)) as zf:
             sheet_names = [n for n in zf.namelist() if n.startswith("xl/worksheets/sheet") and n.endswith(".xml")]
             for sheet_name in sheet_names:
-                sheet_root = ET.fromstring(zf.read(sheet_name))
-                for row in sheet_root.findall(".//s:row", ns):
-                    values = []
-                    for c in row.findall("s:c", ns):
-                        t_attr = c.attrib.get("t")
-                        v = c.find("s:v", ns)
-                        if v is None or v.text is None:
-                            continue
-                        cell = v.text
-                        if t_attr == "s":
-                            try:
-                                cell = shared[int(cell)]
-                            except Exception:
-                                pass
-                        values.append(str(cell).strip())
-                    row_text = " | ".join([v for v in values if v])
-                    if row_text:
-                        rows.append(row_text)
-                        if len(rows) >= 500:
-                            return "\n".join(rows)
+                for cells in _iter_xlsx_rows(zf, sheet_name):
+                    if not any(str(value).strip() for _, value in cells):
+                        continue
+                    raw_rows.append(cells)
+                    needed.update(int(value) for t_attr, value in cells if t_attr == "s" and value.strip().isdigit())
+                    if len(raw_rows) >= max_rows:
+                        break
+                if len(raw_rows) >= max_rows:
+                    break
+            shared = _resolve_shared_strings(zf, needed)
+
+        rows = []
+        for cells in raw_rows:
+            values = []
+            for t_attr, cell in cells:
+                if t_attr == "s":
+                    try:
+                        cell = shared.get(int(cell), cell)
+                    except ValueError:
+                        pass
+                values.append(str(cell).strip())
+            row_text = " | ".join([v for v in values if v])
+            if row_text:
+                rows.append(row_text)
         return "\n".join(rows)
 
     raise ValueError("Unsupported tabular format")
 
 
-def detect_input_mode(path: Path) -> str:
-    suffix = path.suffix.lower()
+def detect_input_mode(path) -> str:
+    suffix = path.suffix.lower() if isinstance(path, (Path, DocumentSource)) else Path(path).suffix.lower()
     if suffix in {".png", ".jpg", ".jpeg", ".tiff", ".bmp"}:
         return "image_ocr"
     if suffix == ".pdf":
@@ -115,44 +575,88 @@ def detect_input_mode(path: Path) -> str:
     return "unknown"
 
 
-def detect_document_profile(file_path: str, text: str) -> Dict[str, Any]:
-    path = Path(file_path)
-    ext = path.suffix.lower().lstrip(".")
+def detect_document_profile(file_path: "str | DocumentSource", text: str, extraction: Dict[str, Any] | None = None) -> Dict[str, Any]:
+    source = file_path if isinstance(file_path, DocumentSource) else DocumentSource.from_path(file_path)
+    ext = source.suffix.lstrip(".")
     token_count = len([t for t in text.split() if t.strip()])
     looks_scanned = ext in {"png", "jpg", "jpeg", "tiff", "bmp"}
+    ocr_pages = (extraction or {}).get("ocr_pages", [])
     return {
         "file_extension": ext or "unknown",
-        "input_mode": detect_input_mode(path),
-        "file_size_bytes": path.stat().st_size,
+        "input_mode": detect_input_mode(source),
+        "file_size_bytes": source.size,
         "text_length": len(text),
         "token_estimate": token_count,
-        "ocr_used": looks_scanned,
+        "ocr_used": looks_scanned or any(p.get("chars") for p in ocr_pages),
+        "page_count": (extraction or {}).get("page_count"),
+        "ocr_pages": [p["page"] for p in ocr_pages],
+        "ocr_page_timings": ocr_pages,
+        "ocr_total_ms": round(sum(p.get("ms", 0.0) for p in ocr_pages), 1),
     }
 
 
-def extract_document_text(file_path: str) -> str:
-    path = Path(file_path)
-    if not path.exists():
-        raise FileNotFoundError(f"File not found: {file_path}")
+def _ensure_sufficient_text(text: str) -> str:
+    if not text or len(text.strip()) < 20:
+        raise ValueError("Insufficient text extracted; OCR/source quality issue")
+    return text
+
+
+def extract_document_text(file_path: "str | DocumentSource", max_chars: int | None = None, max_pages: int | None = None) -> str:
+    source = file_path if isinstance(file_path, DocumentSource) else DocumentSource.from_path(file_path)
 
-    suffix = path.suffix.lower()
-    if suffix == ".pdf":
-        text = extract_text_from_pdf(path)
+    suffix = source.suffix
+    if suffix == ".pdf" and (max_chars is not None or max_pages is not None):
+        text = extract_pdf_text_budget(source, max_chars=max_chars, max_pages=max_pages)["text"]
+    elif suffix == ".pdf":
+        text = extract_text_from_pdf(source)
     elif suffix in {".png", ".jpg", ".jpeg", ".tiff", ".bmp"}:
-        text = extract_text_from_image(path)
+        text = extract_text_from_image(source)
     elif suffix == ".docx":
-        text = extract_text_from_docx(path)
+        text = extract_text_from_docx(source)
     elif suffix in {".csv", ".xlsx"}:
-        text = extract_text_from_tabular(path)
+        text = extract_text_from_tabular(source, suffix=suffix)
     elif suffix in {".txt", ".md"}:
-        text = path.read_text(encoding="utf-8", errors="ignore")
+        with source.open() as handle:
+            text = handle.read().decode("utf-8", errors="ignore")
     else:
         raise ValueError("Unsupported document type")
 
-    if not text or len(text.strip()) < 20:
-        raise ValueError("Insufficient text extracted; OCR/source quality issue")
+    return _ensure_sufficient_text(text)
 
-    return text
+
+def extraction_cache_key(source: DocumentSource) -> str:
+    settings = {
+        "version": EXTRACTOR_VERSION,
+        "suffix": source.suffix,
+        "pdf_engine": PDF_ENGINE,
+        "pdf_min_char_density": PDF_MIN_CHAR_DENSITY,
+        "ocr": [OCR_ENABLED, OCR_RESOLUTION],
+        "limits": [TABULAR_MAX_ROWS, DOCX_MAX_CHARS],
+    }
+    material = source.content_hash() + json.dumps(settings, sort_keys=True)
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+
+def open_document_text(file_path: "str | DocumentSource", prefix_chars: int = 0, use_cache: bool = True):
+    # PDFs parse lazily: prefix consumers (classification) only pay for the first pages.
+    source = file_path if isinstance(file_path, DocumentSource) else DocumentSource.from_path(file_path)
+
+    key = extraction_cache_key(source) if use_cache and EXTRACTION_CACHE.enabled else None
+    if EXTRACTION_CACHE.enabled and not use_cache:
+        EXTRACTION_CACHE.note_bypass()
+    if key:
+        cached = EXTRACTION_CACHE.get(key)
+        if cached is not None:
+            return ExtractedText(cached["text"], source, meta=cached["meta"], profile=cached["profile"], cache_hit=True)
+
+    if source.suffix == ".pdf":
+        document = LazyPdfText(source, prefix_chars=prefix_chars)
+    else:
+        # Office/tabular/image parsing is pure-Python CPU work; plain text is cheaper to read inline.
+        text = extract_document_text(source) if source.suffix in {".txt", ".md"} else offload_cpu(extract_document_text, source)
+        document = ExtractedText(text, source)
+    document.cache_key = key
+    return document
 
 
 def normalize_output(raw: Dict[str, Any]) -> Dict[str, Any]:
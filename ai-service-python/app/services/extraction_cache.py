@@ -0,0 +1,28 @@
+import hashlib
+from pathlib import Path
+
+from app.core.config import (
+    EXTRACTION_CACHE_ENABLED,
+    EXTRACTION_CACHE_MAX_MB,
+    EXTRACTION_CACHE_MEMORY_ITEMS,
+    EXTRACTION_CACHE_PATH,
+    EXTRACTION_CACHE_TTL_SEC,
+)
+from app.services.tiered_cache import TieredCache
+
+
+def file_sha256(path: Path, chunk_size: int = 1024 * 1024) -> str:
+    digest = hashlib.sha256()
+    with path.open("rb") as handle:
+        for block in iter(lambda: handle.read(chunk_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+EXTRACTION_CACHE = TieredCache(
+    path=EXTRACTION_CACHE_PATH,
+    memory_items=EXTRACTION_CACHE_MEMORY_ITEMS,
+    ttl_sec=EXTRACTION_CACHE_TTL_SEC,
+    max_bytes=int(EXTRACTION_CACHE_MAX_MB * 1024 * 1024),
+    enabled=EXTRACTION_CACHE_ENABLED,
+)
@@ -0,0 +1,88 @@
+from typing import Any, Dict
+
+import numpy as np
+
+TREE_LEAF = -1
+
+
+class CompiledForest:
+    # A fitted RandomForestClassifier flattened into contiguous node arrays. All trees advance
+    # together one level per step, so a single row costs ~max_depth small numpy ops instead of
+    # sklearn's per-call validation plus per-tree dispatch.
+    def __init__(self, feature, threshold, left, right, leaf_proba, roots, max_depth, n_features, feature_importances):
+        self.feature = feature.astype(np.intp)
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        # children[2 * node + went_left]: one gather per level instead of two plus a select.
+        self.children = np.stack([right, left], axis=1).ravel().astype(np.intp)
+        self.leaf_proba = leaf_proba
+        self.roots = roots.astype(np.intp)
+        self.max_depth = max_depth
+        self.n_features = n_features
+        self.n_trees = len(roots)
+        self.feature_importances_ = feature_importances
+
+    @classmethod
+    def from_sklearn(cls, forest) -> "CompiledForest":
+        features, thresholds, lefts, rights, probas, roots = [], [], [], [], [], []
+        offset = 0
+        max_depth = 0
+        for estimator in forest.estimators_:
+            tree = estimator.tree_
+            count = tree.node_count
+            is_leaf = tree.children_left == TREE_LEAF
+            # Leaves point at themselves, so traversal can run a fixed number of steps without branching.
+            own = np.arange(offset, offset + count, dtype=np.int32)
+            lefts.append(np.where(is_leaf, own, tree.children_left + offset).astype(np.int32))
+            rights.append(np.where(is_leaf, own, tree.children_right + offset).astype(np.int32))
+            features.append(np.where(is_leaf, 0, tree.feature).astype(np.int32))
+            thresholds.append(tree.threshold.astype(np.float64))
+            # sklearn>=1.4 stores classifier leaf values as class fractions; predict_proba returns them as-is.
+            probas.append(tree.value[:, 0, 1].astype(np.float64))
+            roots.append(offset)
+            offset += count
+            max_depth = max(max_depth, tree.max_depth)
+
+        return cls(
+            feature=np.concatenate(features),
+            threshold=np.concatenate(thresholds),
+            left=np.concatenate(lefts),
+            right=np.concatenate(rights),
+            leaf_proba=np.concatenate(probas),
+            roots=np.asarray(roots, dtype=np.int32),
+            max_depth=max_depth,
+            n_features=forest.n_features_in_,
+            feature_importances=np.asarray(forest.feature_importances_, dtype=np.float64),
+        )
+
+    def predict_positive(self, X) -> np.ndarray:
+        # sklearn trees compare float32 inputs against float64 thresholds; mirror that exactly.
+        X = np.asarray(X, dtype=np.float32).astype(np.float64)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        n = X.shape[0]
+        # Feature-major flat copy so each level's lookups are a single 1-D gather.
+        flat = X.T.ravel()
+        rows = np.arange(n, dtype=np.intp)[:, None]
+        nodes = np.broadcast_to(self.roots, (n, self.n_trees)).copy()
+        for _ in range(self.max_depth):
+            went_left = flat[self.feature[nodes] * n + rows] <= self.threshold[nodes]
+            nodes = self.children[nodes * 2 + went_left]
+        # cumsum adds tree by tree, matching sklearn's sequential accumulation bit for bit.
+        return np.cumsum(self.leaf_proba[nodes], axis=1)[:, -1] / self.n_trees
+
+    def predict_proba(self, X) -> np.ndarray:
+        positive = self.predict_positive(X)
+        return np.column_stack([1.0 - positive, positive])
+
+
+def validate_against_sklearn(forest, compiled: CompiledForest, X) -> Dict[str, Any]:
+    expected = forest.predict_proba(X)[:, 1]
+    actual = compiled.predict_positive(X)
+    diff = np.abs(expected - actual)
+    return {
+        "rows": int(len(expected)),
+        "max_abs_diff": float(diff.max()) if len(diff) else 0.0,
+        "exact_matches": int((diff == 0.0).sum()),
+    }
@@ -0,0 +1,144 @@
+import base64
+import binascii
+import hashlib
+import os
+import tempfile
+import zipfile
+from pathlib import Path
+from typing import List
+
+from fastapi import UploadFile
+
+from app.core.config import INGEST_CHUNK_KB, INGEST_MEMORY_MAX_MB, INGEST_SPILL_DIR
+from app.services.extract_service import DocumentSource
+from app.services.stage_executor import run_blocking
+
+CHUNK_BYTES = max(4096, INGEST_CHUNK_KB * 1024)
+MEMORY_MAX_BYTES = int(INGEST_MEMORY_MAX_MB * 1024 * 1024)
+
+
+def _suffix(name: str) -> str:
+    return Path(name or "").suffix.lower() or ".pdf"
+
+
+class _SourceWriter:
+    # Hashes while buffering; documents under the memory cap never touch disk, larger ones
+    # spill once to a single file that the returned source owns and removes on close().
+    def __init__(self, name: str):
+        self.name = name
+        self.digest = hashlib.sha256()
+        self.chunks = []
+        self.size = 0
+        self.spill_path = None
+        self._spill = None
+
+    def write(self, block: bytes):
+        if not block:
+            return
+        self.digest.update(block)
+        self.size += len(block)
+        if self._spill is None and self.size > MEMORY_MAX_BYTES:
+            fd, self.spill_path = tempfile.mkstemp(prefix="riskiq-ingest-", suffix=_suffix(self.name), dir=INGEST_SPILL_DIR)
+            self._spill = os.fdopen(fd, "wb")
+            for buffered in self.chunks:
+                self._spill.write(buffered)
+            self.chunks = []
+        if self._spill is not None:
+            self._spill.write(block)
+        else:
+            self.chunks.append(block)
+
+    def finish(self) -> DocumentSource:
+        content_hash = self.digest.hexdigest()
+        if self._spill is not None:
+            self._spill.close()
+            return DocumentSource(self.name, path=self.spill_path, content_hash=content_hash, owns_path=True)
+        data = self.chunks[0] if len(self.chunks) == 1 else b"".join(self.chunks)
+        self.chunks = []
+        return DocumentSource(self.name, data=data, content_hash=content_hash)
+
+    def abort(self):
+        if self._spill is not None:
+            self._spill.close()
+            try:
+                os.remove(self.spill_path)
+            except OSError:
+                pass
+        self.chunks = []
+
+
+def _copy_upload(spooled, name: str) -> DocumentSource:
+    # Starlette has already spooled the upload (to an anonymous temp file past 1 MB). Parser worker
+    # processes need a real path, so large uploads are copied once into a named spill file that the
+    # source owns; this runs off the event loop so the copy never blocks other requests.
+    writer = _SourceWriter(name)
+    try:
+        spooled.seek(0)
+        for block in iter(lambda: spooled.read(CHUNK_BYTES), b""):
+            writer.write(block)
+        return writer.finish()
+    except Exception:
+        writer.abort()
+        raise
+
+
+async def ingest_upload(file: UploadFile, name: str = "") -> DocumentSource:
+    name = name or file.filename or "document.pdf"
+    return await run_blocking(_copy_upload, file.file, name)
+
+
+def ingest_zip(archive: DocumentSource, max_members: int, max_total_bytes: int) -> List[DocumentSource]:
+    # Expands a packet into one source per file. Limits are checked against the sizes actually
+    # read, not the (forgeable) sizes in the zip directory.
+    sources: List[DocumentSource] = []
+    total = 0
+    try:
+        with zipfile.ZipFile(archive.open()) as zf:
+            for info in zf.infolist():
+                base = os.path.basename(info.filename)
+                if info.is_dir() or not base or base.startswith(".") or info.filename.startswith("__MACOSX/"):
+                    continue
+                if len(sources) >= max_members:
+                    raise ValueError(f"archive has more than {max_members} documents")
+                writer = _SourceWriter(base)
+                try:
+                    with zf.open(info) as member:
+                        while True:
+                            block = member.read(CHUNK_BYTES)
+                            if not block:
+                                break
+                            total += len(block)
+                            if total > max_total_bytes:
+                                raise ValueError(f"archive expands beyond {max_total_bytes // (1024 * 1024)} MB")
+                            writer.write(block)
+                except Exception:
+                    writer.abort()
+                    raise
+                sources.append(writer.finish())
+    except zipfile.BadZipFile as exc:
+        for source in sources:
+            source.close()
+        raise ValueError(f"invalid zip archive: {exc}") from exc
+    except Exception:
+        for source in sources:
+            source.close()
+        raise
+    return sources
+
+
+def ingest_base64(encoded: str, name: str = "") -> DocumentSource:
+    writer = _SourceWriter(name or "document.pdf")
+    # Decode in 4-char aligned slices so a large payload is never held twice as bytes.
+    step = max(4, (CHUNK_BYTES // 3) * 4)
+    try:
+        # Aligned slicing needs the payload without line breaks (MIME-style base64 wraps at 76 chars).
+        compact = "".join(encoded.split()) if any(ws in encoded for ws in ("\n", "\r", " ", "\t")) else encoded
+        for start in range(0, len(compact), step):
+            writer.write(base64.b64decode(compact[start:start + step], validate=False))
+        return writer.finish()
+    except (binascii.Error, ValueError) as exc:
+        writer.abort()
+        raise ValueError(f"invalid file_b64 payload: {exc}") from exc
+    except Exception:
+        writer.abort()
+        raise
@@ -0,0 +1,47 @@
+from typing import Any, Dict
+
+import numpy as np
+
+
+class CompiledLogistic:
+    # StandardScaler + binary LogisticRegression evaluated with a fixed, row-independent summation
+    # order. sklearn's BLAS dot picks different kernels for 1 row vs N rows, so the same document
+    # could score differently in the last bit depending on batch size; this keeps both identical.
+    def __init__(self, mean, scale, coef, intercept):
+        self.mean = np.asarray(mean, dtype=np.float64)
+        self.scale = np.asarray(scale, dtype=np.float64)
+        self.coef = np.asarray(coef, dtype=np.float64)
+        self.intercept = float(intercept)
+
+    @classmethod
+    def from_pipeline(cls, pipeline) -> "CompiledLogistic":
+        scaler = pipeline.named_steps["scaler"]
+        clf = pipeline.named_steps["clf"]
+        if clf.coef_.shape[0] != 1:
+            raise ValueError("CompiledLogistic supports binary LogisticRegression only")
+        mean = scaler.mean_ if scaler.with_mean else np.zeros_like(clf.coef_[0])
+        scale = scaler.scale_ if scaler.with_std else np.ones_like(clf.coef_[0])
+        return cls(mean, scale, clf.coef_[0], clf.intercept_[0])
+
+    def predict_positive(self, X) -> np.ndarray:
+        X = np.asarray(X, dtype=np.float64)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        Z = (X - self.mean) / self.scale
+        decision = Z[:, 0] * self.coef[0]
+        for k in range(1, len(self.coef)):
+            decision = decision + Z[:, k] * self.coef[k]
+        # numpy-only sigmoid; the clip keeps exp(-z) finite so extreme inputs do not raise overflow warnings.
+        z = np.clip(decision + self.intercept, -500.0, 500.0)
+        return 1.0 / (1.0 + np.exp(-z))
+
+
+def validate_against_pipeline(pipeline, compiled: CompiledLogistic, X) -> Dict[str, Any]:
+    expected = pipeline.predict_proba(X)[:, 1]
+    actual = compiled.predict_positive(X)
+    diff = np.abs(expected - actual)
+    return {
+        "rows": int(len(expected)),
+        "max_abs_diff": float(diff.max()) if len(diff) else 0.0,
+        "exact_matches": int((diff == 0.0).sum()),
+    }
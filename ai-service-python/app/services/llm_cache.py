@@ -0,0 +1,25 @@
+import hashlib
+import json
+
+from app.core.config import (
+    LLM_CACHE_ENABLED,
+    LLM_CACHE_MAX_MB,
+    LLM_CACHE_MEMORY_ITEMS,
+    LLM_CACHE_PATH,
+    LLM_CACHE_TTL_SEC,
+)
+from app.services.tiered_cache import TieredCache
+
+
+def cache_key(model: str, system_prompt: str, user_prompt: str, temperature: float) -> str:
+    material = json.dumps([model, system_prompt, user_prompt, float(temperature)], ensure_ascii=False)
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+
+LLM_CACHE = TieredCache(
+    path=LLM_CACHE_PATH,
+    memory_items=LLM_CACHE_MEMORY_ITEMS,
+    ttl_sec=LLM_CACHE_TTL_SEC,
+    max_bytes=int(LLM_CACHE_MAX_MB * 1024 * 1024),
+    enabled=LLM_CACHE_ENABLED,
+)
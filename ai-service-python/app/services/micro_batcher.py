@@ -0,0 +1,134 @@
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, List
+
+import numpy as np
+
+BATCH_SIZE_BUCKETS = [1, 2, 4, 8, 16, 32, 64, 128, 256]
+
+
+class MicroBatcher:
+    # Coalesces concurrent single-item calls into one batched call. A batch is cut when it is
+    # full or `window_ms` after its first item arrived; while all `max_in_flight` batches are
+    # busy, new items keep queueing, so batches grow with load instead of adding latency when idle.
+    def __init__(
+        self,
+        name: str,
+        dispatch: Callable[[List[Any]], Future],
+        max_batch: int = 64,
+        window_ms: float = 2.0,
+        max_in_flight: int = 1,
+    ):
+        self.name = name
+        self.dispatch = dispatch
+        self.max_batch = max(1, max_batch)
+        self.window_sec = max(0.0, window_ms) / 1000.0
+        self.max_in_flight = max(1, max_in_flight)
+        self._queue: deque = deque()
+        self._cond = threading.Condition()
+        self._slots = threading.BoundedSemaphore(self.max_in_flight)
+        self._thread = None
+        self._stats_lock = threading.Lock()
+        self._waits_ms: deque = deque(maxlen=2048)
+        self._run_ms: deque = deque(maxlen=512)
+        self._sizes = {bucket: 0 for bucket in BATCH_SIZE_BUCKETS}
+        self._counts = {"items": 0, "batches": 0, "flush_full": 0, "flush_window": 0, "failed_batches": 0}
+
+    def _ensure_thread(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name=f"microbatch-{self.name}", daemon=True)
+            self._thread.start()
+
+    def submit(self, item: Any) -> Future:
+        future: Future = Future()
+        with self._cond:
+            self._ensure_thread()
+            self._queue.append((item, future, time.perf_counter()))
+            self._cond.notify()
+        return future
+
+    def __call__(self, item: Any) -> Any:
+        return self.submit(item).result()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._queue:
+                    self._cond.wait()
+            # Hold a worker slot before cutting the batch so a busy backend lets the batch grow.
+            self._slots.acquire()
+            with self._cond:
+                deadline = self._queue[0][2] + self.window_sec
+                while len(self._queue) < self.max_batch:
+                    remaining = deadline - time.perf_counter()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                batch = [self._queue.popleft() for _ in range(min(self.max_batch, len(self._queue)))]
+            self._dispatch(batch)
+
+    def _dispatch(self, batch):
+        dispatched_at = time.perf_counter()
+        self._record_batch(batch, dispatched_at)
+        futures = [future for _, future, _ in batch]
+        try:
+            result = self.dispatch([item for item, _, _ in batch])
+        except BaseException as exc:
+            self._finish(futures, None, exc, dispatched_at)
+            return
+        result.add_done_callback(lambda done: self._finish(futures, done, None, dispatched_at))
+
+    def _finish(self, futures: List[Future], done, error, dispatched_at: float):
+        self._slots.release()
+        with self._stats_lock:
+            self._run_ms.append((time.perf_counter() - dispatched_at) * 1000)
+        if error is None:
+            error = done.exception()
+        if error is None:
+            results = done.result()
+            if len(results) != len(futures):
+                error = RuntimeError(f"{self.name} batch returned {len(results)} results for {len(futures)} items")
+        if error is not None:
+            with self._stats_lock:
+                self._counts["failed_batches"] += 1
+            for future in futures:
+                future.set_exception(error)
+            return
+        for future, value in zip(futures, results):
+            future.set_result(value)
+
+    def _record_batch(self, batch, dispatched_at: float):
+        size = len(batch)
+        bucket = next((b for b in BATCH_SIZE_BUCKETS if size <= b), BATCH_SIZE_BUCKETS[-1])
+        with self._stats_lock:
+            self._counts["items"] += size
+            self._counts["batches"] += 1
+            self._counts["flush_full" if size >= self.max_batch else "flush_window"] += 1
+            self._sizes[bucket] += 1
+            self._waits_ms.extend((dispatched_at - enqueued_at) * 1000 for _, _, enqueued_at in batch)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._stats_lock:
+            counts = dict(self._counts)
+            sizes = {f"<={bucket}": count for bucket, count in self._sizes.items()}
+            waits = np.asarray(self._waits_ms, dtype=float)
+            runs = np.asarray(self._run_ms, dtype=float)
+        with self._cond:
+            queued = len(self._queue)
+
+        def _pct(values, q):
+            return round(float(np.percentile(values, q)), 3) if len(values) else None
+
+        return {
+            **counts,
+            "queued": queued,
+            "max_batch": self.max_batch,
+            "window_ms": round(self.window_sec * 1000, 3),
+            "max_in_flight": self.max_in_flight,
+            "avg_batch_size": round(counts["items"] / counts["batches"], 2) if counts["batches"] else 0.0,
+            "batch_size_histogram": sizes,
+            "queue_wait_ms": {"p50": _pct(waits, 50), "p99": _pct(waits, 99), "max": _pct(waits, 100)},
+            "batch_run_ms": {"p50": _pct(runs, 50), "p99": _pct(runs, 99)},
+        }
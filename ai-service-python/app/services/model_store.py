@@ -0,0 +1,255 @@
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from pathlib import Path
+from typing import Any, Dict, List
+
+import joblib
+import numpy as np
+
+from app.core.config import (
+    MODEL_ARTIFACT_DIR,
+    MODEL_CACHE_VERSIONS,
+    MODEL_REGISTRY_POLL_SEC,
+    MODEL_TRAIN_IF_MISSING,
+    MODEL_VERSION,
+    RF_COMPILED_INFERENCE,
+)
+from app.services.forest_inference import CompiledForest, validate_against_sklearn
+from app.services.linear_inference import CompiledLogistic, validate_against_pipeline
+from app.services.model_training import (
+    ARTIFACT_FILE,
+    FEATURE_NAMES,
+    MANIFEST_FILE,
+    MODEL_NAME,
+    REGISTRY_FILE,
+    _build_training_data,
+    _sha256,
+    main,
+    resolve_version,
+    train_and_save,
+)
+
+
+def load_models(version: str, root: str | Path = MODEL_ARTIFACT_DIR) -> Dict[str, Any]:
+    # Versions come from API callers now; keep them to a single directory name under root.
+    if not version or Path(version).name != version or version.startswith("."):
+        raise ValueError(f"Invalid model version: {version!r}")
+    folder = Path(root) / version
+    manifest_path = folder / MANIFEST_FILE
+    artifact = folder / ARTIFACT_FILE
+    if not manifest_path.exists() or not artifact.exists():
+        raise FileNotFoundError(f"Model artifact not found: {folder}")
+    manifest = json.loads(manifest_path.read_text(encoding="utf-8"))
+    sha = _sha256(artifact)
+    if sha != manifest.get("sha256"):
+        raise ValueError(f"Model artifact {version} failed integrity check (sha256 {sha[:12]} != {str(manifest.get('sha256'))[:12]})")
+    started = time.perf_counter()
+    payload = joblib.load(artifact, mmap_mode="r")
+    fraud_engine, fraud_validation = compile_fraud_model(payload["fraud_model"]) if RF_COMPILED_INFERENCE else (None, None)
+    risk_engine, risk_validation = compile_risk_model(payload["risk_model"])
+    return {
+        "risk_model": payload["risk_model"],
+        "fraud_model": payload["fraud_model"],
+        "risk_engine": risk_engine,
+        "fraud_engine": fraud_engine,
+        "engine_validation": {"risk": risk_validation, "fraud": fraud_validation},
+        "manifest": manifest,
+        "load_sec": round(time.perf_counter() - started, 3),
+    }
+
+
+def compile_fraud_model(fraud_model):
+    # Only serve from the flattened forest if it reproduces predict_proba exactly on a probe set.
+    engine = CompiledForest.from_sklearn(fraud_model)
+    probe = _build_training_data(seed=2024, n=1024)[0]
+    validation = validate_against_sklearn(fraud_model, engine, probe)
+    validation["accepted"] = validation["exact_matches"] == validation["rows"]
+    return (engine if validation["accepted"] else None), validation
+
+
+def compile_risk_model(risk_model):
+    # Fixed summation order differs from BLAS in the last ulp at most; anything larger means a model we can't mirror.
+    try:
+        engine = CompiledLogistic.from_pipeline(risk_model)
+    except (AttributeError, KeyError, ValueError) as exc:
+        return None, {"accepted": False, "error": str(exc)}
+    validation = validate_against_pipeline(risk_model, engine, _build_training_data(seed=2024, n=1024)[0])
+    validation["accepted"] = validation["max_abs_diff"] <= 1e-12
+    return (engine if validation["accepted"] else None), validation
+
+
+class ModelRegistry:
+    # Active/shadow pointers live in registry.json next to the artifacts, so every API process
+    # (and a restart) sees the same choice. Loaded versions are cached per process; swapping the
+    # active version is a single pointer write, and in-flight batches finish on the version they started with.
+    def __init__(self, root: str | Path = MODEL_ARTIFACT_DIR, cache_versions: int = 3, poll_sec: float = 5.0):
+        self.root = Path(root)
+        self.cache_versions = max(1, cache_versions)
+        self.poll_sec = poll_sec
+        self._cache: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._loading: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self._train_lock = threading.Lock()
+        self._state = {"active": None, "shadow": None, "shadow_sample_rate": 1.0}
+        self._state_mtime = None
+        self._checked_at = 0.0
+
+    @property
+    def _state_path(self) -> Path:
+        return self.root / REGISTRY_FILE
+
+    def _refresh(self, force: bool = False):
+        now = time.monotonic()
+        if not force and now - self._checked_at < self.poll_sec:
+            return
+        self._checked_at = now
+        try:
+            mtime = self._state_path.stat().st_mtime_ns
+        except FileNotFoundError:
+            return
+        if mtime != self._state_mtime:
+            try:
+                state = json.loads(self._state_path.read_text(encoding="utf-8"))
+            except (OSError, ValueError):
+                return
+            self._state.update({key: state.get(key, self._state[key]) for key in self._state})
+            self._state_mtime = mtime
+
+    def _write_state(self):
+        self.root.mkdir(parents=True, exist_ok=True)
+        tmp = self.root / f".{REGISTRY_FILE}.{os.getpid()}.tmp"
+        tmp.write_text(json.dumps(self._state, indent=2), encoding="utf-8")
+        os.replace(tmp, self._state_path)
+        self._state_mtime = self._state_path.stat().st_mtime_ns
+
+    def _pointed_version(self) -> str | None:
+        with self._lock:
+            self._refresh()
+            version = self._state["active"] or resolve_version(self.root, MODEL_VERSION)
+        return version if version is not None and (self.root / version).exists() else None
+
+    def active_version(self, train_if_missing: bool = MODEL_TRAIN_IF_MISSING) -> str:
+        version = self._pointed_version()
+        if version is None:
+            if not train_if_missing:
+                raise FileNotFoundError(f"No model artifact in {self.root}; run `python -m app.services.model_training train`")
+            # One trainer per process; callers that queued behind it pick up its artifact.
+            with self._train_lock:
+                version = self._pointed_version() or train_and_save(root=self.root)["version"]
+        return version
+
+    def shadow(self) -> tuple[str | None, float]:
+        with self._lock:
+            self._refresh()
+            return self._state["shadow"], float(self._state["shadow_sample_rate"])
+
+    def get(self, version: str | None = None) -> Dict[str, Any]:
+        version = version or self.active_version()
+        with self._lock:
+            models = self._cache.get(version)
+            if models is not None:
+                self._cache.move_to_end(version)
+                return models
+            pending = self._loading.get(version)
+            owner = pending is None
+            if owner:
+                pending = self._loading[version] = Future()
+        if not owner:
+            return pending.result()
+        # Loading and compiling take seconds; the lock only covers publishing, so active/shadow
+        # lookups (and the scoring batcher) never queue behind a load. Concurrent callers for the
+        # same version share this one load.
+        try:
+            models = load_models(version, root=self.root)
+        except BaseException as exc:
+            with self._lock:
+                del self._loading[version]
+            pending.set_exception(exc)
+            raise
+        with self._lock:
+            self._cache[version] = models
+            while len(self._cache) > self.cache_versions:
+                self._cache.popitem(last=False)
+            del self._loading[version]
+        pending.set_result(models)
+        return models
+
+    def activate(self, version: str) -> Dict[str, Any]:
+        # Load (and integrity-check) before publishing, so a bad artifact never becomes active.
+        version = resolve_version(self.root, version)
+        if version is None:
+            raise FileNotFoundError(f"No LATEST model in {self.root}")
+        models = self.get(version)
+        with self._lock:
+            self._refresh(force=True)
+            previous = self._state["active"]
+            self._state["active"] = version
+            if self._state["shadow"] == version:
+                self._state["shadow"] = None
+            self._write_state()
+        return {"active": version, "previous": previous, "manifest": models["manifest"]}
+
+    def set_shadow(self, version: str | None, sample_rate: float = 1.0) -> Dict[str, Any]:
+        if version:
+            self.get(version)
+        with self._lock:
+            self._refresh(force=True)
+            self._state["shadow"] = version or None
+            self._state["shadow_sample_rate"] = min(1.0, max(0.0, float(sample_rate)))
+            self._write_state()
+            return dict(self._state)
+
+    def versions(self) -> List[Dict[str, Any]]:
+        found = []
+        if self.root.exists():
+            for manifest_path in sorted(self.root.glob(f"*/{MANIFEST_FILE}")):
+                try:
+                    found.append(json.loads(manifest_path.read_text(encoding="utf-8")))
+                except (OSError, ValueError):
+                    continue
+        return sorted(found, key=lambda m: m.get("created_at", ""))
+
+    def describe(self) -> Dict[str, Any]:
+        active = self.active_version()
+        shadow, sample_rate = self.shadow()
+        with self._lock:
+            loaded = list(self._cache)
+        return {
+            "active": active,
+            "shadow": shadow,
+            "shadow_sample_rate": sample_rate,
+            "loaded_in_process": loaded,
+            "versions": self.versions(),
+        }
+
+
+REGISTRY = ModelRegistry(cache_versions=MODEL_CACHE_VERSIONS, poll_sec=MODEL_REGISTRY_POLL_SEC)
+
+
+def get_models(version: str | None = None) -> Dict[str, Any]:
+    return REGISTRY.get(version)
+
+
+def warm_up(version: str | None = None) -> Dict[str, Any]:
+    models = get_models(version)
+    # One throwaway prediction so lazily-built estimator internals are ready before real traffic.
+    sample = np.zeros((1, len(FEATURE_NAMES)), dtype=float)
+    models["risk_model"].predict_proba(sample)
+    models["fraud_model"].predict_proba(sample)
+    for engine in (models["risk_engine"], models["fraud_engine"]):
+        if engine is not None:
+            engine.predict_positive(sample)
+    return {
+        "pid": os.getpid(),
+        "version": models["manifest"]["version"],
+        "load_sec": models["load_sec"],
+        "compiled_rf": models["fraud_engine"] is not None,
+    }
+
+
+if __name__ == "__main__":
+    main()
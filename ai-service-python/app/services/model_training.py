@@ -0,0 +1,179 @@
+import argparse
+import hashlib
+import json
+import os
+import time
+from pathlib import Path
+from typing import Any, Dict
+
+import joblib
+import numpy as np
+import sklearn
+from dotenv import load_dotenv
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.linear_model import LogisticRegression
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import StandardScaler
+
+# Fitting and publishing artifacts must work in a docker build, where the service's runtime env
+# (API key, port, ...) is absent, so this module reads its one setting directly instead of
+# importing app.core.config.
+load_dotenv()
+DEFAULT_ARTIFACT_DIR = os.getenv("MODEL_ARTIFACT_DIR", "../models/decision")
+
+MODEL_NAME = "LogReg+RandomForest-v3"
+FEATURE_NAMES = ["loan_amount_log", "interest_rate", "risk_indicators", "violations", "clauses_count"]
+ARTIFACT_FILE = "models.joblib"
+MANIFEST_FILE = "manifest.json"
+REGISTRY_FILE = "registry.json"
+
+
+def _build_training_data(seed: int = 42, n: int = 600):
+    rng = np.random.default_rng(seed)
+
+    loan_amount = rng.uniform(3000, 1_000_000_000, n)
+    interest_rate = rng.uniform(3.5, 30, n)
+    risk_indicators = rng.integers(0, 6, n)
+    violations = rng.integers(0, 5, n)
+    clauses_count = rng.integers(0, 10, n)
+
+    loan_amount_log = np.log10(np.maximum(loan_amount, 1.0))
+    X = np.column_stack([loan_amount_log, interest_rate, risk_indicators, violations, clauses_count])
+
+    base_risk = (
+        0.22 * ((loan_amount_log - np.log10(3000)) / (np.log10(1_000_000_000) - np.log10(3000)))
+        + 0.28 * ((interest_rate - 3.5) / (30 - 3.5))
+        + 0.20 * (risk_indicators / 5)
+        + 0.26 * (violations / 4)
+        - 0.12 * (clauses_count / 9)
+    )
+
+    fraud_signal = (
+        0.18 * ((loan_amount_log - np.log10(3000)) / (np.log10(1_000_000_000) - np.log10(3000)))
+        + 0.34 * (risk_indicators / 5)
+        + 0.34 * (violations / 4)
+        - 0.15 * (clauses_count / 9)
+    )
+
+    y_risk = (base_risk + rng.normal(0, 0.08, n) > 0.52).astype(int)
+    y_fraud = (fraud_signal + rng.normal(0, 0.09, n) > 0.58).astype(int)
+
+    return X, y_risk, y_fraud
+
+
+def build_models(seed: int = 42, n: int = 600):
+    X, y_risk, y_fraud = _build_training_data(seed=seed, n=n)
+
+    risk_model = Pipeline(
+        steps=[
+            ("scaler", StandardScaler()),
+            ("clf", LogisticRegression(max_iter=1000, class_weight="balanced")),
+        ]
+    )
+    risk_model.fit(X, y_risk)
+
+    fraud_model = RandomForestClassifier(
+        n_estimators=250,
+        max_depth=8,
+        min_samples_leaf=3,
+        class_weight="balanced_subsample",
+        random_state=7,
+    )
+    fraud_model.fit(X, y_fraud)
+
+    return risk_model, fraud_model
+
+
+def _sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with path.open("rb") as handle:
+        for block in iter(lambda: handle.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def save_models(
+    risk_model,
+    fraud_model,
+    root: str | Path = DEFAULT_ARTIFACT_DIR,
+    training: Dict[str, Any] | None = None,
+    name: str = MODEL_NAME,
+    tag: str = "v3",
+) -> Dict[str, Any]:
+    # Versions are content-addressed: the same fitted models always land in the same directory.
+    root = Path(root)
+    root.mkdir(parents=True, exist_ok=True)
+    staging = root / f".staging-{os.getpid()}-{time.time_ns()}"
+    staging.mkdir()
+    artifact = staging / ARTIFACT_FILE
+    # Uncompressed so numpy arrays inside the estimators can be memory-mapped on load.
+    joblib.dump({"risk_model": risk_model, "fraud_model": fraud_model}, artifact, compress=0)
+    sha = _sha256(artifact)
+    version = f"{tag}-{sha[:12]}"
+    manifest = {
+        "name": name,
+        "version": version,
+        "sha256": sha,
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "sklearn_version": sklearn.__version__,
+        "numpy_version": np.__version__,
+        "feature_names": FEATURE_NAMES,
+        "training": training or {},
+    }
+    (staging / MANIFEST_FILE).write_text(json.dumps(manifest, indent=2), encoding="utf-8")
+
+    target = root / version
+    try:
+        staging.rename(target)
+    except OSError:
+        # Same content already published (possibly by a concurrent trainer).
+        for item in staging.iterdir():
+            item.unlink()
+        staging.rmdir()
+    (root / "LATEST").write_text(version, encoding="utf-8")
+    return manifest
+
+
+def train_and_save(
+    root: str | Path = DEFAULT_ARTIFACT_DIR, seed: int = 42, n: int = 600, name: str = MODEL_NAME, tag: str = "v3"
+) -> Dict[str, Any]:
+    started = time.perf_counter()
+    risk_model, fraud_model = build_models(seed=seed, n=n)
+    training = {"seed": seed, "rows": n, "fit_sec": round(time.perf_counter() - started, 3)}
+    return save_models(risk_model, fraud_model, root=root, training=training, name=name, tag=tag)
+
+
+def resolve_version(root: str | Path = DEFAULT_ARTIFACT_DIR, version: str = "latest") -> str | None:
+    root = Path(root)
+    if version and version != "latest":
+        return version
+    latest = root / "LATEST"
+    return latest.read_text(encoding="utf-8").strip() if latest.exists() else None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Train and persist RiskIQ decision models.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    train = sub.add_parser("train", help="fit models and write a versioned artifact")
+    train.add_argument("--out", default=DEFAULT_ARTIFACT_DIR)
+    train.add_argument("--seed", type=int, default=42)
+    train.add_argument("--rows", type=int, default=600)
+    train.add_argument("--name", default=MODEL_NAME, help="model name reported in decision responses")
+    train.add_argument("--tag", default="v3", help="version prefix; the suffix is the artifact hash")
+    show = sub.add_parser("show", help="print the manifest of a stored version")
+    show.add_argument("--root", default=DEFAULT_ARTIFACT_DIR)
+    show.add_argument("--version", default="latest")
+    args = parser.parse_args(argv)
+
+    if args.command == "train":
+        manifest = train_and_save(root=args.out, seed=args.seed, n=args.rows, name=args.name, tag=args.tag)
+    else:
+        version = resolve_version(args.root, args.version)
+        if version is None:
+            raise SystemExit(f"No model artifact in {args.root}")
+        manifest = json.loads((Path(args.root) / version / MANIFEST_FILE).read_text(encoding="utf-8"))
+    print(json.dumps(manifest, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,626 @@
+import hashlib
+import json
+import re
+import threading
+from bisect import bisect_right
+from collections import OrderedDict
+from itertools import chain
+from datetime import date, datetime, timedelta
+from operator import itemgetter
+from typing import Any, Dict, FrozenSet, Iterable, List
+
+import numpy as np
+
+from app.core.config import RULE_PLAN_CACHE_SIZE
+
+COUNT_REQUIREMENT = re.compile(r"^min_count_(\d+)$")
+MATCH_MODES = {"any", "all"}
+
+_NUMBER = re.compile(
+    r"(-?\d[\d,]*(?:\.\d+)?)(?:\s*(lakhs?|lacs?|crores?|cr|k|thousand|mn|million|bn|billion)\b)?",
+    re.IGNORECASE,
+)
+_MULTIPLIERS = {
+    "lakh": 1e5, "lakhs": 1e5, "lac": 1e5, "lacs": 1e5,
+    "crore": 1e7, "crores": 1e7, "cr": 1e7,
+    "k": 1e3, "thousand": 1e3,
+    "mn": 1e6, "million": 1e6,
+    "bn": 1e9, "billion": 1e9,
+}
+_MONTHS = {name: i for i, name in enumerate(["jan", "feb", "mar", "apr", "may", "jun", "jul", "aug", "sep", "oct", "nov", "dec"], start=1)}
+_DATE_PATTERNS = [
+    (re.compile(r"\b(\d{4})-(\d{1,2})-(\d{1,2})\b"), "ymd"),
+    # Day-first, as written in Indian loan documents.
+    (re.compile(r"\b(\d{1,2})[/.-](\d{1,2})[/.-](\d{4})\b"), "dmy"),
+    (re.compile(r"\b(\d{1,2})(?:st|nd|rd|th)?\s+([A-Za-z]{3,9})\.?,?\s+(\d{4})\b"), "d_mon_y"),
+    (re.compile(r"\b([A-Za-z]{3,9})\.?\s+(\d{1,2})(?:st|nd|rd|th)?,?\s+(\d{4})\b"), "mon_d_y"),
+]
+
+
+def content_hash(payload: Any) -> str:
+    # Canonical JSON, so key order and whitespace in what the client sent do not change the hash.
+    encoded = json.dumps(payload, sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=str)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()[:16]
+
+
+def rule_set_version(rules: List[Dict[str, Any]]) -> str:
+    return content_hash(rules)
+
+
+def parse_number(value) -> float | None:
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    match = _NUMBER.search(str(value))
+    if not match:
+        return None
+    number = float(match.group(1).replace(",", ""))
+    unit = (match.group(2) or "").lower()
+    return number * _MULTIPLIERS.get(unit, 1.0)
+
+
+def parse_date(value) -> date | None:
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    text = str(value)
+    for pattern, order in _DATE_PATTERNS:
+        for match in pattern.finditer(text):
+            a, b, c = match.groups()
+            if order == "ymd":
+                year, month, day = a, b, c
+            elif order == "dmy":
+                day, month, year = a, b, c
+            elif order == "d_mon_y":
+                day, month, year = a, _MONTHS.get(b[:3].lower()), c
+            else:
+                month, day, year = _MONTHS.get(a[:3].lower()), b, c
+            if month is None:
+                continue
+            try:
+                return date(int(year), int(month), int(day))
+            except ValueError:
+                continue
+    return None
+
+
+def _iso_date(rule: Dict[str, Any], key: str) -> date | None:
+    value = rule.get(key)
+    if value in (None, ""):
+        return None
+    try:
+        return date.fromisoformat(str(value))
+    except ValueError:
+        raise ValueError(f"Rule {rule.get('id')}: '{key}' must be an ISO date (YYYY-MM-DD), got {value!r}")
+
+
+def _match_mode(rule: Dict[str, Any], default: str) -> str:
+    mode = str(rule.get("match", default)).lower()
+    if mode not in MATCH_MODES:
+        raise ValueError(f"Rule {rule.get('id')}: 'match' must be one of {sorted(MATCH_MODES)}, got {mode!r}")
+    return mode
+
+
+def _holds(flags: List[bool], mode: str) -> bool:
+    # A rule over parsed values always needs at least one usable value.
+    return bool(flags) and (all(flags) if mode == "all" else any(flags))
+
+
+class CompiledRule:
+    # One rule with its requirement resolved to a kind plus parameters. Static parts of the
+    # violation payload are built here once instead of on every evaluation.
+    def __init__(self, index: int, rule: Dict[str, Any]):
+        self.index = index
+        self.rule = rule
+        self.id = rule.get("id")
+        self.field = rule.get("field")
+        self.requirement = rule.get("requirement")
+        self.severity = rule.get("severity", "MEDIUM")
+        self.threshold = 0
+        self.strict = False
+        self.mode = "any"
+        self.pattern = None
+        self.low = self.high = None
+        self.not_before = self.not_after = None
+        self.max_age_days = self.max_future_days = None
+        self.kind = self._compile()
+
+    def _compile(self) -> str:
+        rule, requirement = self.rule, self.requirement
+        count_match = COUNT_REQUIREMENT.match(str(requirement or ""))
+        if requirement == "must_exist":
+            # must_exist needs an actual list; the count rules also accept a non-empty scalar as one value.
+            self.threshold, self.strict = 1, True
+            self._describe("At least one value must exist")
+            return "count"
+        if count_match or requirement == "min_count_n":
+            raw = count_match.group(1) if count_match else rule.get("min_count", rule.get("count"))
+            try:
+                self.threshold = int(raw)
+            except (TypeError, ValueError):
+                raise ValueError(f"Rule {self.id}: min_count_n needs an integer 'min_count', got {raw!r}")
+            self._describe("At least one value must exist" if self.threshold <= 1 else f"At least {self.threshold} values must exist")
+            return "count"
+        if requirement in {"regex", "regex_match"}:
+            pattern = rule.get("pattern")
+            if not pattern:
+                raise ValueError(f"Rule {self.id}: regex requirement needs a 'pattern'")
+            try:
+                self.pattern = re.compile(str(pattern), re.IGNORECASE if rule.get("ignore_case") else 0)
+            except re.error as exc:
+                raise ValueError(f"Rule {self.id}: invalid pattern {pattern!r}: {exc}")
+            self.mode = _match_mode(rule, "any")
+            quantifier = "Every value" if self.mode == "all" else "At least one value"
+            self._describe(
+                f"{quantifier} must match /{pattern}/",
+                f"Field '{self.field}' has no value matching the required pattern /{pattern}/.",
+                f"Make sure '{self.field}' is stated in the expected format.",
+            )
+            return "regex"
+        if requirement == "numeric_range":
+            self.low, self.high = rule.get("min"), rule.get("max")
+            if self.low is None and self.high is None:
+                raise ValueError(f"Rule {self.id}: numeric_range needs 'min' and/or 'max'")
+            self.low = float(self.low) if self.low is not None else None
+            self.high = float(self.high) if self.high is not None else None
+            self.mode = _match_mode(rule, "all")
+            bounds = f"between {self.low:g} and {self.high:g}" if self.low is not None and self.high is not None else (
+                f">= {self.low:g}" if self.low is not None else f"<= {self.high:g}"
+            )
+            quantifier = "Every value" if self.mode == "all" else "At least one value"
+            self._describe(
+                f"{quantifier} must be {bounds}",
+                f"Field '{self.field}' has no parseable value {bounds}.",
+                f"Check the disclosed '{self.field}' against the permitted range ({bounds}).",
+            )
+            return "numeric_range"
+        if requirement == "date_window":
+            self.not_before, self.not_after = _iso_date(rule, "not_before"), _iso_date(rule, "not_after")
+            self.max_age_days = int(rule["max_age_days"]) if rule.get("max_age_days") is not None else None
+            self.max_future_days = int(rule["max_future_days"]) if rule.get("max_future_days") is not None else None
+            if all(v is None for v in (self.not_before, self.not_after, self.max_age_days, self.max_future_days)):
+                raise ValueError(f"Rule {self.id}: date_window needs not_before, not_after, max_age_days or max_future_days")
+            self.mode = _match_mode(rule, "any")
+            quantifier = "Every date" if self.mode == "all" else "At least one date"
+            self._describe(
+                f"{quantifier} must fall inside the permitted window",
+                f"Field '{self.field}' has no parseable date inside the permitted window.",
+                f"Confirm the '{self.field}' in the document are current and correctly dated.",
+            )
+            return "date_window"
+        self._describe("Rule condition not satisfied")
+        return "unsupported"
+
+    def _describe(self, expected: str, why_flagged: str | None = None, suggestion: str | None = None):
+        self.expected = expected
+        # Violations are copies of this template with the two per-document keys filled in; key order matches the old payload.
+        self.template = {
+            "rule_id": self.id,
+            "severity": self.severity,
+            "message": self.rule.get("description"),
+            "field": self.field,
+            "requirement": self.requirement,
+            "expected": expected,
+            "found_count": 0,
+            "found_preview": [],
+            "why_flagged": why_flagged or f"Field '{self.field}' is missing or insufficient for requirement '{self.requirement}'.",
+            "suggestion": suggestion or f"Add or clarify '{self.field}' content in the document so this rule can be satisfied.",
+        }
+
+    def window(self, today: date):
+        low, high = self.not_before, self.not_after
+        if self.max_age_days is not None:
+            earliest = today - timedelta(days=self.max_age_days)
+            low = max(low, earliest) if low else earliest
+        if self.max_future_days is not None:
+            latest = today + timedelta(days=self.max_future_days)
+            high = min(high, latest) if high else latest
+        return low, high
+
+    def satisfied(self, field_values: "FieldValues", today: date) -> bool:
+        if self.kind == "regex":
+            return _holds([bool(self.pattern.search(text)) for text in field_values.texts()], self.mode)
+        if self.kind == "numeric_range":
+            return _holds(
+                [(self.low is None or n >= self.low) and (self.high is None or n <= self.high) for n in field_values.numbers()],
+                self.mode,
+            )
+        if self.kind == "date_window":
+            low, high = self.window(today)
+            return _holds([(low is None or d >= low) and (high is None or d <= high) for d in field_values.dates()], self.mode)
+        return True
+
+    def violation(self, values) -> Dict[str, Any]:
+        payload = self.template.copy()
+        if isinstance(values, list):
+            payload["found_count"] = len(values)
+            payload["found_preview"] = values[:3]
+        return payload
+
+    def violated_mask(self, column: "FieldColumn", today: date) -> np.ndarray:
+        # Vectorized twin of `satisfied` over a whole batch: True where the document breaks the rule.
+        if self.kind == "regex":
+            owners, unique_index, unique_texts = column.texts()
+            unique_flags = np.fromiter((bool(self.pattern.search(text)) for text in unique_texts), dtype=bool, count=len(unique_texts))
+            return ~column.holds(owners, unique_flags[unique_index], self.mode)
+        if self.kind == "numeric_range":
+            owners, numbers = column.numbers()
+            flags = np.ones(len(numbers), dtype=bool)
+            if self.low is not None:
+                flags &= numbers >= self.low
+            if self.high is not None:
+                flags &= numbers <= self.high
+            return ~column.holds(owners, flags, self.mode)
+        if self.kind == "date_window":
+            owners, ordinals = column.dates()
+            low, high = self.window(today)
+            flags = np.ones(len(ordinals), dtype=bool)
+            if low is not None:
+                flags &= ordinals >= low.toordinal()
+            if high is not None:
+                flags &= ordinals <= high.toordinal()
+            return ~column.holds(owners, flags, self.mode)
+        return np.zeros(column.size, dtype=bool)
+
+
+class FieldValues:
+    # Per-document view of one field; text/number/date forms are parsed at most once, however many rules read them.
+    def __init__(self, values):
+        self.values = values
+        self.is_list = isinstance(values, list)
+        self.found_count = len(values) if self.is_list else 0
+        self.lenient_count = self.found_count if self.is_list else (1 if values else 0)
+        self._texts = self._numbers = self._dates = None
+
+    def _items(self):
+        return self.values if self.is_list else ([self.values] if self.values else [])
+
+    def texts(self) -> List[str]:
+        if self._texts is None:
+            self._texts = [str(v) for v in self._items() if v is not None]
+        return self._texts
+
+    def numbers(self) -> List[float]:
+        if self._numbers is None:
+            self._numbers = [n for n in (parse_number(v) for v in self._items() if v is not None) if n is not None]
+        return self._numbers
+
+    def dates(self) -> List[date]:
+        if self._dates is None:
+            self._dates = [d for d in (parse_date(v) for v in self._items() if v is not None) if d is not None]
+        return self._dates
+
+
+def _value_key(value):
+    # bool/int/float compare equal as dict keys (True == 1 == 1.0) but parse differently.
+    if type(value) is str:
+        return value
+    return (type(value), value) if isinstance(value, (int, float)) else (str, str(value))
+
+
+class FieldColumn:
+    # One field across a batch of documents: per-document counts as arrays, plus every value
+    # flattened with the index of the document that owns it. Distinct values are parsed once
+    # for the whole batch, so repeated values across a portfolio cost a single parse.
+    def __init__(self, records: List[Dict[str, Any]], field):
+        self.raw = [record.get(field, []) for record in records]
+        self.size = len(self.raw)
+        is_list = np.fromiter((type(v) is list for v in self.raw), dtype=bool, count=self.size)
+        self.found_count = np.fromiter((len(v) if type(v) is list else 0 for v in self.raw), dtype=np.int64, count=self.size)
+        scalar_present = np.fromiter((type(v) is not list and bool(v) for v in self.raw), dtype=bool, count=self.size)
+        self.lenient_count = np.where(is_list, self.found_count, scalar_present.astype(np.int64))
+        self._unique = self._texts = self._numbers = self._dates = None
+
+    def _distinct(self):
+        # owners[i] is the document of the i-th non-null value, codes[i] its index into `values`.
+        if self._unique is None:
+            items = [v if type(v) is list else ([v] if v else []) for v in self.raw]
+            lengths = np.fromiter((len(v) for v in items), dtype=np.intp, count=self.size)
+            flat = list(chain.from_iterable(items))
+            owners = np.repeat(np.arange(self.size, dtype=np.intp), lengths)
+            present = np.fromiter((v is not None for v in flat), dtype=bool, count=len(flat))
+            if not present.all():
+                owners = owners[present]
+                flat = [v for v in flat if v is not None]
+            index: Dict[Any, int] = {}
+            values = []
+            codes = np.empty(len(flat), dtype=np.intp)
+            for i, value in enumerate(flat):
+                key = _value_key(value)
+                code = index.get(key)
+                if code is None:
+                    code = index[key] = len(values)
+                    values.append(value)
+                codes[i] = code
+            self._unique = (owners, codes, values)
+        return self._unique
+
+    def texts(self):
+        if self._texts is None:
+            owners, codes, values = self._distinct()
+            self._texts = (owners, codes, [str(v) for v in values])
+        return self._texts
+
+    def numbers(self):
+        if self._numbers is None:
+            owners, codes, values = self._distinct()
+            parsed = np.array([parse_number(v) for v in values], dtype=np.float64)
+            gathered = parsed[codes] if len(codes) else np.empty(0, dtype=np.float64)
+            keep = ~np.isnan(gathered)
+            self._numbers = (owners[keep], gathered[keep])
+        return self._numbers
+
+    def dates(self):
+        if self._dates is None:
+            owners, codes, values = self._distinct()
+            parsed = [parse_date(v) for v in values]
+            ordinals = np.fromiter((d.toordinal() if d else 0 for d in parsed), dtype=np.int64, count=len(parsed))
+            gathered = ordinals[codes] if len(codes) else np.empty(0, dtype=np.int64)
+            keep = gathered > 0
+            self._dates = (owners[keep], gathered[keep])
+        return self._dates
+
+    def holds(self, owners: np.ndarray, flags: np.ndarray, mode: str) -> np.ndarray:
+        usable = np.bincount(owners, minlength=self.size)
+        passing = np.bincount(owners, weights=flags, minlength=self.size)
+        if mode == "all":
+            return (usable > 0) & (passing == usable)
+        return passing > 0
+
+
+class FieldPlan:
+    # Rules on one field. Count rules are sorted by threshold, so the violated ones are a suffix
+    # found with one bisect; passing rules cost nothing.
+    def __init__(self, field: str, rules: List[CompiledRule]):
+        self.field = field
+        strict = sorted((r for r in rules if r.kind == "count" and r.strict), key=lambda r: r.threshold)
+        lenient = sorted((r for r in rules if r.kind == "count" and not r.strict), key=lambda r: r.threshold)
+        self.strict, self.strict_thresholds = strict, [r.threshold for r in strict]
+        self.lenient, self.lenient_thresholds = lenient, [r.threshold for r in lenient]
+        self.predicates = [r for r in rules if r.kind in {"regex", "numeric_range", "date_window"}]
+
+    def violated(self, values, today: date) -> List[tuple]:
+        field_values = FieldValues(values)
+        rules = self.strict[bisect_right(self.strict_thresholds, field_values.found_count):]
+        rules += self.lenient[bisect_right(self.lenient_thresholds, field_values.lenient_count):]
+        rules += [rule for rule in self.predicates if not rule.satisfied(field_values, today)]
+        return [(rule.index, rule.violation(values)) for rule in rules]
+
+    def violated_batch(self, column: FieldColumn, today: date):
+        # Yields (rule, document indices) pairs. Count rules use one searchsorted over all documents:
+        # document d violates every rule from position pos[d] onward in threshold order.
+        for rules, thresholds, counts in (
+            (self.strict, self.strict_thresholds, column.found_count),
+            (self.lenient, self.lenient_thresholds, column.lenient_count),
+        ):
+            if not rules:
+                continue
+            starts = np.searchsorted(np.asarray(thresholds), counts, side="right")
+            order = np.argsort(starts, kind="stable")
+            sorted_starts = starts[order]
+            for position, rule in enumerate(rules):
+                # Documents whose start is <= position break this rule.
+                end = np.searchsorted(sorted_starts, position, side="right")
+                if end:
+                    yield rule, order[:end]
+        for rule in self.predicates:
+            docs = np.flatnonzero(rule.violated_mask(column, today))
+            if len(docs):
+                yield rule, docs
+
+
+class RulePlan:
+    # A rule set compiled once per content version: rules grouped by field, requirement
+    # parameters parsed and validated, and doc-type scoped sub-plans memoized.
+    def __init__(self, rules: List[Dict[str, Any]], version: str | None = None):
+        self.rules = list(rules)
+        self.version = version or rule_set_version(self.rules)
+        compiled = [CompiledRule(index, rule) for index, rule in enumerate(self.rules)]
+        self._compiled = compiled
+        grouped: Dict[Any, List[CompiledRule]] = {}
+        for rule in compiled:
+            grouped.setdefault(rule.field, []).append(rule)
+        self.fields = {field: FieldPlan(field, field_rules) for field, field_rules in grouped.items()}
+        self.unsupported = [rule.id for rule in compiled if rule.kind == "unsupported"]
+        self._scoped: Dict[FrozenSet[str], "RulePlan"] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.rules)
+
+    def scoped(self, allowed_fields: Iterable[str]) -> "RulePlan":
+        # Same fallback as before: a scope that matches no rule keeps the full set.
+        key = frozenset(allowed_fields)
+        with self._lock:
+            plan = self._scoped.get(key)
+        if plan is None:
+            subset = [rule for rule in self.rules if rule.get("field") in key]
+            plan = RulePlan(subset) if subset and len(subset) < len(self.rules) else self
+            with self._lock:
+                plan = self._scoped.setdefault(key, plan)
+        return plan
+
+    def evaluate_batch(self, records: List[Dict[str, Any]], today: date | None = None, include_details: bool = True) -> Dict[str, Any]:
+        # Columnar evaluation for portfolio re-checks: every rule is one array predicate over all documents.
+        today = today or date.today()
+        breaches = np.zeros(len(self.rules), dtype=np.int64)
+        doc_parts, rule_parts = [], []
+        for field, field_plan in self.fields.items():
+            column = FieldColumn(records, field)
+            for rule, docs in field_plan.violated_batch(column, today):
+                breaches[rule.index] = len(docs)
+                doc_parts.append(docs)
+                rule_parts.append(np.full(len(docs), rule.index, dtype=np.intp))
+
+        # (document, rule) pairs sorted by document, then rule-file order; one slice per document.
+        doc_idx = np.concatenate(doc_parts) if doc_parts else np.empty(0, dtype=np.intp)
+        rule_idx = np.concatenate(rule_parts) if rule_parts else np.empty(0, dtype=np.intp)
+        order = np.lexsort((rule_idx, doc_idx))
+        bounds = np.searchsorted(doc_idx[order], np.arange(len(records) + 1)).tolist()
+        ordered_rules = rule_idx[order].tolist()
+        rule_ids = [rule.get("id") for rule in self.rules]
+        compiled = self._compiled
+
+        results = []
+        for doc in range(len(records)):
+            found = ordered_rules[bounds[doc]:bounds[doc + 1]]
+            summary = {"status": "PASS" if not found else "FAIL", "violations_count": len(found)}
+            if include_details:
+                record = records[doc]
+                results.append({"summary": summary, "violations": [compiled[i].violation(record.get(compiled[i].field, [])) for i in found]})
+            else:
+                results.append({"summary": summary, "violated_rule_ids": [rule_ids[i] for i in found]})
+
+        failed = int(np.count_nonzero(np.diff(bounds)))
+        return {
+            "rule_set_version": self.version,
+            "count": len(records),
+            "summary": {
+                "documents_passed": len(records) - failed,
+                "documents_failed": failed,
+                "violations_total": int(breaches.sum()),
+            },
+            "breaches_by_rule": [
+                {"rule_id": rule_ids[i], "field": self.rules[i].get("field"), "severity": compiled[i].severity, "documents": int(breaches[i])}
+                for i in np.flatnonzero(breaches).tolist()
+            ],
+            "results": results,
+        }
+
+    def violations(self, extracted_data: Dict[str, Any], today: date | None = None) -> List[tuple]:
+        # (rule index, payload) pairs in rule-file order, as the per-rule loop reported them.
+        today = today or date.today()
+        found = []
+        for field, field_plan in self.fields.items():
+            found.extend(field_plan.violated(extracted_data.get(field, []), today))
+        found.sort(key=itemgetter(0))
+        return found
+
+    def evaluate(self, extracted_data: Dict[str, Any], today: date | None = None) -> Dict[str, Any]:
+        violations = [payload for _, payload in self.violations(extracted_data, today)]
+        return {
+            "summary": {
+                "status": "PASS" if not violations else "FAIL",
+                "violations_count": len(violations),
+            },
+            "violations": violations,
+        }
+
+
+_PLANS: "OrderedDict[str, RulePlan]" = OrderedDict()
+_PLANS_LOCK = threading.Lock()
+
+
+def compile_rules(rules: "List[Dict[str, Any]] | RulePlan") -> RulePlan:
+    if isinstance(rules, RulePlan):
+        return rules
+    version = rule_set_version(rules)
+    with _PLANS_LOCK:
+        plan = _PLANS.get(version)
+        if plan is not None:
+            _PLANS.move_to_end(version)
+            return plan
+    plan = RulePlan(rules, version=version)
+    with _PLANS_LOCK:
+        _PLANS[version] = plan
+        while len(_PLANS) > RULE_PLAN_CACHE_SIZE:
+            _PLANS.popitem(last=False)
+    return plan
+
+
+class RuleDiff:
+    # What changed between two rule-set versions, keyed by rule id. Rules that were added, removed
+    # or edited are "dirty" and re-evaluated; a stored result for any other rule is reused, since it
+    # depends only on the rule and the (unchanged) extracted field values. Two kinds are always dirty:
+    # ids used by more than one rule, whose stored violations cannot be told apart, and date_window
+    # rules bounded by max_age_days/max_future_days, whose window moves with today's date.
+    def __init__(self, old: RulePlan, new: RulePlan):
+        self.from_version = old.version
+        self.to_version = new.version
+        old_by_id = _rules_by_id(old.rules)
+        new_by_id = _rules_by_id(new.rules)
+        self.added = [rule_id for rule_id in new_by_id if rule_id not in old_by_id]
+        self.removed = [rule_id for rule_id in old_by_id if rule_id not in new_by_id]
+        self.changed = [rule_id for rule_id in new_by_id if rule_id in old_by_id and old_by_id[rule_id] != new_by_id[rule_id]]
+        shared = set()
+        if old.version != new.version:
+            shared = {rule_id for rule_id, group in chain(old_by_id.items(), new_by_id.items()) if len(group) > 1}
+        self.time_relative = sorted(
+            {rule.id for rule in new._compiled if rule.kind == "date_window" and (rule.max_age_days is not None or rule.max_future_days is not None)},
+            key=str,
+        )
+        self.dirty = set(self.added) | set(self.removed) | set(self.changed) | shared | set(self.time_relative)
+        self.affected_fields = sorted(
+            {str(rule.get("field")) for rule_id in self.dirty for rule in old_by_id.get(rule_id, []) + new_by_id.get(rule_id, [])}
+        )
+        # Clean ids are unique, so one position per id orders the kept violations.
+        self._order = {rule.get("id"): index for index, rule in enumerate(new.rules) if rule.get("id") not in self.dirty}
+        # Only the dirty rules of the new set are compiled and evaluated on patch.
+        positions = [index for index, rule in enumerate(new.rules) if rule.get("id") in self.dirty]
+        self.partial = RulePlan([new.rules[index] for index in positions])
+        self._positions = positions
+
+    @property
+    def empty(self) -> bool:
+        return not self.dirty
+
+    def describe(self) -> Dict[str, Any]:
+        return {
+            "from_version": self.from_version,
+            "to_version": self.to_version,
+            "added": self.added,
+            "removed": self.removed,
+            "changed": self.changed,
+            "time_relative": self.time_relative,
+            "affected_fields": self.affected_fields,
+            "reevaluated_rules": len(self.partial),
+        }
+
+    def patch(self, extracted_data: Dict[str, Any], previous: Dict[str, Any], today: date | None = None) -> Dict[str, Any]:
+        # Same result as a full evaluation under the new set: keep stored violations of clean rules,
+        # re-evaluate dirty ones, and restore rule-file order of the new set.
+        patched = dict(previous)
+        if self.empty:
+            return patched
+        tail = len(self._order) + len(self._positions)
+        found = [(self._order.get(v.get("rule_id"), tail), v) for v in previous.get("violations", []) if v.get("rule_id") not in self.dirty]
+        if len(self.partial):
+            found.extend((self._positions[index], v) for index, v in self.partial.violations(extracted_data, today))
+        found.sort(key=itemgetter(0))
+        violations = [payload for _, payload in found]
+        patched["summary"] = {
+            **previous.get("summary", {}),
+            "status": "PASS" if not violations else "FAIL",
+            "violations_count": len(violations),
+        }
+        patched["violations"] = violations
+        return patched
+
+
+def _rules_by_id(rules: List[Dict[str, Any]]) -> Dict[Any, List[Dict[str, Any]]]:
+    # Rules sharing an id are compared as a group, so any edit to one of them marks the id dirty.
+    grouped: Dict[Any, List[Dict[str, Any]]] = {}
+    for rule in rules:
+        grouped.setdefault(rule.get("id"), []).append(rule)
+    return grouped
+
+
+_DIFFS: "OrderedDict[tuple, RuleDiff]" = OrderedDict()
+
+
+def diff_rule_sets(old: "List[Dict[str, Any]] | RulePlan", new: "List[Dict[str, Any]] | RulePlan") -> RuleDiff:
+    old_plan, new_plan = compile_rules(old), compile_rules(new)
+    key = (old_plan.version, new_plan.version)
+    with _PLANS_LOCK:
+        diff = _DIFFS.get(key)
+        if diff is not None:
+            _DIFFS.move_to_end(key)
+            return diff
+    diff = RuleDiff(old_plan, new_plan)
+    with _PLANS_LOCK:
+        _DIFFS[key] = diff
+        while len(_DIFFS) > RULE_PLAN_CACHE_SIZE:
+            _DIFFS.popitem(last=False)
+    return diff
@@ -1,12 +1,17 @@
 import json
+import os
+import threading
+import time
 from pathlib import Path
-from app.core.config import RULES_PATH
+from typing import Any, Dict, List
 
+from app.core.config import RULES_PATH, RULES_RELOAD_CHECK_SEC
+from app.services.rule_engine import RulePlan
 
-def load_rules():
-    path = Path(RULES_PATH)
+
+def _read_rules(path: Path) -> List[Dict[str, Any]]:
     if not path.exists():
-        raise FileNotFoundError(f"Rules file not found: {RULES_PATH}")
+        raise FileNotFoundError(f"Rules file not found: {path}")
 
     with path.open("r", encoding="utf-8") as handle:
         data = json.load(handle)
@@ -15,3 +20,89 @@ def load_rules():
         raise ValueError("Rules file must be an array")
 
     return data
+
+
+class RulesFile:
+    # Parsed and compiled rules kept in memory. The file is stat()ed at most once per
+    # `check_interval_sec`; only a changed (mtime, size, inode) triggers a re-read. The new plan is
+    # built completely before it replaces the old one, so readers never see a half-loaded set,
+    # and an edit that fails to parse or compile leaves the previous version in service.
+    def __init__(self, path: str, check_interval_sec: float = 1.0):
+        self.path = Path(path) if path else None
+        self.check_interval_sec = max(0.0, check_interval_sec)
+        self._plan: RulePlan | None = None
+        self._signature = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+        self._stats = {"checks": 0, "reloads": 0, "reload_errors": 0, "last_error": None, "loaded_at": None}
+
+    def _stat_signature(self):
+        st = os.stat(self.path)
+        return (st.st_mtime_ns, st.st_size, st.st_ino)
+
+    def plan(self) -> RulePlan:
+        plan = self._plan
+        if plan is not None and time.monotonic() - self._checked_at < self.check_interval_sec:
+            return plan
+        with self._lock:
+            if self._plan is not None and time.monotonic() - self._checked_at < self.check_interval_sec:
+                return self._plan
+            self._refresh()
+            return self._plan
+
+    def _refresh(self):
+        if self.path is None:
+            raise FileNotFoundError("Rules file not found: RULES_PATH is not set")
+        self._stats["checks"] += 1
+        self._checked_at = time.monotonic()
+        try:
+            signature = self._stat_signature()
+        except FileNotFoundError:
+            if self._plan is None:
+                raise FileNotFoundError(f"Rules file not found: {self.path}")
+            self._note_error(f"Rules file not found: {self.path}")
+            return
+        if signature == self._signature and self._plan is not None:
+            return
+        try:
+            plan = RulePlan(_read_rules(self.path))
+        except (OSError, ValueError) as exc:
+            if self._plan is None:
+                raise
+            # Mid-edit or broken file: keep serving the last good version and retry on the next check.
+            self._note_error(f"{type(exc).__name__}: {exc}")
+            return
+        self._plan = plan
+        self._signature = signature
+        self._stats["reloads"] += 1
+        self._stats["loaded_at"] = time.time()
+        self._stats["last_error"] = None
+
+    def _note_error(self, message: str):
+        self._stats["reload_errors"] += 1
+        self._stats["last_error"] = message
+
+    def stats(self) -> Dict[str, Any]:
+        plan = self._plan
+        return {
+            "path": str(self.path) if self.path else None,
+            "version": plan.version if plan is not None else None,
+            "rules": len(plan) if plan is not None else 0,
+            "check_interval_sec": self.check_interval_sec,
+            **self._stats,
+        }
+
+
+RULES_FILE = RulesFile(RULES_PATH, check_interval_sec=RULES_RELOAD_CHECK_SEC)
+
+
+def load_rule_plan() -> RulePlan:
+    return RULES_FILE.plan()
+
+
+def load_rules():
+    return RULES_FILE.plan().rules
+
+
+def rules_version() -> str:
+    return RULES_FILE.plan().version
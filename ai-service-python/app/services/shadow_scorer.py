@@ -0,0 +1,117 @@
+import random
+import threading
+from collections import deque
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, List
+
+import numpy as np
+
+
+class ShadowScorer:
+    # Re-scores a sample of live traffic with a candidate model version after the primary answer
+    # has been returned. Nothing here is on the request path: work is dropped (and counted) rather
+    # than queued once `max_pending` shadow batches are outstanding. `dispatch(items, version)`
+    # resolves to (results, compute_ms), the same shape the primary path reports.
+    def __init__(self, dispatch: Callable[[List[Any], str], Future], max_pending: int = 4, window: int = 2048):
+        self.dispatch = dispatch
+        self.max_pending = max(1, max_pending)
+        self._lock = threading.Lock()
+        self._window = window
+        self._reset(None, None)
+
+    def _reset(self, primary, shadow):
+        self._pair = (primary, shadow)
+        self._pending = 0
+        self._primary_ms: deque = deque(maxlen=self._window)
+        self._shadow_ms: deque = deque(maxlen=self._window)
+        self._counts = {"sampled_batches": 0, "compared": 0, "dropped": 0, "failed": 0, "skipped": 0}
+        self._score_diff_sum = 0.0
+        self._score_diff_max = 0.0
+        self._fraud_diff_sum = 0.0
+        self._fraud_diff_max = 0.0
+        self._category_agree = 0
+        self._label_agree = 0
+
+    def observe(self, items: List[Any], primary: List[Dict[str, Any]], primary_version: str, primary_ms: float, shadow: str | None, sample_rate: float):
+        if not shadow or shadow == primary_version or not items:
+            return
+        with self._lock:
+            if self._pair != (primary_version, shadow):
+                self._reset(primary_version, shadow)
+            if sample_rate < 1.0 and random.random() >= sample_rate:
+                self._counts["skipped"] += 1
+                return
+            if self._pending >= self.max_pending:
+                self._counts["dropped"] += 1
+                return
+            self._pending += 1
+            self._counts["sampled_batches"] += 1
+            self._primary_ms.append(primary_ms / len(items))
+        try:
+            future = self.dispatch(items, shadow)
+        except Exception:
+            self._done_failed()
+            return
+        future.add_done_callback(lambda done: self._compare(done, primary, primary_version, shadow))
+
+    def _done_failed(self):
+        with self._lock:
+            self._pending -= 1
+            self._counts["failed"] += 1
+
+    def _compare(self, done: Future, primary, primary_version: str, shadow: str):
+        if done.exception() is not None:
+            self._done_failed()
+            return
+        candidate, elapsed_ms = done.result()
+        score_diff = np.abs(np.array([r["score"] for r in primary]) - np.array([r["score"] for r in candidate]))
+        fraud_diff = np.abs(np.array([r["fraud_score"] for r in primary]) - np.array([r["fraud_score"] for r in candidate]))
+        category_agree = sum(a["risk_category"] == b["risk_category"] for a, b in zip(primary, candidate))
+        label_agree = sum(a["fraud_label"] == b["fraud_label"] for a, b in zip(primary, candidate))
+        with self._lock:
+            if self._pair != (primary_version, shadow):
+                return
+            self._pending -= 1
+            self._shadow_ms.append(elapsed_ms / len(primary))
+            self._counts["compared"] += len(primary)
+            self._score_diff_sum += float(score_diff.sum())
+            self._score_diff_max = max(self._score_diff_max, float(score_diff.max()))
+            self._fraud_diff_sum += float(fraud_diff.sum())
+            self._fraud_diff_max = max(self._fraud_diff_max, float(fraud_diff.max()))
+            self._category_agree += category_agree
+            self._label_agree += label_agree
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            primary, shadow = self._pair
+            counts = dict(self._counts)
+            primary_ms = np.asarray(self._primary_ms, dtype=float)
+            shadow_ms = np.asarray(self._shadow_ms, dtype=float)
+            compared = counts["compared"]
+
+            def _pct(values, q):
+                return round(float(np.percentile(values, q)), 4) if len(values) else None
+
+            def _avg(total):
+                return round(total / compared, 6) if compared else None
+
+            return {
+                "primary_version": primary,
+                "shadow_version": shadow,
+                "pending": self._pending,
+                "max_pending": self.max_pending,
+                **counts,
+                # Per-item scoring time inside the worker, so pool queueing does not skew the comparison.
+                "latency_ms_per_item": {
+                    "primary": {"p50": _pct(primary_ms, 50), "p99": _pct(primary_ms, 99)},
+                    "shadow": {"p50": _pct(shadow_ms, 50), "p99": _pct(shadow_ms, 99)},
+                },
+                "divergence": {
+                    "score_mean_abs_diff": _avg(self._score_diff_sum),
+                    "score_max_abs_diff": round(self._score_diff_max, 6) if compared else None,
+                    "fraud_score_mean_abs_diff": _avg(self._fraud_diff_sum),
+                    "fraud_score_max_abs_diff": round(self._fraud_diff_max, 6) if compared else None,
+                    "risk_category_agreement": _avg(self._category_agree),
+                    "fraud_label_agreement": _avg(self._label_agree),
+                },
+            }
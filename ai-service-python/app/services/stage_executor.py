@@ -0,0 +1,239 @@
+import asyncio
+import multiprocessing
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import asynccontextmanager
+from functools import partial
+from typing import Any, Callable, Dict
+
+from app.core.config import (
+    CPU_WORKERS,
+    IO_WORKERS,
+    STAGE_DEFAULT_LIMIT,
+    STAGE_LIMITS,
+    STAGE_MAX_QUEUE,
+    STAGE_QUEUE_TIMEOUT_SEC,
+)
+
+
+class StageRejected(RuntimeError):
+    # Raised instead of queuing without bound; the app maps it to 429 (queue full) or 503 (waited too long / pool down).
+    def __init__(self, stage: str, status_code: int, reason: str, retry_after: float = 1.0):
+        super().__init__(f"{stage}_{reason}")
+        self.stage = stage
+        self.status_code = status_code
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class TrackedProcessPool(ProcessPoolExecutor):
+    # ProcessPoolExecutor that counts queued/running work so saturation shows up in /metrics.
+    def __init__(self, name: str, workers: int):
+        # spawn: workers must not inherit the parent's threads (uvicorn, LLM pool) mid-flight.
+        super().__init__(max_workers=max(1, workers), mp_context=multiprocessing.get_context("spawn"))
+        self.name = name
+        self.workers = max(1, workers)
+        self._lock = threading.Lock()
+        self.pending = 0
+        self.peak_pending = 0
+        self.submitted = 0
+        self.failed = 0
+
+    def submit(self, fn, /, *args, **kwargs):
+        with self._lock:
+            self.pending += 1
+            self.submitted += 1
+            self.peak_pending = max(self.peak_pending, self.pending)
+        try:
+            future = super().submit(fn, *args, **kwargs)
+        except BaseException:
+            self._done(None)
+            raise
+        future.add_done_callback(self._done)
+        return future
+
+    def _done(self, future):
+        with self._lock:
+            self.pending -= 1
+            if future is None or future.cancelled() or future.exception() is not None:
+                self.failed += 1
+        if future is not None and not future.cancelled() and isinstance(future.exception(), BrokenProcessPool):
+            reset_pool(self.name)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "pending": self.pending,
+                "peak_pending": self.peak_pending,
+                "submitted": self.submitted,
+                "failed": self.failed,
+                "saturation": round(self.pending / self.workers, 3),
+            }
+
+
+_POOLS: Dict[str, TrackedProcessPool] = {}
+_POOLS_LOCK = threading.Lock()
+
+
+def process_pool(name: str, workers: int) -> TrackedProcessPool:
+    with _POOLS_LOCK:
+        if name not in _POOLS:
+            _POOLS[name] = TrackedProcessPool(name, workers)
+        return _POOLS[name]
+
+
+def reset_pool(name: str):
+    # A crashed worker breaks the whole pool; drop it so the next submit starts a fresh one.
+    with _POOLS_LOCK:
+        pool = _POOLS.pop(name, None)
+    if pool is not None:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+def cpu_pool() -> TrackedProcessPool:
+    return process_pool("cpu", CPU_WORKERS)
+
+
+_IO_EXECUTOR = ThreadPoolExecutor(max_workers=max(1, IO_WORKERS), thread_name_prefix="stage-io")
+
+
+class StageLimiter:
+    # Per-stage admission control. All counters are touched on the event loop thread only.
+    def __init__(self, name: str, limit: int, max_queue: int, queue_timeout_sec: float):
+        self.name = name
+        self.limit = max(1, limit)
+        self.max_queue = max(0, max_queue)
+        self.queue_timeout_sec = queue_timeout_sec
+        self.in_flight = 0
+        self.queued = 0
+        self.peak_queued = 0
+        self.admitted = 0
+        self.rejected = 0
+        self.timed_out = 0
+        self.completed = 0
+        self.failed = 0
+        self.wait_ms_total = 0.0
+        self.busy_ms_total = 0.0
+        self._sem = None
+        self._loop = None
+
+    def _semaphore(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self._sem = asyncio.Semaphore(self.limit)
+        return self._sem
+
+    @asynccontextmanager
+    async def slot(self):
+        sem = self._semaphore()
+        must_wait = sem.locked()
+        if must_wait and self.queued >= self.max_queue:
+            self.rejected += 1
+            raise StageRejected(self.name, 429, "queue_full", retry_after=max(1.0, self.queue_timeout_sec / 4))
+
+        if must_wait:
+            self.queued += 1
+            self.peak_queued = max(self.peak_queued, self.queued)
+        waited_from = time.perf_counter()
+        try:
+            await asyncio.wait_for(sem.acquire(), timeout=self.queue_timeout_sec)
+        except asyncio.TimeoutError:
+            self.timed_out += 1
+            raise StageRejected(self.name, 503, "queue_timeout", retry_after=self.queue_timeout_sec)
+        finally:
+            if must_wait:
+                self.queued -= 1
+
+        started = time.perf_counter()
+        self.wait_ms_total += (started - waited_from) * 1000
+        self.admitted += 1
+        self.in_flight += 1
+        try:
+            yield
+        except BaseException:
+            self.failed += 1
+            raise
+        else:
+            self.completed += 1
+        finally:
+            self.in_flight -= 1
+            self.busy_ms_total += (time.perf_counter() - started) * 1000
+            sem.release()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "limit": self.limit,
+            "max_queue": self.max_queue,
+            "in_flight": self.in_flight,
+            "queued": self.queued,
+            "peak_queued": self.peak_queued,
+            "saturation": round(self.in_flight / self.limit, 3),
+            "admitted": self.admitted,
+            "completed": self.completed,
+            "failed": self.failed,
+            "rejected": self.rejected,
+            "timed_out": self.timed_out,
+            "avg_wait_ms": round(self.wait_ms_total / self.admitted, 2) if self.admitted else 0.0,
+            "avg_busy_ms": round(self.busy_ms_total / self.admitted, 2) if self.admitted else 0.0,
+        }
+
+
+def _parse_limits(spec: str) -> Dict[str, int]:
+    limits = {}
+    for item in (spec or "").split(","):
+        name, _, value = item.partition("=")
+        if name.strip() and value.strip():
+            limits[name.strip()] = int(value)
+    return limits
+
+
+_STAGE_LIMITS = _parse_limits(STAGE_LIMITS)
+_STAGES: Dict[str, StageLimiter] = {}
+
+
+def stage(name: str) -> StageLimiter:
+    if name not in _STAGES:
+        _STAGES[name] = StageLimiter(name, _STAGE_LIMITS.get(name, STAGE_DEFAULT_LIMIT), STAGE_MAX_QUEUE, STAGE_QUEUE_TIMEOUT_SEC)
+    return _STAGES[name]
+
+
+async def run_cpu(stage_name: str, fn: Callable, *args, **kwargs):
+    # CPU-bound work (model scoring, PDF rendering, rule checks) runs in worker processes, off the GIL.
+    async with stage(stage_name).slot():
+        loop = asyncio.get_running_loop()
+        try:
+            return await loop.run_in_executor(cpu_pool(), partial(fn, *args, **kwargs))
+        except BrokenProcessPool as exc:
+            raise StageRejected(stage_name, 503, "worker_pool_unavailable", retry_after=1.0) from exc
+
+
+async def run_io(stage_name: str, fn: Callable, *args, **kwargs):
+    # Blocking I/O (DeepSeek, scraping) waits on a dedicated thread pool, so the event loop stays free.
+    async with stage(stage_name).slot():
+        return await run_blocking(fn, *args, **kwargs)
+
+
+async def run_blocking(fn: Callable, *args, **kwargs):
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_IO_EXECUTOR, partial(fn, *args, **kwargs))
+
+
+def offload_cpu(fn: Callable, *args, **kwargs):
+    # For code already on a worker thread: block that thread, not the GIL, while a process does the work.
+    if CPU_WORKERS < 1:
+        return fn(*args, **kwargs)
+    return cpu_pool().submit(fn, *args, **kwargs).result()
+
+
+def executor_stats() -> Dict[str, Any]:
+    with _POOLS_LOCK:
+        pools = dict(_POOLS)
+    return {
+        "stages": {name: limiter.stats() for name, limiter in sorted(_STAGES.items())},
+        "process_pools": {name: pool.stats() for name, pool in sorted(pools.items())},
+        "io_threads": {"workers": _IO_EXECUTOR._max_workers, "queued": _IO_EXECUTOR._work_queue.qsize()},
+    }
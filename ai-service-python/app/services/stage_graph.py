@@ -0,0 +1,284 @@
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Iterable, List
+
+from app.core.config import PIPELINE_STAGE_WORKERS
+
+# Stages only block on I/O, the LLM pool, the process pool or the micro-batcher, never on each other
+# (a stage is submitted once its inputs exist), so one shared pool cannot deadlock across requests.
+_STAGE_EXECUTOR = ThreadPoolExecutor(max_workers=max(1, PIPELINE_STAGE_WORKERS), thread_name_prefix="pipeline-stage")
+
+
+class Stage:
+    # `fn(results)` receives the outputs of finished stages by name. `submit` picks the pool the
+    # stage runs on (e.g. the LLM pool for DeepSeek calls); `agent` groups stages in agent_trace.
+    def __init__(
+        self,
+        name: str,
+        fn: Callable[[Dict[str, Any]], Any],
+        deps: Iterable[str] = (),
+        agent: str | None = None,
+        submit: Callable[[Callable[[], Any]], Future] | None = None,
+    ):
+        self.name = name
+        self.fn = fn
+        self.deps = list(deps)
+        self.agent = agent
+        self.submit = submit or _STAGE_EXECUTOR.submit
+
+
+class Gate:
+    # Caps how many stages use a resource at once across any number of graph runs (e.g. every
+    # document of a batch). Stages over the limit wait in FIFO order without holding a thread and
+    # are handed to `submit` as slots free up. Pass `gate.submit` as a Stage's submit.
+    def __init__(self, name: str, limit: int, submit: Callable[[Callable[[], Any]], Any] | None = None):
+        self.name = name
+        self.limit = max(1, limit)
+        self._submit = submit or _STAGE_EXECUTOR.submit
+        self._lock = threading.Lock()
+        self._queue: deque = deque()
+        self.active = 0
+        self.peak_queued = 0
+        self.started = 0
+
+    def submit(self, fn: Callable[[], Any]):
+        with self._lock:
+            if self.active >= self.limit:
+                self._queue.append(fn)
+                self.peak_queued = max(self.peak_queued, len(self._queue))
+                return
+            self.active += 1
+        self._start(fn)
+
+    def _start(self, fn: Callable[[], Any]):
+        def _run():
+            try:
+                return fn()
+            finally:
+                self._release()
+
+        with self._lock:
+            self.started += 1
+        try:
+            self._submit(_run)
+        except RuntimeError:
+            # Pool already shut down: run here rather than leave the stage (and its graph) hanging.
+            _run()
+
+    def _release(self):
+        with self._lock:
+            fn = self._queue.popleft() if self._queue else None
+            if fn is None:
+                self.active -= 1
+        if fn is not None:
+            self._start(fn)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"limit": self.limit, "active": self.active, "queued": len(self._queue), "peak_queued": self.peak_queued, "started": self.started}
+
+
+class StageGraph:
+    def __init__(self, stages: List[Stage]):
+        self.stages = {stage.name: stage for stage in stages}
+        if len(self.stages) != len(stages):
+            raise ValueError("duplicate stage name")
+        for stage in stages:
+            missing = [dep for dep in stage.deps if dep not in self.stages]
+            if missing:
+                raise ValueError(f"stage {stage.name} depends on unknown stage(s): {', '.join(missing)}")
+        self.dependents: Dict[str, List[str]] = {name: [] for name in self.stages}
+        for stage in stages:
+            for dep in stage.deps:
+                self.dependents[dep].append(stage.name)
+        self._check_acyclic()
+
+    def _check_acyclic(self):
+        remaining = {name: len(stage.deps) for name, stage in self.stages.items()}
+        ready = [name for name, count in remaining.items() if count == 0]
+        seen = 0
+        while ready:
+            name = ready.pop()
+            seen += 1
+            for child in self.dependents[name]:
+                remaining[child] -= 1
+                if remaining[child] == 0:
+                    ready.append(child)
+        if seen != len(self.stages):
+            raise ValueError("stage graph has a cycle")
+
+    def run(self, on_stage: "Callable[[str, Any, GraphRun], None] | None" = None) -> "GraphRun":
+        return GraphRun(self, on_stage).wait()
+
+
+class GraphRun:
+    # One execution: a stage is submitted as soon as its last dependency finishes. On the first
+    # failure nothing new starts; the error is re-raised once in-flight stages settle.
+    # `on_stage(name, value, run)` is called on the stage's thread after each successful stage.
+    def __init__(self, graph: StageGraph, on_stage: "Callable[[str, Any, GraphRun], None] | None" = None):
+        self.graph = graph
+        self.on_stage = on_stage
+        self.results: Dict[str, Any] = {}
+        self.timings: Dict[str, Dict[str, Any]] = {}
+        self._waiting = {name: len(stage.deps) for name, stage in graph.stages.items()}
+        self._ready_at: Dict[str, float] = {}
+        self._running = 0
+        self._error: BaseException | None = None
+        self._cond = threading.Condition()
+        self.started = time.perf_counter()
+        self.started_wall = time.time()
+        self.finished = self.started
+
+    def wait(self) -> "GraphRun":
+        with self._cond:
+            ready = [name for name, count in self._waiting.items() if count == 0]
+        for name in ready:
+            self._submit(name)
+        with self._cond:
+            self._cond.wait_for(lambda: self._running == 0 and (self._error is not None or len(self.results) == len(self.graph.stages)))
+            self.finished = time.perf_counter()
+            if self._error is not None:
+                raise self._error
+        return self
+
+    def _submit(self, name: str):
+        stage = self.graph.stages[name]
+        with self._cond:
+            if self._error is not None:
+                return
+            self._running += 1
+            self._ready_at[name] = time.perf_counter()
+            inputs = dict(self.results)
+        try:
+            stage.submit(lambda: self._execute(stage, inputs))
+        except BaseException as exc:
+            self._finish(name, None, exc, None)
+
+    def _execute(self, stage: Stage, inputs: Dict[str, Any]):
+        started = time.perf_counter()
+        cpu_started = time.thread_time()
+        value, error = None, None
+        try:
+            value = stage.fn(inputs)
+        except BaseException as exc:
+            error = exc
+        # thread_time only covers this thread: work handed to the process pool or the PDF parser
+        # thread shows up as wait, which is the split we want to see.
+        timing = {"start": started, "end": time.perf_counter(), "cpu_sec": time.thread_time() - cpu_started}
+        self._finish(stage.name, value, error, timing)
+
+    def _finish(self, name: str, value: Any, error: BaseException | None, timing: Dict[str, Any] | None):
+        ready = []
+        with self._cond:
+            if timing is not None:
+                self.timings[name] = self._describe(name, timing, error)
+            if error is not None:
+                if self._error is None:
+                    self._error = error
+            else:
+                self.results[name] = value
+                for child in self.graph.dependents[name]:
+                    self._waiting[child] -= 1
+                    if self._waiting[child] == 0:
+                        ready.append(child)
+        # The observer runs before dependents start, so events arrive in dependency order, and the
+        # stage only counts as settled afterwards, so every callback has returned when wait() does.
+        if error is None and self.on_stage is not None:
+            try:
+                self.on_stage(name, value, self)
+            except Exception:
+                # An observer (e.g. a closed stream) must not fail the pipeline.
+                pass
+        for child in ready:
+            self._submit(child)
+        with self._cond:
+            self._running -= 1
+            self._cond.notify_all()
+
+    def _describe(self, name: str, timing: Dict[str, Any], error: BaseException | None) -> Dict[str, Any]:
+        stage = self.graph.stages[name]
+        wall_ms = (timing["end"] - timing["start"]) * 1000
+        cpu_ms = min(wall_ms, timing["cpu_sec"] * 1000)
+        return {
+            "stage": name,
+            "agent": stage.agent,
+            "deps": list(stage.deps),
+            "status": "failed" if error is not None else "completed",
+            "start_ms": round((timing["start"] - self.started) * 1000, 3),
+            "end_ms": round((timing["end"] - self.started) * 1000, 3),
+            "queued_ms": round((timing["start"] - self._ready_at[name]) * 1000, 3),
+            "duration_ms": round(wall_ms, 3),
+            "cpu_ms": round(cpu_ms, 3),
+            "wait_ms": round(wall_ms - cpu_ms, 3),
+            "_start": timing["start"],
+            "_end": timing["end"],
+        }
+
+    def _iso(self, instant: float) -> str:
+        # Naive UTC, as utcfromtimestamp produced, so the isoformat output is unchanged.
+        return datetime.fromtimestamp(self.started_wall + (instant - self.started), tz=timezone.utc).replace(tzinfo=None).isoformat()
+
+    def _public(self, t: Dict[str, Any]) -> Dict[str, Any]:
+        return {**{k: v for k, v in t.items() if not k.startswith("_")}, "started_at": self._iso(t["_start"]), "finished_at": self._iso(t["_end"])}
+
+    def stage_timing(self, name: str) -> Dict[str, Any]:
+        with self._cond:
+            return self._public(self.timings[name])
+
+    def stage_timings(self) -> List[Dict[str, Any]]:
+        with self._cond:
+            return [self._public(t) for t in sorted(self.timings.values(), key=lambda t: t["_start"])]
+
+    def agent_done(self, agent: str) -> bool:
+        with self._cond:
+            return all(name in self.results for name, stage in self.graph.stages.items() if stage.agent == agent)
+
+    def agent_timing(self, agent: str) -> Dict[str, Any]:
+        # An agent's span runs from its first stage start to its last stage end; CPU adds up.
+        with self._cond:
+            spans = [t for t in self.timings.values() if t["agent"] == agent]
+        if not spans:
+            return {}
+        start = min(t["_start"] for t in spans)
+        end = max(t["_end"] for t in spans)
+        cpu_ms = sum(t["cpu_ms"] for t in spans)
+        wall_ms = (end - start) * 1000
+        return {
+            "stages": [t["stage"] for t in sorted(spans, key=lambda t: t["_start"])],
+            "started_at": self._iso(start),
+            "finished_at": self._iso(end),
+            "duration_ms": round(wall_ms, 3),
+            "cpu_ms": round(cpu_ms, 3),
+            "wait_ms": round(max(0.0, wall_ms - cpu_ms), 3),
+        }
+
+    def critical_path(self) -> List[str]:
+        # Walk back from the last stage to finish through whichever input finished last.
+        if not self.timings:
+            return []
+        name = max(self.timings, key=lambda n: self.timings[n]["_end"])
+        path = [name]
+        while True:
+            deps = [dep for dep in self.graph.stages[name].deps if dep in self.timings]
+            if not deps:
+                break
+            name = max(deps, key=lambda n: self.timings[n]["_end"])
+            path.append(name)
+        return path[::-1]
+
+    def summary(self) -> Dict[str, Any]:
+        wall_ms = (self.finished - self.started) * 1000
+        cpu_ms = sum(t["cpu_ms"] for t in self.timings.values())
+        return {
+            "started_at": self._iso(self.started),
+            "finished_at": self._iso(self.finished),
+            "wall_ms": round(wall_ms, 3),
+            "cpu_ms": round(cpu_ms, 3),
+            # Sum of stage wall time over pipeline wall time: >1 means stages overlapped.
+            "parallelism": round(sum(t["duration_ms"] for t in self.timings.values()) / wall_ms, 3) if wall_ms else 0.0,
+            "critical_path": self.critical_path(),
+            "stages": self.stage_timings(),
+        }
@@ -0,0 +1,181 @@
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict
+
+# Disk eviction scans SUM(size); amortise it over several writes.
+_EVICT_EVERY_WRITES = 32
+
+
+class TieredCache:
+    # Two tiers: an in-process LRU in front of a SQLite store shared across workers and restarts.
+    def __init__(
+        self,
+        path: str,
+        memory_items: int = 256,
+        ttl_sec: float = 7 * 86400,
+        max_bytes: int = 256 * 1024 * 1024,
+        enabled: bool = True,
+    ):
+        self.path = path
+        self.enabled = enabled
+        self.memory_items = max(0, memory_items)
+        self.ttl_sec = ttl_sec
+        self.max_bytes = max_bytes
+        self._memory: "OrderedDict[str, tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._conn: sqlite3.Connection | None = None
+        self._writes_since_evict = 0
+        self._stats = {
+            "memory_hits": 0,
+            "disk_hits": 0,
+            "misses": 0,
+            "bypassed": 0,
+            "writes": 0,
+            "evictions": 0,
+            "disk_errors": 0,
+        }
+
+    def _db(self) -> sqlite3.Connection | None:
+        if self._conn is not None:
+            return self._conn
+        try:
+            Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False, timeout=5)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS cache_entries ("
+                "key TEXT PRIMARY KEY, created_at REAL NOT NULL, last_access REAL NOT NULL, "
+                "size INTEGER NOT NULL, payload TEXT NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_cache_entries_access ON cache_entries(last_access)")
+            conn.commit()
+        except sqlite3.Error:
+            self._stats["disk_errors"] += 1
+            return None
+        self._conn = conn
+        return conn
+
+    def _remember(self, key: str, created_at: float, payload: Dict[str, Any]):
+        if self.memory_items == 0:
+            return
+        self._memory[key] = (created_at, payload)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_items:
+            self._memory.popitem(last=False)
+
+    def get(self, key: str) -> Dict[str, Any] | None:
+        now = time.time()
+        with self._lock:
+            item = self._memory.get(key)
+            if item is not None:
+                if now - item[0] <= self.ttl_sec:
+                    self._memory.move_to_end(key)
+                    self._stats["memory_hits"] += 1
+                    return item[1]
+                del self._memory[key]
+
+            conn = self._db()
+            if conn is not None:
+                try:
+                    row = conn.execute("SELECT created_at, payload FROM cache_entries WHERE key = ?", (key,)).fetchone()
+                    if row is not None and now - row[0] <= self.ttl_sec:
+                        conn.execute("UPDATE cache_entries SET last_access = ? WHERE key = ?", (now, key))
+                        conn.commit()
+                        payload = json.loads(row[1])
+                        self._remember(key, row[0], payload)
+                        self._stats["disk_hits"] += 1
+                        return payload
+                except (sqlite3.Error, json.JSONDecodeError):
+                    self._stats["disk_errors"] += 1
+
+            self._stats["misses"] += 1
+            return None
+
+    def put(self, key: str, payload: Dict[str, Any]):
+        now = time.time()
+        encoded = json.dumps(payload, ensure_ascii=False)
+        with self._lock:
+            self._remember(key, now, payload)
+            self._stats["writes"] += 1
+            conn = self._db()
+            if conn is None:
+                return
+            try:
+                conn.execute(
+                    "INSERT OR REPLACE INTO cache_entries (key, created_at, last_access, size, payload) VALUES (?, ?, ?, ?, ?)",
+                    (key, now, now, len(encoded), encoded),
+                )
+                conn.commit()
+                self._writes_since_evict += 1
+                if self._writes_since_evict >= _EVICT_EVERY_WRITES:
+                    self._writes_since_evict = 0
+                    self._evict(conn, now)
+            except sqlite3.Error:
+                self._stats["disk_errors"] += 1
+
+    def _evict(self, conn: sqlite3.Connection, now: float):
+        removed = conn.execute("DELETE FROM cache_entries WHERE created_at < ?", (now - self.ttl_sec,)).rowcount
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM cache_entries").fetchone()[0]
+        if total > self.max_bytes:
+            # Drop least recently used rows until the store is back under ~90% of the budget.
+            target = int(self.max_bytes * 0.9)
+            for key, size in conn.execute("SELECT key, size FROM cache_entries ORDER BY last_access ASC").fetchall():
+                if total <= target:
+                    break
+                conn.execute("DELETE FROM cache_entries WHERE key = ?", (key,))
+                total -= size
+                removed += 1
+        conn.commit()
+        self._stats["evictions"] += max(0, removed)
+
+    def note_bypass(self):
+        with self._lock:
+            self._stats["bypassed"] += 1
+
+    def delete(self, key: str) -> bool:
+        return self.delete_prefix(key, exact=True) > 0
+
+    def delete_prefix(self, prefix: str, exact: bool = False) -> int:
+        with self._lock:
+            doomed = [key for key in self._memory if (key == prefix if exact else key.startswith(prefix))]
+            for key in doomed:
+                del self._memory[key]
+            removed = len(doomed)
+            conn = self._db()
+            if conn is not None:
+                try:
+                    if exact:
+                        cursor = conn.execute("DELETE FROM cache_entries WHERE key = ?", (prefix,))
+                    else:
+                        cursor = conn.execute("DELETE FROM cache_entries WHERE substr(key, 1, ?) = ?", (len(prefix), prefix))
+                    conn.commit()
+                    removed = max(removed, cursor.rowcount)
+                except sqlite3.Error:
+                    self._stats["disk_errors"] += 1
+            return removed
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+            conn = self._db()
+            if conn is not None:
+                conn.execute("DELETE FROM cache_entries")
+                conn.commit()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._stats)
+            stats["memory_entries"] = len(self._memory)
+        hits = stats["memory_hits"] + stats["disk_hits"]
+        lookups = hits + stats["misses"]
+        stats["hit_rate"] = round(hits / lookups, 4) if lookups else 0.0
+        stats["enabled"] = self.enabled
+        stats["path"] = self.path
+        stats["ttl_sec"] = self.ttl_sec
+        stats["max_bytes"] = self.max_bytes
+        return stats
+
@@ -0,0 +1,46 @@
+# Per-call latency of the RandomForest fraud model: sklearn predict_proba vs the compiled flat-array engine.
+# Usage (from ai-service-python/): python -m benchmarks.forest_inference [calls]
+import sys
+import time
+
+import numpy as np
+
+from app.services.decision_service import score_decision
+from app.services.forest_inference import CompiledForest, validate_against_sklearn
+from app.services.model_store import _build_training_data, get_models
+
+
+def _latencies(fn, rows, calls):
+    samples = []
+    for i in range(calls):
+        x = rows[i % len(rows)]
+        started = time.perf_counter()
+        fn(x)
+        samples.append((time.perf_counter() - started) * 1e6)
+    return np.asarray(samples)
+
+
+def _report(label, samples, batch=1):
+    p50, p99 = np.percentile(samples, [50, 99])
+    print(f"{label:34} batch={batch:<5} p50={p50:>10.1f}us  p99={p99:>10.1f}us  rows/s={batch * 1e6 / max(p50, 1e-9):>12.0f}")
+
+
+def run(calls: int = 2000):
+    models = get_models()
+    forest = models["fraud_model"]
+    engine = models["fraud_engine"] or CompiledForest.from_sklearn(forest)
+    X = _build_training_data(seed=11, n=4096)[0]
+
+    print("validation:", validate_against_sklearn(forest, engine, X))
+    for batch in [1, 16, 256]:
+        rows = [X[i:i + batch] for i in range(0, len(X) - batch + 1, batch)]
+        sk_calls = calls if batch == 1 else max(50, calls // 10)
+        _report("sklearn predict_proba", _latencies(forest.predict_proba, rows, sk_calls), batch)
+        _report("compiled predict_positive", _latencies(engine.predict_positive, rows, calls), batch)
+
+    extracted = {"amounts": ["2500000"], "interest_rates": ["13.5"], "risk_indicators": ["x"], "clauses": ["a", "b"]}
+    _report("score_decision (end to end)", _latencies(lambda _: score_decision(extracted, {"violations_count": 1}), [None], calls))
+
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 2000)
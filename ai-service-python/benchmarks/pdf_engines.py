@@ -0,0 +1,59 @@
+# Per-engine PDF extraction throughput and adaptive escalation rate.
+# Usage (from ai-service-python/): python -m benchmarks.pdf_engines [pdf_dir_or_file ...]
+import sys
+import time
+from collections import Counter
+from pathlib import Path
+
+from app.services.extract_service import _iter_pdf_page_range_detailed
+
+DEFAULT_DIR = Path(__file__).resolve().parents[2] / "sample-data" / "documents"
+ENGINES = ["pypdf", "pdfplumber", "adaptive"]
+
+
+def _collect(paths):
+    files = []
+    for raw in paths:
+        p = Path(raw)
+        files.extend(sorted(p.glob("*.pdf")) if p.is_dir() else [p])
+    return files
+
+
+def run(paths, repeats: int = 3):
+    files = _collect(paths or [DEFAULT_DIR])
+    if not files:
+        print("No PDFs found.")
+        return
+
+    print(f"{'file':32} {'engine':11} {'pages':>5} {'pages/s':>9} {'chars':>8} {'escalated':>9}  reasons")
+    totals = {engine: {"pages": 0, "seconds": 0.0, "escalated": 0} for engine in ENGINES}
+    for path in files:
+        for engine in ENGINES:
+            best = None
+            for _ in range(repeats):
+                started = time.perf_counter()
+                pages = list(_iter_pdf_page_range_detailed(str(path), 0, engine=engine))
+                elapsed = time.perf_counter() - started
+                best = elapsed if best is None else min(best, elapsed)
+            escalated = [p for p in pages if engine == "adaptive" and p["engine"] == "pdfplumber"]
+            reasons = Counter(p["reason"] for p in escalated)
+            totals[engine]["pages"] += len(pages)
+            totals[engine]["seconds"] += best
+            totals[engine]["escalated"] += len(escalated)
+            chars = sum(len(p["text"]) for p in pages)
+            print(
+                f"{path.name[:32]:32} {engine:11} {len(pages):>5} {len(pages) / max(best, 1e-9):>9.1f} {chars:>8} "
+                f"{len(escalated):>9}  {dict(reasons) if reasons else ''}"
+            )
+
+    print()
+    for engine, t in totals.items():
+        rate = t["pages"] / max(t["seconds"], 1e-9)
+        line = f"{engine:11} {t['pages']:>6} pages  {rate:>9.1f} pages/s"
+        if engine == "adaptive" and t["pages"]:
+            line += f"  escalation rate {t['escalated'] / t['pages']:.1%}"
+        print(line)
+
+
+if __name__ == "__main__":
+    run(sys.argv[1:])
@@ -0,0 +1,136 @@
+# Compliance evaluation throughput at large rule counts (old per-rule loop vs the compiled, field-indexed plan),
+# plus a portfolio re-check comparing the per-document loop with columnar batch evaluation.
+# Usage (from ai-service-python/): python -m benchmarks.rule_engine [rules] [docs]
+import random
+import sys
+import time
+
+import numpy as np
+
+from app.services.rule_engine import RulePlan, rule_set_version
+
+FIELDS = [f"field_{i}" for i in range(40)] + ["names", "amounts", "interest_rates", "dates", "clauses", "obligations"]
+
+
+def _legacy_validate(extracted_data, rules):
+    # The pre-compilation loop, kept here as the baseline (count requirements only).
+    violations = []
+    for rule in rules:
+        field = rule.get("field")
+        requirement = rule.get("requirement")
+        values = extracted_data.get(field, [])
+        found_count = len(values) if isinstance(values, list) else 0
+        found_preview = values[:3] if isinstance(values, list) else []
+
+        def _violation_payload():
+            return {
+                "rule_id": rule.get("id"),
+                "severity": rule.get("severity", "MEDIUM"),
+                "message": rule.get("description"),
+                "field": field,
+                "requirement": requirement,
+                "expected": "At least one value must exist",
+                "found_count": found_count,
+                "found_preview": found_preview,
+                "why_flagged": f"Field '{field}' is missing or insufficient for requirement '{requirement}'.",
+                "suggestion": f"Add or clarify '{field}' content in the document so this rule can be satisfied.",
+            }
+
+        if requirement == "must_exist" and (not isinstance(values, list) or len(values) == 0):
+            violations.append(_violation_payload())
+        if requirement == "min_count_1" and len(values) < 1:
+            violations.append(_violation_payload())
+    return {"summary": {"status": "PASS" if not violations else "FAIL", "violations_count": len(violations)}, "violations": violations}
+
+
+def _rules(count: int, mixed: bool, rnd: random.Random):
+    rules = []
+    for i in range(count):
+        field = rnd.choice(FIELDS)
+        roll = rnd.random() if mixed else 0.0
+        rule = {"id": f"BENCH-{i:05d}", "field": field, "severity": rnd.choice(["LOW", "MEDIUM", "HIGH"]), "description": f"rule {i}"}
+        if roll < 0.55:
+            rule["requirement"] = rnd.choice(["must_exist", "min_count_1"])
+        elif roll < 0.75:
+            rule.update(requirement="min_count_n", min_count=rnd.randint(1, 4))
+        elif roll < 0.85:
+            rule.update(requirement="regex", pattern=rnd.choice([r"\d", r"^[A-Z]", r"(?i)clause", r"[a-z]{4,}"]))
+        elif roll < 0.95:
+            rule.update(requirement="numeric_range", min=rnd.choice([0, 1, 10]), max=rnd.choice([36, 1e6, 1e9]))
+        else:
+            rule.update(requirement="date_window", not_before="2015-01-01", max_future_days=3650)
+        rules.append(rule)
+    return rules
+
+
+def _documents(count: int, rnd: random.Random):
+    samples = ["Clause 4.2 repayment", "12.5%", "Rs 5,00,000", "15/03/2024", "Acme Finance Ltd", "borrower shall"]
+    docs = []
+    for _ in range(count):
+        # Mostly complete extractions: a handful of missing or empty fields per document.
+        docs.append({field: [rnd.choice(samples) for _ in range(rnd.randint(0 if rnd.random() < 0.1 else 1, 4))] for field in FIELDS if rnd.random() < 0.9})
+    return docs
+
+
+def _time(fn, docs):
+    samples = []
+    for doc in docs:
+        started = time.perf_counter()
+        fn(doc)
+        samples.append((time.perf_counter() - started) * 1e3)
+    return np.asarray(samples)
+
+
+def _report(label, samples, rules):
+    p50, p99 = np.percentile(samples, [50, 99])
+    docs_per_sec = len(samples) / (samples.sum() / 1e3)
+    print(f"{label:36} p50={p50:>8.3f}ms  p99={p99:>8.3f}ms  docs/s={docs_per_sec:>9.0f}  rule-evals/s={docs_per_sec * rules:>12.0f}")
+
+
+def _portfolio(rnd: random.Random, rule_count: int = 200, doc_count: int = 20000):
+    # Re-validating a stored portfolio: per-document loop vs one columnar pass.
+    print(f"\nportfolio re-check: {doc_count} documents x {rule_count} rules (mixed types)")
+    rules = _rules(rule_count, True, rnd)
+    plan = RulePlan(rules)
+    docs = _documents(doc_count, rnd)
+    started = time.perf_counter()
+    looped = [plan.evaluate(doc) for doc in docs]
+    loop_sec = time.perf_counter() - started
+    started = time.perf_counter()
+    batch = plan.evaluate_batch(docs)
+    batch_sec = time.perf_counter() - started
+    started = time.perf_counter()
+    plan.evaluate_batch(docs, include_details=False)
+    ids_sec = time.perf_counter() - started
+    print(f"identical results: {batch['results'] == looped}  violations: {batch['summary']['violations_total']}")
+    for label, sec in [("per-document loop", loop_sec), ("columnar batch", batch_sec), ("columnar batch, rule ids only", ids_sec)]:
+        print(f"{label:36} {sec:>7.2f}s  docs/s={doc_count / sec:>9.0f}")
+
+
+def run(rule_count: int = 12000, doc_count: int = 300):
+    rnd = random.Random(7)
+    docs = _documents(doc_count, rnd)
+    for mixed in (False, True):
+        rules = _rules(rule_count, mixed, rnd)
+        started = time.perf_counter()
+        version = rule_set_version(rules)
+        hashed = time.perf_counter()
+        plan = RulePlan(rules, version=version)
+        compiled = time.perf_counter()
+        label = "mixed requirement types" if mixed else "count requirements only"
+        print(f"\n{rule_count} rules, {label}: hash={1e3 * (hashed - started):.1f}ms compile={1e3 * (compiled - hashed):.1f}ms")
+        if not mixed:
+            mismatches = sum(_legacy_validate(doc, rules) != plan.evaluate(doc) for doc in docs[:50])
+            print(f"legacy/compiled mismatches on 50 docs: {mismatches}")
+            _report("legacy per-rule loop", _time(lambda d: _legacy_validate(d, rules), docs), rule_count)
+        _report("compiled plan", _time(plan.evaluate, docs), rule_count)
+        scoped = plan.scoped(FIELDS[:8])
+        _report(f"compiled plan, scoped ({len(scoped)} rules)", _time(scoped.evaluate, docs), len(scoped))
+    _portfolio(rnd)
+
+
+if __name__ == "__main__":
+    run(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 12000,
+        int(sys.argv[2]) if len(sys.argv) > 2 else 300,
+    )
@@ -0,0 +1,26 @@
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+# app.core.config refuses to import without the service's runtime env. Tests never reach DeepSeek,
+# and every cache or artifact they touch lives in a throwaway directory.
+_SCRATCH = tempfile.mkdtemp(prefix="riskiq-tests-")
+_ENV = {
+    "PORT": "8000",
+    "DEEPSEEK_API_KEY": "test-key",
+    "DEEPSEEK_BASE_URL": "http://127.0.0.1:9",
+    "DEEPSEEK_MODEL": "deepseek-test",
+    "RULES_PATH": str(Path(__file__).resolve().parents[2] / "rules" / "rules.json"),
+    "REPORTS_DIR": os.path.join(_SCRATCH, "reports"),
+    "LLM_CACHE_PATH": os.path.join(_SCRATCH, "llm_cache.sqlite3"),
+    "EXTRACTION_CACHE_PATH": os.path.join(_SCRATCH, "extraction_cache.sqlite3"),
+    "CONTEXT_REGISTRY_PATH": os.path.join(_SCRATCH, "context_registry.sqlite3"),
+    "MODEL_ARTIFACT_DIR": os.path.join(_SCRATCH, "models"),
+    "CPU_WORKERS": "0",
+    "MODEL_WARM_UP": "false",
+}
+for key, value in _ENV.items():
+    os.environ[key] = value
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
@@ -0,0 +1,52 @@
+import random
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from app.services import decision_service
+from app.services.decision_service import DECISION_BATCHER, get_models, score_decision, score_decisions, submit_decision
+from app.services.model_store import REGISTRY
+
+
+@pytest.fixture(scope="module")
+def version():
+    # Trains a small artifact into the test scratch directory on first use.
+    return REGISTRY.active_version(train_if_missing=True)
+
+
+def _items(count, seed):
+    rnd = random.Random(seed)
+    items = []
+    for _ in range(count):
+        extracted = {
+            "amounts": rnd.choice([[], ["Rs 5 lakh"], [rnd.uniform(1e3, 5e7)], ["nil"]]),
+            "interest_rates": rnd.choice([[], [rnd.uniform(1, 60)], ["14%"]]),
+            "risk_indicators": ["flag"] * rnd.randint(0, 4),
+            "clauses": ["clause"] * rnd.randint(0, 6),
+        }
+        items.append((extracted, {"violations_count": rnd.randint(0, 8)}))
+    return items
+
+
+@pytest.mark.parametrize("engines", ["compiled", "sklearn"])
+def test_batch_scoring_matches_single_documents(monkeypatch, version, engines):
+    if engines == "sklearn":
+        models = dict(get_models(version), risk_engine=None, fraud_engine=None)
+        monkeypatch.setattr(decision_service, "get_models", lambda v=None: models)
+    else:
+        assert get_models(version)["fraud_engine"] is not None
+    items = _items(96, seed=3)
+    batch = score_decisions(items, version)
+    assert batch == [score_decisions([item], version)[0] for item in items]
+    assert {r["risk_category"] for r in batch} >= {"LOW", "HIGH"}
+
+
+def test_micro_batched_submissions_match_direct_scoring(version):
+    items = _items(48, seed=9)
+    before = DECISION_BATCHER.stats()
+    with ThreadPoolExecutor(max_workers=16) as pool:
+        results = list(pool.map(lambda item: submit_decision(*item).result(timeout=30), items))
+    after = DECISION_BATCHER.stats()
+    assert after["items"] - before["items"] == len(items)
+    assert after["batches"] - before["batches"] < len(items)
+    assert results == [score_decision(*item) for item in items]
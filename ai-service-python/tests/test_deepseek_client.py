@@ -0,0 +1,126 @@
+import json
+
+import pytest
+import requests
+
+from app.services import deepseek_client
+from app.services.deepseek_client import CircuitBreaker, CircuitOpenError, DeepSeekClient, DeepSeekError
+from app.services.deepseek_service import _completion_data
+
+GOOD_BODY = json.dumps({"choices": [{"message": {"content": "ok"}}]})
+
+
+class FakeResponse:
+    def __init__(self, status_code, body="", headers=None):
+        self.status_code = status_code
+        self.text = body
+        self.headers = headers or {}
+
+    def json(self):
+        return json.loads(self.text)
+
+
+class FakeSession:
+    def __init__(self, outcomes):
+        self.outcomes = list(outcomes)
+        self.calls = 0
+
+    def post(self, url, json=None, timeout=None):
+        self.calls += 1
+        outcome = self.outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = Clock()
+    monkeypatch.setattr(deepseek_client.time, "monotonic", fake.monotonic)
+    monkeypatch.setattr(deepseek_client.time, "sleep", lambda _: None)
+    return fake
+
+
+def _client(outcomes, max_retries=1, threshold=2, cooldown_sec=30.0):
+    client = DeepSeekClient("http://deepseek.test", "key", max_retries=max_retries, breaker=CircuitBreaker(threshold, cooldown_sec))
+    client.session = FakeSession(outcomes)
+    return client
+
+
+def test_retries_ending_on_retryable_status_raise(clock):
+    client = _client([FakeResponse(503, "busy"), FakeResponse(503, "still busy")], max_retries=1)
+    with pytest.raises(DeepSeekError, match="DeepSeek API error 503: still busy"):
+        client.post_json("/chat/completions", {}, 5, parse=_completion_data)
+    assert client.session.calls == 2
+    stats = client.stats()
+    assert stats["retries"] == 1 and stats["failures"] == 1
+    assert client.breaker.consecutive_failures == 1
+
+
+def test_retry_recovers_after_transient_error(clock):
+    client = _client([requests.ConnectionError("reset"), FakeResponse(429, "slow down"), FakeResponse(200, GOOD_BODY)], max_retries=2)
+    data = client.post_json("/chat/completions", {}, 5, parse=_completion_data)
+    assert data["choices"][0]["message"]["content"] == "ok"
+    assert client.breaker.state == "CLOSED" and client.breaker.consecutive_failures == 0
+
+
+def test_non_retryable_client_error_is_not_retried(clock):
+    client = _client([FakeResponse(400, "bad request")], max_retries=3)
+    with pytest.raises(DeepSeekError, match="DeepSeek API error 400"):
+        client.post_json("/chat/completions", {}, 5, parse=_completion_data)
+    assert client.session.calls == 1
+    assert client.breaker.consecutive_failures == 0
+
+
+def test_breaker_opens_after_threshold_and_fails_fast(clock):
+    client = _client([FakeResponse(500, "x"), FakeResponse(500, "x")], max_retries=0, threshold=2)
+    for _ in range(2):
+        with pytest.raises(DeepSeekError):
+            client.post_json("/c", {}, 5, parse=_completion_data)
+    assert client.breaker.state == "OPEN"
+    with pytest.raises(CircuitOpenError):
+        client.post_json("/c", {}, 5, parse=_completion_data)
+    assert client.session.calls == 2
+    assert client.breaker.snapshot()["rejected_calls"] == 1
+
+
+def test_half_open_trial_success_closes(clock):
+    client = _client([FakeResponse(500, "x"), FakeResponse(200, GOOD_BODY)], max_retries=0, threshold=1, cooldown_sec=30)
+    with pytest.raises(DeepSeekError):
+        client.post_json("/c", {}, 5, parse=_completion_data)
+    assert client.breaker.state == "OPEN"
+    clock.now += 31
+    client.post_json("/c", {}, 5, parse=_completion_data)
+    assert client.breaker.state == "CLOSED"
+
+
+def test_half_open_allows_a_single_trial(clock):
+    breaker = CircuitBreaker(1, 30)
+    breaker.record_failure()
+    clock.now += 31
+    assert breaker.allow() is True
+    assert breaker.state == "HALF_OPEN"
+    assert breaker.allow() is False
+
+
+@pytest.mark.parametrize("body", ["not json", json.dumps({"unexpected": 1})])
+def test_malformed_trial_body_reopens_and_frees_the_trial(clock, body):
+    client = _client([FakeResponse(500, "x"), FakeResponse(200, body), FakeResponse(200, GOOD_BODY)], max_retries=0, threshold=1)
+    with pytest.raises(DeepSeekError):
+        client.post_json("/c", {}, 5, parse=_completion_data)
+    clock.now += 31
+    with pytest.raises((ValueError, KeyError)):
+        client.post_json("/c", {}, 5, parse=_completion_data)
+    assert client.breaker.state == "OPEN"
+    assert client.breaker.snapshot()["times_opened"] == 2
+    clock.now += 31
+    client.post_json("/c", {}, 5, parse=_completion_data)
+    assert client.breaker.state == "CLOSED"
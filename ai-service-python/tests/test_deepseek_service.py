@@ -0,0 +1,68 @@
+import json
+import threading
+import time
+
+from app.core.config import DEEPSEEK_MAX_PARALLEL
+from app.services import deepseek_service
+from app.services.deepseek_service import classify_document_type, extract_structured_data, split_text_chunks, submit_llm
+
+
+class InFlight:
+    def __init__(self, delay_sec=0.02):
+        self.delay_sec = delay_sec
+        self.current = 0
+        self.peak = 0
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def post_json(self, path, payload, timeout_sec, parse=None):
+        with self._lock:
+            self.current += 1
+            self.calls += 1
+            self.peak = max(self.peak, self.current)
+        time.sleep(self.delay_sec)
+        with self._lock:
+            self.current -= 1
+        excerpt = payload["messages"][1]["content"].rsplit("\n\n", 1)[-1]
+        content = json.dumps({"clauses": [excerpt[:20]]})
+        return {"choices": [{"message": {"content": content}}]}
+
+
+def _long_text(paragraphs, size=9000):
+    # Paragraphs over half of DEEPSEEK_CHUNK_CHARS, so each becomes its own chunk.
+    return "\n\n".join(f"Clause {i}. " + "x" * size for i in range(paragraphs))
+
+
+def test_chunk_fan_out_and_direct_calls_stay_within_max_parallel(monkeypatch):
+    # Extraction fans out to the fan-out pool while classification calls DeepSeek straight from the
+    # LLM pool; together they must still respect the single DEEPSEEK_MAX_PARALLEL budget.
+    fake = InFlight()
+    monkeypatch.setattr(deepseek_service, "DEEPSEEK_CLIENT", fake)
+    documents = 3 * DEEPSEEK_MAX_PARALLEL
+    extractions = [submit_llm(lambda i=i: extract_structured_data(_long_text(6) + f" doc {i}", use_cache=False)) for i in range(documents)]
+    classifications = [submit_llm(lambda i=i: classify_document_type(f"doc {i}", use_cache=False)) for i in range(documents)]
+    results = [future.result(timeout=60) for future in extractions]
+    for future in classifications:
+        future.result(timeout=60)
+    assert all(raw["mode"] == "chunked" and raw["chunk_count"] == 6 for _, raw in results)
+    assert fake.calls == documents * 7
+    assert fake.peak <= DEEPSEEK_MAX_PARALLEL
+
+
+def test_chunks_past_the_cap_are_reported_as_truncated(monkeypatch):
+    monkeypatch.setattr(deepseek_service, "DEEPSEEK_CLIENT", InFlight(delay_sec=0))
+    monkeypatch.setattr(deepseek_service, "DEEPSEEK_MAX_CHUNKS", 2)
+    text = _long_text(5)
+    merged, raw = extract_structured_data(text, use_cache=False, chunked=True)
+    chunks = split_text_chunks(text)
+    assert raw["chunk_count"] == 2
+    assert raw["chunks_total"] == len(chunks) == 5
+    assert raw["truncated"] is True
+    assert raw["chars_dropped"] == sum(len(c) for c in chunks[2:])
+    assert len(merged["clauses"]) == 2
+
+
+def test_short_documents_are_not_marked_truncated(monkeypatch):
+    monkeypatch.setattr(deepseek_service, "DEEPSEEK_CLIENT", InFlight(delay_sec=0))
+    _, raw = extract_structured_data(_long_text(3), use_cache=False, chunked=True)
+    assert raw["truncated"] is False and raw["chars_dropped"] == 0
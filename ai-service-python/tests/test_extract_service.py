@@ -0,0 +1,102 @@
+import io
+import threading
+
+import pdfplumber
+import pytest
+from reportlab.lib.pagesizes import letter
+from reportlab.pdfgen import canvas
+
+from app.services import extract_service
+from app.services.extract_service import DocumentSource, LazyPdfText, _DocumentBase, _broken_text_reason, _iter_pdf_page_range_detailed
+
+
+def _pdf(pages):
+    # One page per entry: a list of lines, or [] for a page with no text layer.
+    buffer = io.BytesIO()
+    pdf = canvas.Canvas(buffer, pagesize=letter)
+    for lines in pages:
+        for i, line in enumerate(lines):
+            pdf.drawString(72, 720 - 14 * i, line)
+        pdf.showPage()
+    pdf.save()
+    return buffer.getvalue()
+
+
+def test_pages_without_characters_have_no_broken_text_reason():
+    assert _broken_text_reason("", 612, 792) is None
+    assert _broken_text_reason(" \n\t ", 612, 792) is None
+    assert _broken_text_reason("Page 1", 612, 792) == "low_char_density"
+
+
+def test_blank_page_skips_pdfplumber_and_sparse_page_escalates(monkeypatch):
+    opened = []
+    real_open = pdfplumber.open
+    monkeypatch.setattr(extract_service.pdfplumber, "open", lambda src: opened.append(src) or real_open(src))
+    dense = [f"Clause {i}. The supplier shall deliver the goods described in schedule {i}." for i in range(40)]
+    data = _pdf([dense, [], ["Page 3"]])
+
+    pages = list(_iter_pdf_page_range_detailed(data, 0, engine="adaptive"))
+
+    assert [p["engine"] for p in pages] == ["pypdf", "pypdf", "pdfplumber"]
+    assert pages[1] == {"text": "", "engine": "pypdf", "reason": None}
+    assert pages[2]["reason"] == "low_char_density"
+    assert len(opened) == 1
+
+
+def test_blank_only_document_never_opens_pdfplumber(monkeypatch):
+    monkeypatch.setattr(extract_service.pdfplumber, "open", lambda src: (_ for _ in ()).throw(AssertionError("pdfplumber opened")))
+    pages = list(_iter_pdf_page_range_detailed(_pdf([[], []]), 0, engine="adaptive"))
+    assert [p["engine"] for p in pages] == ["pypdf", "pypdf"]
+
+
+def test_lazy_pdf_reads_the_prefix_without_parsing_the_rest(monkeypatch):
+    rest_calls = []
+    real_extract = extract_service.extract_pdf_pages
+    monkeypatch.setattr(extract_service, "extract_pdf_pages", lambda *a, **kw: rest_calls.append(kw) or real_extract(*a, **kw))
+    threads_before = threading.active_count()
+    pages = [[f"Page {n} clause {i}: payment is due within thirty days of the invoice date." for i in range(30)] for n in range(4)]
+    document = LazyPdfText(DocumentSource("contract.pdf", data=_pdf(pages)), prefix_chars=200)
+
+    assert document.prefix(200).startswith("Page 0 clause 0")
+    assert rest_calls == []
+    assert threading.active_count() == threads_before
+
+    text = document.text()
+    assert rest_calls == [{"start": 1, "page_count": 4}]
+    assert "Page 3 clause 29" in text
+    assert document.meta()["page_count"] == 4
+    assert document.prefix(200) == text[:200]
+
+
+def test_document_base_requires_text_and_prefix():
+    with pytest.raises(TypeError):
+        _DocumentBase()
+
+
+def test_pipeline_reads_the_prefix_before_classify_takes_an_llm_slot(monkeypatch, tmp_path):
+    from app.services import agent_orchestrator
+    from app.services.model_store import REGISTRY
+
+    REGISTRY.active_version(train_if_missing=True)
+    prefix_threads, classify_calls = [], []
+    real_prefix = LazyPdfText.prefix
+    monkeypatch.setattr(LazyPdfText, "prefix", lambda self, n: prefix_threads.append(threading.current_thread().name) or real_prefix(self, n))
+    monkeypatch.setattr(
+        agent_orchestrator,
+        "classify_document_type",
+        lambda text, use_cache=True: classify_calls.append((threading.current_thread().name, text)) or ({"document_type": "loan_agreement", "confidence": 0.9}, "{}"),
+    )
+    monkeypatch.setattr(agent_orchestrator, "extract_structured_data", lambda text, system_prompt=None, use_cache=True: ({"names": ["Asha Rao"]}, "{}"))
+    path = tmp_path / "loan.pdf"
+    path.write_bytes(_pdf([[f"Clause {i}. The borrower shall repay the loan in monthly instalments." for i in range(40)] for _ in range(3)]))
+    context = agent_orchestrator.resolve_context(None, None, None)
+
+    run = agent_orchestrator._pipeline(str(path), "loan.pdf", context, use_cache=False).run()
+
+    assert run.graph.stages["classify"].deps == ["prefix"]
+    assert prefix_threads and not any(name.startswith("deepseek") for name in prefix_threads)
+    [(classify_thread, classify_text)] = classify_calls
+    assert classify_thread.startswith("deepseek") and classify_text == run.results["prefix"]
+    assert classify_text.startswith("Clause 0.")
+    prefix, classify = run.stage_timing("prefix"), run.stage_timing("classify")
+    assert classify["start_ms"] >= prefix["start_ms"] + prefix["duration_ms"]
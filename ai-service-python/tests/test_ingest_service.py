@@ -0,0 +1,42 @@
+import asyncio
+import hashlib
+import os
+import tempfile
+
+from starlette.datastructures import UploadFile
+
+from app.services import ingest_service
+from app.services.ingest_service import ingest_upload
+
+
+def _upload(data, name="scan.pdf"):
+    # Same spooling Starlette applies to multipart bodies: in memory up to 1 MB, then an anonymous file.
+    spooled = tempfile.SpooledTemporaryFile(max_size=1024 * 1024)
+    spooled.write(data)
+    spooled.seek(0)
+    return UploadFile(spooled, filename=name)
+
+
+def test_small_upload_stays_in_memory():
+    data = b"%PDF-1.4 small"
+    source = asyncio.run(ingest_upload(_upload(data)))
+    assert source.in_memory and source.data == data
+    assert source.content_hash() == hashlib.sha256(data).hexdigest()
+
+
+def test_large_upload_spills_to_a_named_file_removed_on_close(monkeypatch, tmp_path):
+    monkeypatch.setattr(ingest_service, "MEMORY_MAX_BYTES", 64 * 1024)
+    monkeypatch.setattr(ingest_service, "CHUNK_BYTES", 16 * 1024)
+    monkeypatch.setattr(ingest_service, "INGEST_SPILL_DIR", str(tmp_path))
+    data = os.urandom(2 * 1024 * 1024)
+    upload = _upload(data)
+    upload.file.read(10)
+
+    source = asyncio.run(ingest_upload(upload, "big.pdf"))
+
+    assert not source.in_memory
+    assert source.path.parent == tmp_path and source.path.suffix == ".pdf"
+    assert source.path.read_bytes() == data
+    assert source.content_hash() == hashlib.sha256(data).hexdigest()
+    source.close()
+    assert list(tmp_path.iterdir()) == []
@@ -0,0 +1,84 @@
+import json
+import threading
+import time
+
+import pytest
+
+from app.services import model_store
+from app.services.model_store import ModelRegistry
+
+
+@pytest.fixture
+def registry(tmp_path):
+    for version in ("v1", "v2"):
+        (tmp_path / version).mkdir()
+    (tmp_path / "registry.json").write_text(json.dumps({"active": "v1", "shadow": "v2", "shadow_sample_rate": 0.5}))
+    return ModelRegistry(root=tmp_path, cache_versions=2, poll_sec=0)
+
+
+class SlowLoader:
+    def __init__(self, delay_sec=0.3, fail=False):
+        self.delay_sec = delay_sec
+        self.fail = fail
+        self.calls = []
+        self.started = threading.Event()
+
+    def __call__(self, version, root):
+        self.calls.append(version)
+        self.started.set()
+        time.sleep(self.delay_sec)
+        if self.fail:
+            raise ValueError(f"Model artifact {version} failed integrity check")
+        return {"manifest": {"version": version}}
+
+
+def test_lookups_do_not_wait_behind_a_load(monkeypatch, registry):
+    loader = SlowLoader()
+    monkeypatch.setattr(model_store, "load_models", loader)
+    loading = threading.Thread(target=registry.get, args=("v2",))
+    loading.start()
+    assert loader.started.wait(5)
+
+    started = time.perf_counter()
+    assert registry.active_version(train_if_missing=False) == "v1"
+    assert registry.shadow() == ("v2", 0.5)
+    assert registry.describe()["loaded_in_process"] == []
+    assert time.perf_counter() - started < loader.delay_sec / 2
+    loading.join()
+    assert registry.describe()["loaded_in_process"] == ["v2"]
+
+
+def test_concurrent_gets_share_one_load(monkeypatch, registry):
+    loader = SlowLoader(delay_sec=0.1)
+    monkeypatch.setattr(model_store, "load_models", loader)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(registry.get("v1"))) for _ in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert loader.calls == ["v1"]
+    assert len(results) == 6 and all(models is results[0] for models in results)
+
+
+def test_failed_load_is_raised_to_every_waiter_and_not_cached(monkeypatch, registry):
+    loader = SlowLoader(delay_sec=0.1, fail=True)
+    monkeypatch.setattr(model_store, "load_models", loader)
+    errors = []
+
+    def _get():
+        try:
+            registry.get("v1")
+        except ValueError as exc:
+            errors.append(exc)
+
+    threads = [threading.Thread(target=_get) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(errors) == 3 and loader.calls == ["v1"]
+
+    loader.fail = False
+    assert registry.get("v1") == {"manifest": {"version": "v1"}}
+    assert loader.calls == ["v1", "v1"]
@@ -0,0 +1,84 @@
+from datetime import date, timedelta
+
+import pytest
+
+from app.services.agent_orchestrator import reevaluate_compliance
+from app.services.compliance_service import validate_rules
+from app.services.model_store import REGISTRY
+from app.services.rule_engine import compile_rules, diff_rule_sets
+
+RULES = [
+    {"id": "R-1", "field": "names", "requirement": "must_exist", "severity": "LOW", "description": "Parties named"},
+    {"id": "R-2", "field": "amounts", "requirement": "numeric_range", "max": 1e6, "severity": "MEDIUM"},
+    {"id": "R-3", "field": "clauses", "requirement": "min_count_1", "severity": "LOW"},
+]
+
+
+@pytest.fixture(scope="module", autouse=True)
+def models():
+    REGISTRY.active_version(train_if_missing=True)
+
+
+def _session(structured, rules, today=None):
+    return {
+        "structured_data": structured,
+        "document_profile": {"document_type_confidence": 0.8},
+        "compliance": compile_rules(rules).evaluate(structured, today),
+        # A stored orchestration decision: anything recomputed replaces it wholesale.
+        "decision": {"score": 0.5, "risk_category": "MEDIUM", "verification": {}, "stale": True},
+    }
+
+
+def test_severity_only_edit_rescores_and_reverifies():
+    structured = {"amounts": ["Rs 50 lakh"], "clauses": ["Clause 1"]}
+    session = _session(structured, RULES)
+    assert session["compliance"]["summary"]["violations_count"] == 2
+    edited = [dict(RULES[0], severity="HIGH")] + RULES[1:]
+
+    result = reevaluate_compliance([session], RULES, edited, None)
+    item = result["results"][0]
+
+    assert result["diff"]["changed"] == ["R-1"]
+    assert item["changed"] and item["rescored"]
+    assert item["compliance"]["summary"]["violations_count"] == 2
+    assert item["compliance"]["violations"][0]["severity"] == "HIGH"
+    assert item["compliance"] == validate_rules(structured, edited)
+    decision = item["decision"]
+    assert "stale" not in decision
+    assert decision["verification"]["violations"] == 2
+    assert {"severity": "HIGH", "message": "Compliance violation: R-1", "source": "ComplianceAgent"} in item["alerts"]
+
+
+def test_unchanged_violations_keep_the_stored_decision():
+    structured = {"names": ["Asha Rao"], "amounts": ["5000"], "clauses": ["Clause 1"]}
+    session = _session(structured, RULES)
+    edited = RULES[:2] + [dict(RULES[2], severity="HIGH")]
+
+    item = reevaluate_compliance([session], RULES, edited, None)["results"][0]
+
+    assert not item["changed"] and not item["rescored"]
+    assert item["decision"] is session["decision"]
+
+
+def test_relative_date_window_is_rechecked_against_today():
+    rules = RULES + [{"id": "R-4", "field": "dates", "requirement": "date_window", "max_age_days": 90, "severity": "HIGH"}]
+    signed = date.today() - timedelta(days=120)
+    structured = {"names": ["Asha Rao"], "amounts": ["5000"], "clauses": ["Clause 1"], "dates": [signed.isoformat()]}
+    # Stored when the document was 60 days old and inside the window.
+    session = _session(structured, rules, today=signed + timedelta(days=60))
+    assert session["compliance"]["summary"]["status"] == "PASS"
+
+    result = reevaluate_compliance([session], rules, rules, None)
+    item = result["results"][0]
+
+    assert result["diff"]["time_relative"] == ["R-4"]
+    assert result["diff"]["reevaluated_rules"] == 1
+    assert [v["rule_id"] for v in item["compliance"]["violations"]] == ["R-4"]
+    assert item["changed"] and item["rescored"]
+    assert item["decision"]["verification"]["violations"] == 1
+
+
+def test_fixed_date_window_stays_clean():
+    rules = RULES + [{"id": "R-4", "field": "dates", "requirement": "date_window", "not_before": "2020-01-01"}]
+    diff = diff_rule_sets(rules, rules)
+    assert diff.empty and diff.time_relative == []
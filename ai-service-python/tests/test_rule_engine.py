@@ -0,0 +1,193 @@
+import random
+import re
+from datetime import date, timedelta
+
+import pytest
+
+from app.services.compliance_service import validate_rules, validate_rules_batch
+from app.services.rule_engine import compile_rules, parse_date, parse_number
+
+TODAY = date(2026, 10, 17)
+
+
+def _legacy_validate_rules(extracted_data, rules):
+    # compliance_service.validate_rules before rules were compiled, kept verbatim as the reference.
+    violations = []
+
+    for rule in rules:
+        rule_id = rule.get("id")
+        field = rule.get("field")
+        requirement = rule.get("requirement")
+        severity = rule.get("severity", "MEDIUM")
+
+        values = extracted_data.get(field, [])
+        found_count = len(values) if isinstance(values, list) else 0
+        found_preview = values[:3] if isinstance(values, list) else []
+
+        def _violation_payload():
+            expected = "At least one value must exist" if requirement in {"must_exist", "min_count_1"} else "Rule condition not satisfied"
+            why_flagged = f"Field '{field}' is missing or insufficient for requirement '{requirement}'."
+            suggestion = f"Add or clarify '{field}' content in the document so this rule can be satisfied."
+            return {
+                "rule_id": rule_id,
+                "severity": severity,
+                "message": rule.get("description"),
+                "field": field,
+                "requirement": requirement,
+                "expected": expected,
+                "found_count": found_count,
+                "found_preview": found_preview,
+                "why_flagged": why_flagged,
+                "suggestion": suggestion,
+            }
+
+        if requirement == "must_exist":
+            if not isinstance(values, list) or len(values) == 0:
+                violations.append(_violation_payload())
+
+        if requirement == "min_count_1" and len(values) < 1:
+            violations.append(_violation_payload())
+
+    status = "PASS" if len(violations) == 0 else "FAIL"
+    return {
+        "summary": {
+            "status": status,
+            "violations_count": len(violations),
+        },
+        "violations": violations,
+    }
+
+
+def _reference_violated(record, rule, today):
+    # Plain per-rule reading of each requirement type, independent of the compiled plan.
+    values = record.get(rule["field"], [])
+    items = [v for v in (values if isinstance(values, list) else ([values] if values else [])) if v is not None]
+    requirement = rule["requirement"]
+    mode = rule.get("match", "all" if requirement == "numeric_range" else "any")
+
+    def _holds(flags):
+        return bool(flags) and (all(flags) if mode == "all" else any(flags))
+
+    if requirement == "must_exist":
+        return not isinstance(values, list) or not values
+    count_match = re.match(r"^min_count_(\d+)$", requirement)
+    if count_match or requirement == "min_count_n":
+        needed = int(count_match.group(1)) if count_match else rule["min_count"]
+        return (len(values) if isinstance(values, list) else (1 if values else 0)) < needed
+    if requirement == "regex":
+        return not _holds([re.search(rule["pattern"], str(v)) is not None for v in items])
+    if requirement == "numeric_range":
+        numbers = [n for n in (parse_number(v) for v in items) if n is not None]
+        return not _holds([(rule.get("min") is None or n >= rule["min"]) and (rule.get("max") is None or n <= rule["max"]) for n in numbers])
+    if requirement == "date_window":
+        low = date.fromisoformat(rule["not_before"]) if rule.get("not_before") else None
+        high = date.fromisoformat(rule["not_after"]) if rule.get("not_after") else None
+        if rule.get("max_age_days") is not None:
+            earliest = today - timedelta(days=rule["max_age_days"])
+            low = max(low, earliest) if low else earliest
+        if rule.get("max_future_days") is not None:
+            latest = today + timedelta(days=rule["max_future_days"])
+            high = min(high, latest) if high else latest
+        dates = [d for d in (parse_date(v) for v in items) if d is not None]
+        return not _holds([(low is None or d >= low) and (high is None or d <= high) for d in dates])
+    return False
+
+
+COUNT_RULES = [
+    {"id": "C-1", "field": "names", "requirement": "must_exist", "severity": "HIGH", "description": "Parties named"},
+    {"id": "C-2", "field": "amounts", "requirement": "min_count_1", "description": "Amount disclosed"},
+    {"id": "C-3", "field": "clauses", "requirement": "must_exist", "severity": "LOW"},
+    {"id": "C-4", "field": "clauses", "requirement": "min_count_1", "severity": "MEDIUM"},
+    {"id": "C-5", "field": "dates", "requirement": "must_be_positive", "severity": "HIGH"},
+    {"id": "C-6", "field": "interest_rates", "requirement": "cross_check_bureau"},
+]
+
+PREDICATE_RULES = COUNT_RULES + [
+    {"id": "P-1", "field": "clauses", "requirement": "min_count_3"},
+    {"id": "P-2", "field": "names", "requirement": "min_count_n", "min_count": 2},
+    {"id": "P-3", "field": "clauses", "requirement": "regex", "pattern": r"[Rr]epayment"},
+    {"id": "P-4", "field": "names", "requirement": "regex", "pattern": r"^[A-Z]", "match": "all"},
+    {"id": "P-5", "field": "amounts", "requirement": "numeric_range", "min": 1000, "max": 5e6},
+    {"id": "P-6", "field": "interest_rates", "requirement": "numeric_range", "max": 36, "match": "any"},
+    {"id": "P-7", "field": "dates", "requirement": "date_window", "not_before": "2024-01-01", "not_after": "2027-12-31"},
+    {"id": "P-8", "field": "dates", "requirement": "date_window", "max_age_days": 365, "match": "all"},
+    {"id": "P-9", "field": "dates", "requirement": "date_window", "not_before": "2025-06-01", "max_future_days": 30},
+]
+
+_POOLS = {
+    "names": ["Asha Rao", "acme finance", "Bharat Lending Ltd", "", "R. Mehta"],
+    "amounts": ["Rs 5 lakh", "1,20,000", "INR 2.5 crore", "750", 250000, "nil", "12 million"],
+    "interest_rates": ["12.5%", "48% p.a.", 9, "floating", "24"],
+    "dates": ["2026-01-15", "15/03/2025", "5th March 2024", "Nov 2, 2026", "31/12/2030", "2019-07-01", "soon"],
+    "clauses": ["Clause 4.2 repayment schedule", "Prepayment penalty of 2%", "Governing law", "repayment on demand"],
+}
+
+
+def _records(count, seed, scalars=True):
+    rnd = random.Random(seed)
+    records = []
+    for _ in range(count):
+        record = {}
+        for field, pool in _POOLS.items():
+            roll = rnd.random()
+            if roll < 0.15:
+                continue
+            if roll < 0.25:
+                record[field] = []
+            elif scalars and roll < 0.35:
+                record[field] = rnd.choice([v for v in pool if isinstance(v, str)])
+            else:
+                record[field] = [rnd.choice(pool) for _ in range(rnd.randint(1, 4))]
+        records.append(record)
+    return records
+
+
+def test_compiled_count_rules_match_the_legacy_loop():
+    for record in _records(300, seed=7):
+        assert compile_rules(COUNT_RULES).evaluate(record, TODAY) == _legacy_validate_rules(record, COUNT_RULES)
+        assert validate_rules(record, COUNT_RULES) == _legacy_validate_rules(record, COUNT_RULES)
+
+
+@pytest.mark.parametrize("today", [TODAY, date(2025, 3, 1)])
+def test_compiled_predicates_match_the_reference(today):
+    plan = compile_rules(PREDICATE_RULES)
+    for record in _records(300, seed=11):
+        result = plan.evaluate(record, today)
+        expected_ids = [rule["id"] for rule in PREDICATE_RULES if _reference_violated(record, rule, today)]
+        assert [v["rule_id"] for v in result["violations"]] == expected_ids
+        assert result["summary"] == {"status": "FAIL" if expected_ids else "PASS", "violations_count": len(expected_ids)}
+        for violation in result["violations"]:
+            values = record.get(violation["field"], [])
+            assert violation["found_count"] == (len(values) if isinstance(values, list) else 0)
+            assert violation["found_preview"] == (values[:3] if isinstance(values, list) else [])
+
+
+def test_unsupported_requirements_never_violate():
+    plan = compile_rules(COUNT_RULES)
+    assert plan.unsupported == ["C-5", "C-6"]
+    assert [v["rule_id"] for v in plan.evaluate({}, TODAY)["violations"]] == ["C-1", "C-2", "C-3", "C-4"]
+
+
+def test_batch_evaluation_matches_single_documents():
+    plan = compile_rules(PREDICATE_RULES)
+    records = _records(400, seed=23)
+    batch = plan.evaluate_batch(records, TODAY)
+    singles = [plan.evaluate(record, TODAY) for record in records]
+    assert batch["results"] == singles
+    assert batch["count"] == len(records)
+    assert batch["summary"]["documents_failed"] == sum(1 for r in singles if r["violations"])
+    assert batch["summary"]["violations_total"] == sum(r["summary"]["violations_count"] for r in singles)
+    breaches = {}
+    for result in singles:
+        for violation in result["violations"]:
+            breaches[violation["rule_id"]] = breaches.get(violation["rule_id"], 0) + 1
+    assert {b["rule_id"]: b["documents"] for b in batch["breaches_by_rule"]} == breaches
+
+    compact = plan.evaluate_batch(records, TODAY, include_details=False)
+    assert [r["violated_rule_ids"] for r in compact["results"]] == [[v["rule_id"] for v in r["violations"]] for r in singles]
+
+
+def test_compliance_batch_matches_validate_rules():
+    records = _records(120, seed=31)
+    batch = validate_rules_batch(records, PREDICATE_RULES)
+    assert batch["results"] == [validate_rules(record, PREDICATE_RULES) for record in records]
@@ -1,4 +1,5 @@
 import axios from "axios";
+import crypto from "crypto";
 import { env } from "../config/env.js";
 
 const client = axios.create({
@@ -16,23 +17,105 @@ export async function orchestrateAgents(payload) {
   return data;
 }
 
-export async function orchestrateAgentsUpload(payload) {
+// Rules, knowledge base and prompts are registered with the AI service once per distinct content;
+// uploads then send only the returned hashes instead of the full JSON.
+const registeredContext = new Map();
+
+async function contextRef(kind, items) {
+  const body = JSON.stringify({ items: items || [] });
+  const key = `${kind}:${crypto.createHash("sha256").update(body).digest("hex")}`;
+  if (!registeredContext.has(key)) {
+    const { data } = await client.post(`/context/${kind}`, body, { headers: { "Content-Type": "application/json" } });
+    registeredContext.set(key, data.hash);
+  }
+  return { key, hash: registeredContext.get(key) };
+}
+
+function orchestrateForm(payload, refs) {
   const form = new FormData();
   const blob = new Blob([payload.fileBuffer], { type: "application/octet-stream" });
   form.append("file", blob, payload.file_name || "document.bin");
   form.append("file_name", payload.file_name || "document.bin");
   form.append("file_path", payload.file_path || "");
-  form.append("rules", JSON.stringify(payload.rules || []));
-  form.append("knowledge_base", JSON.stringify(payload.knowledge_base || []));
-  form.append("agent_prompts", JSON.stringify(payload.agent_prompts || []));
+  form.append("rules_ref", refs.rules.hash);
+  form.append("knowledge_base_ref", refs.knowledge_base.hash);
+  form.append("agent_prompts_ref", refs.prompts.hash);
+  return form;
+}
+
+async function readBody(response) {
+  const contentType = response.headers.get("content-type") || "";
+  return contentType.includes("application/json") ? response.json() : response.text();
+}
 
+async function postOrchestrateUpload(payload, refs) {
   const response = await fetch(`${env.pythonServiceUrl}/orchestrate-agents-upload`, {
+    method: "POST",
+    body: orchestrateForm(payload, refs)
+  });
+  return { response, body: await readBody(response) };
+}
+
+// NDJSON variant: stage/agent events are passed to onEvent as they arrive; the final "result"
+// event carries the same body as the non-streaming endpoint, and an "error" event maps to its status.
+async function streamOrchestrateUpload(payload, refs, onEvent) {
+  const form = orchestrateForm(payload, refs);
+  form.append("stream_format", "ndjson");
+  const response = await fetch(`${env.pythonServiceUrl}/orchestrate-agents-upload/stream`, {
     method: "POST",
     body: form
   });
+  if (!response.ok) {
+    return { response, body: await readBody(response) };
+  }
 
-  const contentType = response.headers.get("content-type") || "";
-  const body = contentType.includes("application/json") ? await response.json() : await response.text();
+  const decoder = new TextDecoder();
+  let buffered = "";
+  let result = null;
+  let failure = null;
+  for await (const chunk of response.body) {
+    buffered += decoder.decode(chunk, { stream: true });
+    let newline;
+    while ((newline = buffered.indexOf("\n")) >= 0) {
+      const line = buffered.slice(0, newline).trim();
+      buffered = buffered.slice(newline + 1);
+      if (!line) continue;
+      const event = JSON.parse(line);
+      if (event.event === "result") {
+        result = event.data;
+      } else if (event.event === "error") {
+        failure = event;
+      } else {
+        await onEvent(event);
+      }
+    }
+  }
+
+  if (failure) {
+    return { response: { ok: false, status: failure.status_code }, body: { detail: failure.detail } };
+  }
+  if (!result) {
+    return { response: { ok: false, status: 502 }, body: { detail: "orchestrate_stream_incomplete" } };
+  }
+  return { response, body: result };
+}
+
+export async function orchestrateAgentsUpload(payload, { onEvent } = {}) {
+  const post = (refs) => (onEvent ? streamOrchestrateUpload(payload, refs, onEvent) : postOrchestrateUpload(payload, refs));
+  const resolveRefs = async () => ({
+    rules: await contextRef("rules", payload.rules),
+    knowledge_base: await contextRef("knowledge_base", payload.knowledge_base),
+    prompts: await contextRef("prompts", payload.agent_prompts)
+  });
+
+  let refs = await resolveRefs();
+  let { response, body } = await post(refs);
+  if (response.status === 404 && String(body?.detail || "").startsWith("context_not_found")) {
+    // The service expired or invalidated an entry (or restarted without its cache); register again and retry once.
+    Object.values(refs).forEach((ref) => registeredContext.delete(ref.key));
+    refs = await resolveRefs();
+    ({ response, body } = await post(refs));
+  }
   if (!response.ok) {
     throw new Error(typeof body === "string" ? body : JSON.stringify(body));
   }
@@ -5,6 +5,35 @@ import { pgPool } from "../db/postgres.js";
 import { getMongoDb } from "../db/mongo.js";
 import { generateReport, orchestrateAgentsUpload } from "./aiService.js";
 
+// Agent names in the AI service's stage events, mapped to the job tracker's stages.
+const AGENT_STAGES = {
+  DocumentAgent: { stage: "DOCUMENT_AGENT", running: "Extracting structured data via DeepSeek.", completed: "Document entities extracted." },
+  ComplianceAgent: { stage: "COMPLIANCE_AGENT", running: "Applying GVR standards and validating clauses.", completed: "Regulatory checks executed." },
+  DecisionAgent: { stage: "DECISION_AGENT", running: "Computing two-layer verified risk score.", completed: "Risk scoring completed." },
+  MonitoringAgent: { stage: "MONITORING_AGENT", running: "Evaluating anomaly and alert conditions.", completed: "Alerts and anomalies evaluated." },
+  ReportingAgent: { stage: "REPORTING_AGENT", running: "Curating institutional report narrative.", completed: "Report narrative generated." }
+};
+
+function agentStageTracker(onStage) {
+  const started = new Set();
+  const start = async (agent) => {
+    if (started.has(agent)) return;
+    started.add(agent);
+    await onStage({ stage: AGENT_STAGES[agent].stage, status: "running", message: AGENT_STAGES[agent].running });
+  };
+  return {
+    start,
+    onEvent: async (event) => {
+      if (!AGENT_STAGES[event.agent]) return;
+      await start(event.agent);
+      if (event.event === "agent") {
+        const ms = Math.round(event.timing?.duration_ms || 0);
+        await onStage({ stage: AGENT_STAGES[event.agent].stage, status: "completed", message: `${AGENT_STAGES[event.agent].completed} (${ms} ms)` });
+      }
+    }
+  };
+}
+
 export async function runWorkflow({ filePath, originalName, userId }) {
   return runWorkflowWithHooks({ filePath, originalName, userId });
 }
@@ -34,7 +63,9 @@ export async function runWorkflowWithHooks({ filePath, originalName, userId, onS
     )
   ]);
 
-  await onStage({ stage: "DOCUMENT_AGENT", status: "running", message: "Extracting structured data via DeepSeek." });
+  // Agent stages are marked from the AI service's real stage events as the pipeline runs.
+  const tracker = agentStageTracker(onStage);
+  await tracker.start("DocumentAgent");
   const run = await orchestrateAgentsUpload({
     file_path: filePath,
     file_name: originalName,
@@ -49,16 +80,7 @@ export async function runWorkflowWithHooks({ filePath, originalName, userId, onS
     })),
     knowledge_base: knowledgeResult.rows,
     agent_prompts: promptsResult.rows
-  });
-  await onStage({ stage: "DOCUMENT_AGENT", status: "completed", message: "Document entities extracted." });
-  await onStage({ stage: "COMPLIANCE_AGENT", status: "running", message: "Applying GVR standards and validating clauses." });
-  await onStage({ stage: "COMPLIANCE_AGENT", status: "completed", message: "Regulatory checks executed." });
-  await onStage({ stage: "DECISION_AGENT", status: "running", message: "Computing two-layer verified risk score." });
-  await onStage({ stage: "DECISION_AGENT", status: "completed", message: "Risk scoring completed." });
-  await onStage({ stage: "MONITORING_AGENT", status: "running", message: "Evaluating anomaly and alert conditions." });
-  await onStage({ stage: "MONITORING_AGENT", status: "completed", message: "Alerts and anomalies evaluated." });
-  await onStage({ stage: "REPORTING_AGENT", status: "running", message: "Curating institutional report narrative." });
-  await onStage({ stage: "REPORTING_AGENT", status: "completed", message: "Report narrative generated." });
+  }, { onEvent: tracker.onEvent });
 
   await onStage({ stage: "PERSISTENCE", status: "running", message: "Persisting outputs and report metadata." });
   const mongoDoc = await mongo.collection("documents").findOneAndUpdate(